@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import UserProfile, LostFoundItem
+from .models import UserProfile, LostFoundItem, ArchivedItem, Location, NotificationJob
 
 @admin.register(UserProfile)
 class CustomUserAdmin(UserAdmin):
@@ -16,4 +16,31 @@ class LostFoundItemAdmin(admin.ModelAdmin):
     list_filter = ("category", "is_deleted")
     ordering = ("-created_at",)
 
+    def has_delete_permission(self, request, obj=None):
+        # Soft delete instead; only archive_items removes rows, and other processes follow its log
+        return False
 
+@admin.register(ArchivedItem)
+class ArchivedItemAdmin(admin.ModelAdmin):
+    list_display = ("original_id", "reason", "item_created_at", "archived_at")
+    list_filter = ("reason",)
+    search_fields = ("original_id",)
+    ordering = ("-archived_at",)
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ("name", "aliases", "is_active", "is_approved", "updated_at")
+    list_editable = ("is_approved",)
+    search_fields = ("name",)
+    list_filter = ("is_active", "is_approved")
+    ordering = ("name",)
+
+    def has_delete_permission(self, request, obj=None):
+        # Retire with is_active, which other processes' dictionaries pick up on their next sync
+        return False
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ("item", "kind", "status", "attempts", "available_at", "created_at")
+    list_filter = ("kind", "status")
+    ordering = ("-created_at",)
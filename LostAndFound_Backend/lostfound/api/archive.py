@@ -0,0 +1,151 @@
+import json
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from . import stats
+from .models import ArchivedItem, LostFoundItem, NotificationJob
+
+
+def archive_candidates(now=None):
+    """Soft-deleted and resolved items idle past their cutoffs, except ones with mail still going out.
+
+    Resolved means a lost report marked found (resolved_at set). A found report on its own
+    is still waiting for its owner and stays listed however old it is.
+    """
+    now = now or timezone.now()
+    deleted_cutoff = now - timedelta(days=getattr(settings, "ARCHIVE_DELETED_AFTER_DAYS", 30))
+    resolved_cutoff = now - timedelta(days=getattr(settings, "ARCHIVE_RESOLVED_AFTER_DAYS", 180))
+    in_flight = NotificationJob.objects.filter(
+        status__in=[NotificationJob.STATUS_PENDING, NotificationJob.STATUS_RUNNING]
+    ).values("item_id")
+    return LostFoundItem.objects.filter(
+        Q(is_deleted=True, updated_at__lt=deleted_cutoff)
+        | Q(resolved_at__isnull=False, updated_at__lt=resolved_cutoff)
+    ).exclude(pk__in=in_flight).order_by("pk")
+
+
+def archive_items(items):
+    """Copy items into ArchivedItem and delete them from the hot table in one transaction.
+
+    Deleting through the ORM fires post_delete, so this process's indexes and caches follow
+    along; other processes drop the rows when they pull archived_ids(). The dashboard stats
+    go on counting resolved items once archived, and stats.rebuild() counts them from the
+    archive. Returns the number archived per reason.
+    """
+    rows = json.loads(serializers.serialize("json", items))
+    reasons = Counter()
+    archived = []
+    for item, row in zip(items, rows):
+        reason = ArchivedItem.REASON_DELETED if item.is_deleted else ArchivedItem.REASON_RESOLVED
+        reasons[reason] += 1
+        archived.append(ArchivedItem(
+            original_id=item.pk, reason=reason, data=row, item_created_at=item.created_at
+        ))
+
+    ids = [item.pk for item in items]
+    with transaction.atomic():
+        ArchivedItem.objects.filter(original_id__in=ids).delete()  # archived before, restored since
+        ArchivedItem.objects.bulk_create(archived)
+        with stats.archiving():
+            LostFoundItem.objects.filter(pk__in=ids).delete()
+    return reasons
+
+
+def archive_pending(batch_size=1000, limit=None):
+    """Archive every current candidate, batch_size rows per transaction"""
+    totals = Counter()
+    last_pk = 0
+    while limit is None or sum(totals.values()) < limit:
+        size = batch_size if limit is None else min(batch_size, limit - sum(totals.values()))
+        batch = list(archive_candidates().filter(pk__gt=last_pk)[:size])
+        if not batch:
+            break
+        totals.update(archive_items(batch))
+        last_pk = batch[-1].pk
+    return totals
+
+
+def restore_items(original_ids):
+    """Move archived items back into the hot table under their original ids.
+
+    updated_at is reset so a restored item gets a full window before it is archived
+    again; a reporter whose account has since been deleted is detached, and so is a
+    duplicate_of link to an item that is no longer in the hot table.
+    """
+    User = get_user_model()
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(ArchivedItem.objects.select_for_update().filter(original_id__in=original_ids))
+        users = set(User.objects.filter(
+            pk__in=[entry.data["fields"].get("user") for entry in entries]
+        ).values_list("pk", flat=True))
+        originals = set(LostFoundItem.objects.filter(
+            pk__in=[entry.data["fields"].get("duplicate_of") for entry in entries]
+        ).values_list("pk", flat=True)) | {entry.original_id for entry in entries}
+
+        restored = []
+        for entry in entries:
+            fields = {**entry.data["fields"], "updated_at": now.isoformat()}
+            if fields.get("user") not in users:
+                fields["user"] = None
+            if fields.get("duplicate_of") not in originals:
+                fields["duplicate_of"] = None
+            for deserialized in serializers.deserialize("python", [{**entry.data, "fields": fields}]):
+                item = deserialized.object
+                item._stats_bucket = item.stats_bucket()  # counted all along while archived
+                deserialized.save()  # raw save: keeps the original primary key
+                restored.append(item)
+        ArchivedItem.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+    return restored
+
+
+def archive_watermark():
+    """Newest archived_at so far; an index loaded now has seen every archival up to it"""
+    return ArchivedItem.objects.aggregate(newest=Max("archived_at"))["newest"]
+
+
+def archived_ids(since):
+    """(original ids, newest archived_at) of items archived at or after since.
+
+    Archiving deletes rows outright, which an updated_at pull cannot see; in-process
+    indexes read this log to drop items another process archived.
+    """
+    rows = ArchivedItem.objects.order_by()
+    if since is not None:
+        rows = rows.filter(archived_at__gte=since)
+    ids, newest = [], since
+    for original_id, archived_at in rows.values_list("original_id", "archived_at"):
+        ids.append(original_id)
+        if newest is None or archived_at > newest:
+            newest = archived_at
+    return ids, newest
+
+
+def hot_table_size():
+    """(rows, bytes incl. indexes or None) of the item table"""
+    table = LostFoundItem._meta.db_table
+    rows = LostFoundItem.objects.count()
+    size = None
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+                size = cursor.fetchone()[0]
+            elif connection.vendor == "sqlite":
+                # dbstat is optional in SQLite builds; without it only row counts are reported
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+                    [table],
+                )
+                size = cursor.fetchone()[0]
+        except DatabaseError:
+            size = None
+    return rows, size
@@ -0,0 +1,99 @@
+import json
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, JsonResponse, QueryDict
+from django.http.multipartparser import MultiPartParserError
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+
+from .authentication import CachedJWTAuthentication
+from .throttling import SharedScopedRateThrottle
+
+_authenticator = CachedJWTAuthentication()
+
+
+def parse_json(request):
+    """Request body as a dict: JSON bodies are decoded, form posts fall back to request.POST"""
+    if request.content_type != "application/json":
+        return request.POST
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError:
+        raise exceptions.ParseError("JSON parse error.")
+
+
+def parse_data(request):
+    """Request body the way DRF's request.data has it, for any method.
+
+    Django only parses form and multipart bodies for POST, so PUT and PATCH ones are
+    parsed here; uploaded files are merged in with the other fields. Other content
+    types are refused with 415.
+    """
+    content_type = request.content_type
+    if content_type == "application/json":
+        return parse_json(request)
+    if request.method == "POST" and content_type in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        data, files = request.POST, request.FILES
+    elif content_type == "multipart/form-data":
+        try:
+            data, files = request.parse_file_upload(request.META, request)
+        except MultiPartParserError as e:
+            raise exceptions.ParseError(f"Multipart form parse error - {e}")
+    elif content_type == "application/x-www-form-urlencoded":
+        data, files = QueryDict(request.body, encoding=request.encoding), None
+    else:
+        raise exceptions.UnsupportedMediaType(content_type)
+    if files:
+        data = data.copy()
+        data.update(files)
+    return data
+
+
+def error_response(exc):
+    """JSON error in the same shape DRF's exception handler produces"""
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    response = JsonResponse(detail, status=exc.status_code, safe=False)
+    if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+        response["Retry-After"] = str(int(exc.wait))
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response["WWW-Authenticate"] = _authenticator.authenticate_header(None)
+    return response
+
+
+def async_endpoint(methods, authenticated=True, throttled=True, throttle_scope=None):
+    """Turn a coroutine into an API view for ASGI deployments.
+
+    DRF views are sync-only, so this covers what they would do for these endpoints:
+    JWT authentication (from the shared user cache), the default throttles plus an
+    optional scoped one, method checks and DRF-shaped JSON errors. Only JWT bearer
+    tokens are accepted.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return error_response(exceptions.MethodNotAllowed(request.method))
+            try:
+                result = await _authenticator.aauthenticate(request) if authenticated else None
+                if authenticated and result is None:
+                    raise exceptions.NotAuthenticated()
+                request.user = result[0] if result else AnonymousUser()
+                if throttled:
+                    classes = [*api_settings.DEFAULT_THROTTLE_CLASSES]
+                    if throttle_scope:
+                        classes.append(SharedScopedRateThrottle)
+                    for throttle in (cls() for cls in classes):
+                        if not throttle.allow_request(request, wrapper):
+                            raise exceptions.Throttled(throttle.wait())
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as e:
+                return error_response(e)
+            except Http404 as e:
+                return error_response(exceptions.NotFound(str(e)))
+        # Scoped throttles read the scope from the view, as they do on DRF views
+        wrapper.throttle_scope = throttle_scope
+        return wrapper
+    return decorator
@@ -0,0 +1,96 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+# Claim carrying UserProfile.token_version at issue time; bumping the column revokes older tokens
+TOKEN_VERSION_CLAIM = "token_version"
+
+
+class UserCache:
+    """Thread-safe LRU of authenticated users with a TTL, keyed by user id and token version"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user id -> (token version, expires at, user)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, user_id, version, user):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, "AUTH_USER_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "AUTH_USER_CACHE_TTL", 60),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves users from user_cache instead of one query per request.
+
+    Local profile writes evict immediately (see signals); other workers see them within
+    AUTH_USER_CACHE_TTL seconds. Tokens issued before a token_version bump are rejected.
+    """
+
+    def get_user(self, validated_token):
+        user = self._cached_user(validated_token)
+        if user is None:
+            user = self._remember(validated_token, super().get_user(validated_token))
+        # Requests get their own copy so attribute changes never leak between them
+        return copy.copy(user)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; only a cache miss leaves the event loop (one query)"""
+        header = self.get_header(request)
+        raw_token = None if header is None else self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = self._cached_user(validated_token)
+        if user is None:
+            user = self._remember(validated_token, await sync_to_async(super().get_user)(validated_token))
+        return copy.copy(user), validated_token
+
+    def _cached_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return None
+        return user_cache.get(user_id, validated_token.get(TOKEN_VERSION_CLAIM, 0))
+
+    def _remember(self, validated_token, user):
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        if user.token_version != version:
+            raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+        user_cache.set(validated_token[api_settings.USER_ID_CLAIM], version, user)
+        return user
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import matching, stats
+from .cache import ITEMS_SCOPE, item_scope, response_cache
+from .locations import location_dictionary
+from .models import ItemSignatureBand, LostFoundItem
+from .search import search_index
+from .similarity import similarity_index
+from .serializers import LostFoundItemSerializer
+from .utils import enqueue_item_found_notifications
+
+# Written with bulk_update; image uploads stay on the single-item endpoints
+BULK_UPDATE_FIELDS = [
+    "title", "description", "category", "location", "contact_email", "latitude", "longitude", "geohash",
+]
+
+
+def get_max_batch():
+    return getattr(settings, "BULK_MAX_ITEMS", 500)
+
+
+def refresh_derived_state(items, deleted_ids=()):
+    """bulk_create/bulk_update/update() skip post_save, so do its work once per batch"""
+    if search_index._loaded:
+        for item in items:
+            search_index.index_item(item)
+        for pk in deleted_ids:
+            search_index.discard(pk)
+    if similarity_index._loaded:
+        for item in items:
+            similarity_index.index_item(item)
+        for pk in deleted_ids:
+            similarity_index.discard(pk)
+    if items:
+        matching.index_items(items)
+    if deleted_ids:
+        ItemSignatureBand.objects.filter(item_id__in=deleted_ids).delete()
+    pks = [item.pk for item in items] + list(deleted_ids)
+    response_cache.bump(ITEMS_SCOPE, *(item_scope(pk) for pk in pks))
+
+
+def bulk_create_items(user, rows, context=None):
+    """Validate every row, then INSERT the valid ones in one statement.
+
+    Returns (created items with their row index, per-row errors).
+    """
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        serializer = LostFoundItemSerializer(data=row, context=context)
+        if serializer.is_valid():
+            data = dict(serializer.validated_data)
+            data.pop("image", None)
+            data["location"] = location_dictionary.resolve(data["location"])
+            item = LostFoundItem(user=user, **data)
+            item.refresh_geohash()  # bulk_create skips save()
+            valid.append((index, item))
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+
+    with transaction.atomic():
+        created = LostFoundItem.objects.bulk_create([item for _, item in valid])
+        stats.record_items(created)
+        found = [item for item in created if item.category.lower() == "found"]
+        if found:
+            enqueue_item_found_notifications(found)
+        transaction.on_commit(lambda: refresh_derived_state(created))
+    return [(index, item) for (index, _), item in zip(valid, created)], errors
+
+
+def bulk_update_items(user, rows):
+    """Partial updates of the user's own items with one SELECT and one bulk_update"""
+    errors, pending = [], []
+    ids = [row.get("id") for row in rows if isinstance(row, dict)]
+    items = LostFoundItem.objects.filter(user=user, is_deleted=False).in_bulk(
+        [pk for pk in ids if isinstance(pk, int)]
+    )
+
+    for index, row in enumerate(rows):
+        pk = row.get("id") if isinstance(row, dict) else None
+        item = items.get(pk) if isinstance(pk, int) else None
+        if item is None:
+            errors.append({"index": index, "errors": {"id": ["Item not found."]}})
+            continue
+        serializer = LostFoundItemSerializer(item, data=row, partial=True)
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+        data = dict(serializer.validated_data)
+        if "location" in data:
+            data["location"] = location_dictionary.resolve(data["location"])
+        pending.append((index, item, data))
+
+    now = timezone.now()
+    updated, newly_found = [], []
+    for index, item, data in pending:
+        was_lost = item.category.lower() == "lost"
+        for field in BULK_UPDATE_FIELDS:
+            if field in data:
+                setattr(item, field, data[field])
+        item.refresh_geohash()
+        item.updated_at = now  # auto_now is not applied by bulk_update
+        if was_lost and item.category.lower() == "found":
+            item.resolved_at = now
+            newly_found.append(item)
+        elif item.category.lower() == "lost":
+            item.resolved_at = None
+        updated.append((index, item))
+
+    with transaction.atomic():
+        changed = [item for _, item in updated]
+        LostFoundItem.objects.bulk_update(changed, BULK_UPDATE_FIELDS + ["resolved_at", "updated_at"])
+        stats.record_items(changed)
+        if newly_found:
+            enqueue_item_found_notifications(newly_found)
+        transaction.on_commit(lambda: refresh_derived_state(changed))
+    return updated, errors
+
+
+def bulk_soft_delete(user, ids):
+    """Soft delete the user's items with a single UPDATE ... WHERE id IN (...)"""
+    requested = [pk for pk in ids if isinstance(pk, int)]
+    with transaction.atomic():
+        queryset = LostFoundItem.objects.filter(user=user, is_deleted=False, id__in=requested)
+        items = list(queryset.select_for_update().only("id", *LostFoundItem.STATS_FIELDS))
+        deleted = [item.pk for item in items]
+        LostFoundItem.objects.filter(id__in=deleted).update(is_deleted=True, updated_at=timezone.now())
+        for item in items:
+            item.is_deleted = True
+        stats.record_items(items)
+        transaction.on_commit(lambda: refresh_derived_state([], deleted_ids=deleted))
+
+    deleted_set = set(deleted)
+    errors = [
+        {"index": index, "errors": {"id": ["Item not found."]}}
+        for index, pk in enumerate(ids) if not isinstance(pk, int) or pk not in deleted_set
+    ]
+    return deleted, errors
@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+
+from .metrics import RESPONSE_CACHE_NOT_MODIFIED
+
+ITEMS_SCOPE = "items"
+STATS_SCOPE = "stats"
+
+
+def item_scope(pk):
+    return f"item:{pk}"
+
+
+class ResponseCache:
+    """Versioned cache of rendered GET responses.
+
+    Keys embed the current version of every scope they depend on, so invalidation
+    is a single counter bump and stale entries simply age out. Works on any Django
+    cache backend (local memory, file, Redis).
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self):
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def version(self, scope):
+        key = f"version:{scope}"
+        version = self.cache.get(key)
+        if version is None:
+            # A fresh, time-based version never collides with one used before eviction
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def bump(self, *scopes):
+        for scope in scopes:
+            key = f"version:{scope}"
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), timeout=None)
+
+    def make_key(self, request, scopes):
+        versions = ".".join(str(self.version(scope)) for scope in scopes)
+        query = "&".join(sorted(f"{k}={v}" for k, values in request.GET.lists() for v in values))
+        media_type = getattr(request, "accepted_media_type", "")
+        digest = hashlib.sha1(f"{request.path}?{query}|{media_type}".encode()).hexdigest()
+        return f"response:{'+'.join(scopes)}:{versions}:{digest}"
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def store(self, key, response):
+        """Cache a 200 response and stamp its strong ETag; a DRF response is rendered here, once"""
+        if hasattr(response, "render"):
+            response.render()  # Sets .content; the handler's own render() is then a no-op
+        content = response.content
+        etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        response["ETag"] = etag
+        self.cache.set(key, {"content": content, "content_type": response["Content-Type"], "etag": etag}, self.timeout)
+        return etag
+
+
+def etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
+
+
+def cached_response(request, entry):
+    if etag_matches(request, entry["etag"]):
+        RESPONSE_CACHE_NOT_MODIFIED.inc()
+        return not_modified(entry["etag"])
+    response = HttpResponse(entry["content"], content_type=entry["content_type"])
+    response["ETag"] = entry["etag"]
+    return response
+
+
+def invalidate_item(pk):
+    """Drop cached list pages and the item's detail page after any write to it"""
+    response_cache.bump(ITEMS_SCOPE, item_scope(pk))
+
+
+response_cache = ResponseCache()
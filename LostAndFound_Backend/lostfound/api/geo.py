@@ -0,0 +1,130 @@
+import math
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ACos, Cos, Greatest, Least, Radians, Sin
+from rest_framework.exceptions import ValidationError
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~4.8 m cells; queries use a prefix of this
+EARTH_RADIUS_KM = 6371.0088
+MAX_RADIUS_KM = 50.0
+
+# Approximate cell height/width in km at the equator for each geohash length
+CELL_SIZE_KM = {
+    1: (4992.6, 5009.4), 2: (624.1, 1252.3), 3: (156.0, 156.5), 4: (19.5, 39.1),
+    5: (4.89, 4.89), 6: (0.61, 1.22), 7: (0.153, 0.153), 8: (0.019, 0.038), 9: (0.0048, 0.0048),
+}
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, bit_count, even = [], 0, 0, True
+    while len(geohash) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(geohash)
+
+
+def decode_bounds(geohash):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            middle = (bounds[0] + bounds[1]) / 2
+            if value >> shift & 1:
+                bounds[0] = middle
+            else:
+                bounds[1] = middle
+            even = not even
+    return lat_range, lng_range
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes whose union covers the circle: its cell plus the 8 neighbours.
+
+    The precision is the finest one whose cells are at least radius_km across,
+    so the circle can never reach past the neighbouring ring.
+    """
+    # Cells narrow towards the poles; scale widths by cos(latitude).
+    shrink = max(math.cos(math.radians(latitude)), 0.01)
+    precision = 1
+    for length in range(GEOHASH_PRECISION, 0, -1):
+        height, width = CELL_SIZE_KM[length]
+        if height >= radius_km and width * shrink >= radius_km:
+            precision = length
+            break
+
+    center = encode(latitude, longitude, precision)
+    (south, north), (west, east) = decode_bounds(center)
+    height, width = north - south, east - west
+    cells = set()
+    for d_lat in (-1, 0, 1):
+        for d_lng in (-1, 0, 1):
+            lat = min(max(latitude + d_lat * height, -89.999999), 89.999999)
+            lng = (longitude + d_lng * width + 180) % 360 - 180
+            cells.add(encode(lat, lng, precision))
+    return sorted(cells)
+
+
+def prefix_upper_bound(prefix):
+    """Smallest geohash greater than every hash starting with prefix (for range scans)"""
+    chars = list(prefix)
+    while chars:
+        position = BASE32.index(chars[-1])
+        if position + 1 < len(BASE32):
+            chars[-1] = BASE32[position + 1]
+            return "".join(chars)
+        chars.pop()
+    return "~"
+
+
+def distance_expression(latitude, longitude):
+    """Great-circle distance in km (spherical law of cosines), usable in SQL on Postgres and SQLite"""
+    lat, lng = math.radians(latitude), math.radians(longitude)
+    cosine = (
+        Sin(Radians(F("latitude"))) * math.sin(lat)
+        + Cos(Radians(F("latitude"))) * math.cos(lat) * Cos(Radians(F("longitude")) - lng)
+    )
+    return ACos(Greatest(Least(cosine, 1.0), -1.0), output_field=FloatField()) * EARTH_RADIUS_KM
+
+
+def parse_near(near, radius):
+    try:
+        latitude, longitude = (float(part) for part in near.split(","))
+        radius_km = float(radius) if radius else 1.0
+    except ValueError:
+        raise ValidationError({"near": "Use near=<lat>,<lng> and radius=<km>."})
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValidationError({"near": "Latitude must be within ±90 and longitude within ±180."})
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValidationError({"radius": f"Radius must be between 0 and {MAX_RADIUS_KM:g} km."})
+    return latitude, longitude, radius_km
+
+
+def filter_nearby(queryset, near, radius=None):
+    """Items within radius km: geohash range scans narrow the rows, exact distance filters the rest
+
+    The candidates are selected in a pk subquery so the planner probes the geohash
+    index first instead of walking the caller's ordering index and testing every row.
+    """
+    latitude, longitude, radius_km = parse_near(near, radius)
+    cells = Q()
+    for prefix in covering_cells(latitude, longitude, radius_km):
+        cells |= Q(geohash__gte=prefix, geohash__lt=prefix_upper_bound(prefix))
+    nearby = queryset.model.objects.filter(cells).alias(
+        distance_km=distance_expression(latitude, longitude)
+    ).filter(distance_km__lte=radius_km)
+    return queryset.filter(pk__in=nearby.values("pk"))
@@ -0,0 +1,196 @@
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from .models import Location, LostFoundItem
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on prefix entries ranked per lookup, so one-letter prefixes stay cheap.
+AUTOCOMPLETE_SCAN_LIMIT = 500
+
+
+def location_terms(key):
+    """Searchable suffixes of a key: "main library" -> "main library", "library" """
+    words = key.split()
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+class LocationDictionary:
+    """In-process alias map and prefix index over the canonical locations"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._names = {}  # location id -> canonical name
+        self._keys = {}  # normalised name or alias -> location id
+        self._location_keys = {}  # location id -> keys it registered
+        self._approved = set()  # ids of admin-approved locations
+        self._prefixes = None  # sorted (term, location id) pairs, rebuilt lazily
+        self._usage = None  # canonical name -> live items using it; counted on first autocomplete
+        self._usage_lock = threading.Lock()
+        self._usage_refreshing = False
+        self._watermark = None  # newest updated_at seen
+        self._last_sync = 0.0
+        self._last_usage = 0.0
+        self._loaded = False
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+            self._keys.clear()
+            self._location_keys.clear()
+            self._approved.clear()
+            self._prefixes = None
+            self._usage = None
+            self._watermark = None
+            self._loaded = False
+
+    def add(self, location):
+        """Register, refresh or drop a location depending on its active flag"""
+        with self._lock:
+            self._discard(location.pk)
+            if location.is_active:
+                keys = {location.key} | {Location.make_key(alias) for alias in location.aliases or ()}
+                keys.discard("")
+                for key in keys:
+                    self._keys[key] = location.pk
+                self._names[location.pk] = location.name
+                self._location_keys[location.pk] = keys
+                if location.is_approved:
+                    self._approved.add(location.pk)
+            self._prefixes = None
+            if location.updated_at and (self._watermark is None or location.updated_at > self._watermark):
+                self._watermark = location.updated_at
+
+    def discard(self, pk):
+        with self._lock:
+            self._discard(pk)
+            self._prefixes = None
+
+    def _discard(self, pk):
+        for key in self._location_keys.pop(pk, ()):
+            if self._keys.get(key) == pk:
+                del self._keys[key]
+        self._names.pop(pk, None)
+        self._approved.discard(pk)
+
+    def sync(self):
+        """Load on first use, then pull locations changed by other processes"""
+        refresh_every = getattr(settings, "LOCATION_DICTIONARY_REFRESH_SECONDS", 30)
+        now = time.monotonic()
+        if self._loaded and now - self._last_sync < refresh_every:
+            return
+
+        with self._lock:
+            rows = Location.objects.all()
+            if self._loaded and self._watermark is not None:
+                rows = rows.filter(updated_at__gte=self._watermark)
+            elif not self._loaded:
+                rows = rows.filter(is_active=True)
+            for location in rows.iterator(chunk_size=2000):
+                self.add(location)
+            self._loaded = True
+            self._last_sync = now
+
+    @staticmethod
+    def count_usage():
+        """Live items per location name; served by the (category, location) index"""
+        return Counter(dict(
+            LostFoundItem.objects.filter(is_deleted=False)
+            .order_by()
+            .values("location")
+            .annotate(count=Count("id"))
+            .values_list("location", "count")
+        ))
+
+    def usage(self):
+        """Item counts used to rank suggestions. Only autocomplete reads them, so item writes
+        (resolve) never wait on the GROUP BY; once stale they are recounted in the background."""
+        now = time.monotonic()
+        if self._usage is None:
+            self._usage = self.count_usage()
+            self._last_usage = now
+        elif now - self._last_usage >= getattr(settings, "LOCATION_USAGE_REFRESH_SECONDS", 600):
+            with self._usage_lock:
+                if self._usage_refreshing:
+                    return self._usage
+                self._usage_refreshing = True
+                self._last_usage = now
+            threading.Thread(target=self._refresh_usage, name="location-usage", daemon=True).start()
+        return self._usage
+
+    def _refresh_usage(self):
+        try:
+            self._usage = self.count_usage()
+        except Exception:
+            logger.exception("Counting location usage failed")
+        finally:
+            self._usage_refreshing = False
+            connection.close()  # this thread's own connection
+
+    def resolve(self, text):
+        """Canonical name for free-text location input, registering unseen places on first use.
+
+        A registered place is only suggested by autocomplete once it is approved or well used.
+        """
+        name = " ".join((text or "").split())
+        key = Location.make_key(name)
+        if not key:
+            return name
+        self.sync()
+        with self._lock:
+            pk = self._keys.get(key)
+            if pk is not None:
+                return self._names[pk]
+
+        location, _ = Location.objects.get_or_create(key=key, defaults={"name": name})
+        if not location.is_active:
+            return name  # retired entries are not handed out again
+        self.add(location)
+        return location.name
+
+    def autocomplete(self, prefix, limit=10):
+        """Up to limit (id, name) pairs whose name, alias or any later word starts with prefix.
+
+        Only approved places and those used by LOCATION_SUGGEST_MIN_ITEMS live items are
+        offered, so one reporter's typo is not suggested to everyone else.
+        """
+        key = Location.make_key(prefix)
+        if not key:
+            return []
+        self.sync()
+        usage = self.usage()
+        min_items = getattr(settings, "LOCATION_SUGGEST_MIN_ITEMS", 3)
+
+        with self._lock:
+            if self._prefixes is None:
+                self._prefixes = sorted(
+                    (term, pk)
+                    for pk, keys in self._location_keys.items()
+                    for location_key in keys
+                    for term in location_terms(location_key)
+                )
+            entries = self._prefixes
+            matches = set()
+            position = bisect.bisect_left(entries, (key,))
+            while (
+                position < len(entries)
+                and entries[position][0].startswith(key)
+                and len(matches) < AUTOCOMPLETE_SCAN_LIMIT
+            ):
+                matches.add(entries[position][1])
+                position += 1
+
+            names = self._names
+            matches = {pk for pk in matches if pk in self._approved or usage[names[pk]] >= min_items}
+            ranked = sorted(matches, key=lambda pk: (-usage[names[pk]], names[pk]))
+            return [(pk, names[pk]) for pk in ranked[:limit]]
+
+
+location_dictionary = LocationDictionary()
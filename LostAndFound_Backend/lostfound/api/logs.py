@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from .metrics import LOG_RECORDS_DROPPED
+
+# LogRecord attributes that are not user-supplied `extra=` fields
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JSONLineFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, location, extras, traceback"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class QueuedLogHandler(QueueHandler):
+    """Logging calls only enqueue the record; a listener thread formats and writes it.
+
+    Formatting (msg % args, tracebacks, JSON) happens on the listener thread, so callers
+    never wait on string building or I/O. The queue is bounded: when the writer falls
+    behind, records are dropped and counted (lostfound_log_records_dropped_total)
+    instead of stalling requests.
+
+    Every worker process writes on its own, so nothing is rotated in-process: records
+    go to stdout by default, or are appended to filename, which is reopened when an
+    outside rotator (logrotate) moves it.
+    """
+
+    def __init__(self, filename=None, queueSize=10000, encoding="utf-8"):
+        super().__init__(queue.Queue(maxsize=queueSize))
+        if filename:
+            self.target = WatchedFileHandler(filename, encoding=encoding, delay=True)
+        else:
+            self.target = logging.StreamHandler(sys.stdout)
+        self.dropped = 0  # this process's share of the counter
+        self._listener = None
+        self._listener_pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        # Started lazily, and again in each forked worker (threads do not survive fork)
+        with self._start_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener = QueueListener(self.queue, self.target)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+
+    def prepare(self, record):
+        # In-process queue: hand over the record untouched and format it on the listener thread
+        return record
+
+    def enqueue(self, record):
+        if self._listener_pid != os.getpid():
+            self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def flush(self):
+        """Wait until everything queued so far has been written (logging.shutdown() calls this at exit)"""
+        if self._listener_pid == os.getpid():
+            self._listener.stop()
+            self._listener_pid = None
+        self.target.flush()
+
+    def close(self):
+        self.flush()
+        self.target.close()
+        super().close()
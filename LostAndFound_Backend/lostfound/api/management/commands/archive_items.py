@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.archive import archive_candidates, archive_pending, hot_table_size
+from api.models import ArchivedItem
+
+
+def format_size(size):
+    if size is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Move soft-deleted and resolved (lost, since marked found) items older than ARCHIVE_*_AFTER_DAYS into the archive table "
+        "(schedule daily; undo with restore_archived_items)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--limit", type=int, default=None, help="Archive at most this many items")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            candidates = archive_candidates()
+            deleted = candidates.filter(is_deleted=True).count()
+            self.stdout.write(f"Would archive {deleted} soft-deleted and {candidates.count() - deleted} resolved items")
+            return
+
+        rows_before, size_before = hot_table_size()
+        archived = archive_pending(batch_size=options["batch_size"], limit=options["limit"])
+        rows_after, size_after = hot_table_size()
+
+        total = sum(archived.values())
+        self.stdout.write(
+            f"Archived {total} items ({archived[ArchivedItem.REASON_DELETED]} soft-deleted, "
+            f"{archived[ArchivedItem.REASON_RESOLVED]} resolved)"
+        )
+        reduction = (rows_before - rows_after) / rows_before * 100 if rows_before else 0.0
+        self.stdout.write(
+            f"Hot table: {rows_before} -> {rows_after} rows (-{reduction:.1f}%), "
+            f"{format_size(size_before)} -> {format_size(size_after)} on disk"
+        )
+        if total and connection.vendor == "postgresql":
+            self.stdout.write("Space is reused after autovacuum; run VACUUM FULL to return it to the OS")
+        self.stdout.write(self.style.SUCCESS("Archival complete"))
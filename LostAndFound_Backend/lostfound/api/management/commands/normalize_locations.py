@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.cache import ITEMS_SCOPE, item_scope, response_cache
+from api.locations import location_dictionary
+from api.models import LostFoundItem
+from api.stats import rebuild as rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rewrite existing item locations to their canonical names (run again after adding aliases)"
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        changed_ids = []
+        for raw in list(LostFoundItem.objects.order_by().values_list("location", flat=True).distinct()):
+            canonical = location_dictionary.resolve(raw)
+            if canonical == raw:
+                continue
+            # One UPDATE per distinct spelling; updated_at lets search indexes in other workers catch up
+            rows = LostFoundItem.objects.filter(location=raw)
+            changed_ids.extend(rows.values_list("id", flat=True))
+            rows.update(location=canonical, updated_at=now)
+            self.stdout.write(f"{raw!r} -> {canonical!r}")
+
+        # update() skips post_save, so retire cached responses and re-bucket the stats here
+        response_cache.bump(ITEMS_SCOPE, *(item_scope(pk) for pk in changed_ids))
+        if changed_ids:
+            rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(f"Normalised {len(changed_ids)} items"))
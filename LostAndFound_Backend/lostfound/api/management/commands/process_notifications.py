@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.notifications import close_smtp_connection, run_pending_jobs
+from api.uploads import recover_stale_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued email notifications and recover interrupted image processing "
+        "(run as a long-lived worker process)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain due jobs once and exit")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument(
+            "--sweep-every", type=float, default=60.0, help="Seconds between sweeps for stale image processing"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            self.work(options)
+        finally:
+            close_smtp_connection()
+
+    def work(self, options):
+        last_sweep = None
+        while True:
+            if last_sweep is None or time.monotonic() - last_sweep >= options["sweep_every"]:
+                last_sweep = time.monotonic()
+                recovered = recover_stale_uploads()
+                if recovered:
+                    self.stdout.write(f"Recovered {recovered} interrupted image upload(s)")
+            processed = run_pending_jobs()
+            if processed:
+                self.stdout.write(f"Processed {processed} notification job(s)")
+            if options["once"]:
+                break
+            if not processed:
+                time.sleep(options["sleep"])
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.matching import signature_keys
+from api.models import ItemSignatureBand, LostFoundItem
+
+
+class Command(BaseCommand):
+    help = "Recompute the MinHash and image dHash band keys used for matching and duplicate checks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        ItemSignatureBand.objects.all().delete()
+        batch, total = [], 0
+        items = LostFoundItem.objects.filter(is_deleted=False).only("id", "title", "description", "category", "image_phash")
+        for item in items.iterator(chunk_size=options["batch_size"]):
+            batch.extend(ItemSignatureBand(item_id=item.pk, key=key) for key in signature_keys(item))
+            total += 1
+            if len(batch) >= options["batch_size"]:
+                ItemSignatureBand.objects.bulk_create(batch)
+                batch = []
+        ItemSignatureBand.objects.bulk_create(batch)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} items for matching"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard rollups (counts per day, category and location) from the item table"
+
+    def handle(self, *args, **options):
+        buckets = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} stats buckets"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import restore_items
+
+
+class Command(BaseCommand):
+    help = "Move archived items back into the item table under their original ids"
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="+", type=int, help="Original item ids")
+
+    def handle(self, *args, **options):
+        restored = restore_items(options["ids"])
+        missing = set(options["ids"]) - {item.pk for item in restored}
+        for item in restored:
+            self.stdout.write(f"Restored #{item.pk}: {item}")
+        if missing:
+            raise CommandError(f"Not in the archive: {', '.join(map(str, sorted(missing)))}")
+        self.stdout.write(self.style.SUCCESS(f"Restored {len(restored)} items"))
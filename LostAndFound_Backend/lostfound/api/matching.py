@@ -0,0 +1,233 @@
+import hashlib
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ItemSignatureBand, LostFoundItem
+from .search import tokenize
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "at", "by", "for", "from", "in", "is", "it", "my", "near", "of",
+    "on", "or", "the", "this", "to", "was", "with",
+})
+
+# MinHash over word shingles, banded for locality-sensitive lookup: items sharing any
+# band key are candidates, so matching probes an index instead of scanning the table.
+NUM_PERM = 32
+BAND_ROWS = 2
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(1)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+
+# Image dHashes are split into IMAGE_BANDS exact-match bands: two hashes at most
+# IMAGE_BANDS - 1 bits apart always agree on a whole band, so one probe finds them.
+IMAGE_BANDS = 4
+IMAGE_BAND_BITS = 64 // IMAGE_BANDS
+HASH_MASK = (1 << 64) - 1
+
+OPPOSITE_CATEGORY = {"lost": "found", "found": "lost"}
+
+
+def item_shingles(title, description):
+    """Distinct content words of an item's title and description"""
+    return {token for token in tokenize(f"{title} {description}") if token not in STOP_WORDS}
+
+
+def minhash(shingles):
+    """MinHash signature of a shingle set (NUM_PERM 32-bit values)"""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+    if not hashes:
+        return []
+    return [min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes) for a, b in PERMUTATIONS]
+
+
+def band_keys(category, signature):
+    """LSH band keys, namespaced by category so probes only touch one side"""
+    keys = []
+    for band, start in enumerate(range(0, len(signature), BAND_ROWS)):
+        rows = ",".join(map(str, signature[start:start + BAND_ROWS]))
+        digest = hashlib.blake2b(rows.encode(), digest_size=8).hexdigest()
+        keys.append(f"{category}:{band}:{digest}")
+    return keys
+
+
+def item_band_keys(item, category=None):
+    signature = minhash(item_shingles(item.title, item.description))
+    return band_keys(category or item.category.lower(), signature)
+
+
+def signed_hash(value):
+    """Unsigned 64-bit hash as the signed value a BIGINT column holds"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming(a, b):
+    return ((a ^ b) & HASH_MASK).bit_count()
+
+
+def image_band_keys(category, phash):
+    """Exact-match band keys of an image dHash, namespaced apart from the text bands"""
+    if phash is None:
+        return []
+    value = phash & HASH_MASK
+    mask = (1 << IMAGE_BAND_BITS) - 1
+    return [
+        f"img:{category}:{band}:{value >> (band * IMAGE_BAND_BITS) & mask:04x}" for band in range(IMAGE_BANDS)
+    ]
+
+
+def signature_keys(item):
+    """Every band key stored for item: its text bands, plus image bands once the image is hashed"""
+    return item_band_keys(item) + image_band_keys(item.category.lower(), item.image_phash)
+
+
+def index_item(item):
+    """Replace an item's stored band keys; deleted items are dropped from the index"""
+    ItemSignatureBand.objects.filter(item_id=item.pk).delete()
+    if item.is_deleted:
+        return
+    ItemSignatureBand.objects.bulk_create(
+        [ItemSignatureBand(item_id=item.pk, key=key) for key in signature_keys(item)]
+    )
+
+
+def index_items(items):
+    """Bulk form of index_item: one DELETE and one INSERT for the whole batch"""
+    ItemSignatureBand.objects.filter(item_id__in=[item.pk for item in items]).delete()
+    ItemSignatureBand.objects.bulk_create([
+        ItemSignatureBand(item_id=item.pk, key=key)
+        for item in items if not item.is_deleted
+        for key in signature_keys(item)
+    ])
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def score_pair(item, candidate):
+    """Blend text overlap, location overlap and report-time proximity into 0..1"""
+    window = timedelta(days=getattr(settings, "MATCH_WINDOW_DAYS", 60))
+    text = jaccard(
+        item_shingles(item.title, item.description),
+        item_shingles(candidate.title, candidate.description),
+    )
+    location = jaccard(set(tokenize(item.location)), set(tokenize(candidate.location)))
+    gap = abs(item.created_at - candidate.created_at)
+    recency = max(0.0, 1 - gap / window)
+    return 0.6 * text + 0.25 * location + 0.15 * recency
+
+
+def find_matches(item, limit=None):
+    """Top opposite-category items for item as (score, candidate), best first"""
+    limit = limit or getattr(settings, "MATCH_TOP_K", 5)
+    min_score = getattr(settings, "MATCH_MIN_SCORE", 0.2)
+    window = timedelta(days=getattr(settings, "MATCH_WINDOW_DAYS", 60))
+    opposite = OPPOSITE_CATEGORY.get(item.category.lower())
+    if not opposite:
+        return []
+
+    keys = item_band_keys(item, category=opposite)
+    if not keys:
+        return []
+
+    # Rank by shared bands first so only a bounded candidate set is scored exactly.
+    candidate_ids = list(
+        ItemSignatureBand.objects.filter(key__in=keys)
+        .exclude(item_id=item.pk)
+        .values("item_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared")
+        .values_list("item_id", flat=True)[:limit * 20]
+    )
+    created_at = item.created_at
+    candidates = LostFoundItem.objects.filter(
+        pk__in=candidate_ids,
+        is_deleted=False,
+        created_at__gte=created_at - window,
+        created_at__lte=created_at + window,
+    ).select_related("user")
+
+    scored = [(score_pair(item, candidate), candidate) for candidate in candidates]
+    scored = [pair for pair in scored if pair[0] >= min_score]
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return scored[:limit]
+
+
+def find_duplicate(item):
+    """An earlier live report of the same object as item (which may be unsaved), or None.
+
+    Candidates share a text or image band key in item's category, come from the same
+    reporter or the same location, and were reported within DEDUP_WINDOW_HOURS. Each
+    is confirmed by dHash distance or by exact word overlap; the closest one wins.
+    """
+    keys = signature_keys(item)
+    if not keys:
+        return None
+    window = timedelta(hours=getattr(settings, "DEDUP_WINDOW_HOURS", 72))
+    min_similarity = getattr(settings, "DEDUP_MIN_SIMILARITY", 0.6)
+    max_distance = getattr(settings, "DEDUP_IMAGE_MAX_DISTANCE", IMAGE_BANDS - 1)
+    limit = getattr(settings, "DEDUP_MAX_CANDIDATES", 20)
+
+    # Only earlier reports, so two items can never end up marked as each other's duplicate
+    reported_at = item.created_at or timezone.now()
+    same_source = Q(location=item.location)
+    if item.user_id:
+        same_source |= Q(user_id=item.user_id)
+    candidates = (
+        LostFoundItem.objects.filter(
+            same_source,
+            signature_bands__key__in=keys,
+            is_deleted=False,
+            created_at__gte=reported_at - window,
+            created_at__lt=reported_at,
+        )
+        .annotate(shared=Count("signature_bands"))
+        .order_by("-shared")
+        .only("id", "user", "title", "description", "image_phash", "duplicate_of")[:limit]
+    )
+
+    shingles = item_shingles(item.title, item.description)
+    best = None
+    for candidate in candidates:
+        if item.image_phash is not None and candidate.image_phash is not None \
+                and hamming(item.image_phash, candidate.image_phash) <= max_distance:
+            score = 1.0
+        else:
+            score = jaccard(shingles, item_shingles(candidate.title, candidate.description))
+            if score < min_similarity:
+                continue
+        if best is None or score > best[0]:
+            best = (score, candidate)
+    return best and best[1]
+
+
+def flag_duplicate(item):
+    """Point a saved item at the report it repeats (the first of a chain); returns that id or None"""
+    original = find_duplicate(item)
+    if original is None:
+        return None
+    item.duplicate_of_id = original.duplicate_of_id or original.pk
+    LostFoundItem.objects.filter(pk=item.pk).update(duplicate_of=item.duplicate_of_id)
+    return item.duplicate_of_id
+
+
+def match_recipients(item):
+    """Emails of the reporters of the best-matching lost items, excluding item's own reporter"""
+    emails = []
+    for _, candidate in find_matches(item):
+        if item.user_id and candidate.user_id == item.user_id:
+            continue
+        email = candidate.user.email if candidate.user else candidate.contact_email
+        if email and email not in emails:
+            emails.append(email)
+    return emails
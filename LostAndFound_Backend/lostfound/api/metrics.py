@@ -0,0 +1,467 @@
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class ProcessFile:
+    """One process's metric values in a memory-mapped file, laid out for lock-free reads.
+
+    Only the owning process writes it. Entries are appended: key length and value
+    count, the JSON key padded to 8 bytes, then the values as doubles. The header's
+    used-bytes count is written last, so readers never see half an entry.
+    """
+
+    HEADER = struct.Struct("<Q")  # bytes used, header included
+    ENTRY = struct.Struct("<II")  # key length, number of values
+    DOUBLE = struct.Struct("<d")
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.ftruncate(self.fd, self.INITIAL_SIZE)
+        self.map = mmap.mmap(self.fd, self.INITIAL_SIZE)
+        self.used = self.HEADER.size
+        self.HEADER.pack_into(self.map, 0, self.used)
+        self.offsets = {}  # key -> offset of its first value
+
+    def values_offset(self, key, width):
+        offset = self.offsets.get(key)
+        if offset is None:
+            encoded = key.encode()
+            padded = len(encoded) + -len(encoded) % 8
+            size = self.ENTRY.size + padded + self.DOUBLE.size * width
+            if self.used + size > len(self.map):
+                self._grow(self.used + size)
+            self.ENTRY.pack_into(self.map, self.used, len(encoded), width)
+            start = self.used + self.ENTRY.size
+            self.map[start:start + len(encoded)] = encoded
+            offset = self.offsets[key] = start + padded  # values start out zero
+            self.used += size
+            self.HEADER.pack_into(self.map, 0, self.used)
+        return offset
+
+    def add(self, offset, index, amount):
+        position = offset + self.DOUBLE.size * index
+        self.DOUBLE.pack_into(self.map, position, self.DOUBLE.unpack_from(self.map, position)[0] + amount)
+
+    def _grow(self, needed):
+        size = len(self.map)
+        while size < needed:
+            size *= 2
+        os.ftruncate(self.fd, size)
+        self.map.close()
+        self.map = mmap.mmap(self.fd, size)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+    @classmethod
+    def read(cls, path):
+        """{key: values} of one file, written by any process"""
+        with open(path, "rb") as f:
+            data = f.read()
+        used = cls.HEADER.unpack_from(data)[0] if len(data) >= cls.HEADER.size else 0
+        position, entries = cls.HEADER.size, {}
+        while position < used:
+            length, width = cls.ENTRY.unpack_from(data, position)
+            start = position + cls.ENTRY.size
+            offset = start + length + -length % 8
+            entries[data[start:start + length].decode()] = list(struct.unpack_from(f"<{width}d", data, offset))
+            position = offset + cls.DOUBLE.size * width
+        return entries
+
+
+def _merge(totals, entries):
+    for key, values in entries.items():
+        current = totals.setdefault(key, [0.0] * len(values))
+        for index, value in enumerate(values):
+            current[index] += value
+
+
+class LocalValues:
+    """Metric values of this process only (METRICS_DIR unset): scrape each worker"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, width, increments):
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0.0] * width
+            for index, amount in increments:
+                values[index] += amount
+
+    def collect(self):
+        with self._lock:
+            return {key: list(values) for key, values in self._values.items()}
+
+
+class SharedValues:
+    """Metric values of every worker on the host: one ProcessFile per process in a directory.
+
+    A scrape sums the files, so whichever worker answers reports for all of them.
+    Each worker opens its file on first use, after the fork. Files left by exited
+    processes are folded into totals.db then, so restarts keep the counts without
+    growing the directory.
+    """
+
+    TOTALS = "totals.db"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def add(self, key, width, increments):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            offset = self._file.values_offset(key, width)
+            for index, amount in increments:
+                self._file.add(offset, index, amount)
+
+    def collect(self):
+        totals = {}
+        with self._directory_lock(fcntl.LOCK_SH):
+            for name in os.listdir(self.directory):
+                if name.endswith(".db"):
+                    _merge(totals, ProcessFile.read(os.path.join(self.directory, name)))
+        return totals
+
+    @contextmanager
+    def _directory_lock(self, operation):
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(os.path.join(self.directory, "lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)  # releases the lock
+
+    def _open(self):
+        pid = os.getpid()
+        with self._directory_lock(fcntl.LOCK_EX):
+            self._fold_exited(pid)
+            self._file = ProcessFile(os.path.join(self.directory, f"{pid}.db"))
+        self._pid = pid
+
+    def _fold_exited(self, pid):
+        """Merge files of processes that are gone (or an earlier process with this pid) into totals.db"""
+        exited = []
+        for name in os.listdir(self.directory):
+            stem, _, extension = name.partition(".")
+            if extension == "db" and stem.isdigit() and (int(stem) == pid or not _alive(int(stem))):
+                exited.append(os.path.join(self.directory, name))
+        if not exited:
+            return
+        totals_path = os.path.join(self.directory, self.TOTALS)
+        totals = ProcessFile.read(totals_path) if os.path.exists(totals_path) else {}
+        for path in exited:
+            _merge(totals, ProcessFile.read(path))
+        merged = ProcessFile(f"{totals_path}.tmp")
+        for key, values in totals.items():
+            offset = merged.values_offset(key, len(values))
+            for index, value in enumerate(values):
+                merged.add(offset, index, value)
+        merged.close()
+        os.replace(f"{totals_path}.tmp", totals_path)
+        for path in exited:
+            os.remove(path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, one series per label combination.
+
+    Values live in the registry's store: per bucket counts (last is +Inf), then sum and count.
+    """
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.width = len(self.buckets) + 3
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        key = json.dumps([self.name, [str(label) for label in labels]])
+        self.registry.values.add(key, self.width, ((index, 1), (self.width - 2, value), (self.width - 1, 1)))
+
+    def render(self, series):
+        """Exposition-format lines for {label values: stored values}: cumulative buckets, then _sum and _count"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(series.items()):
+            pairs = [f'{name}="{_label_value(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), values):
+                cumulative += int(bucket_count)
+                le = 'le="%s"' % (bound if bound == "+Inf" else repr(float(bound)))
+                lines.append(f"{self.name}_bucket{{{','.join([*pairs, le])}}} {cumulative}")
+            suffix = f"{{{','.join(pairs)}}}" if pairs else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-2]}")
+            lines.append(f"{self.name}_count{suffix} {int(values[-1])}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter without labels, kept in the registry's store like the histograms"""
+
+    def __init__(self, registry, name, documentation):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.key = json.dumps([name, []])
+
+    def inc(self, amount=1):
+        self.registry.values.add(self.key, 1, ((0, amount),))
+
+    def render(self, series):
+        values = series.get((), [0])
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter", f"{self.name} {values[0]:g}"]
+
+
+class Registry:
+    """Metrics exposed at /metrics, summed over the host's workers when METRICS_DIR is set"""
+
+    def __init__(self):
+        self.metrics = []
+        self._values = None
+
+    @property
+    def values(self):
+        if self._values is None:
+            directory = getattr(settings, "METRICS_DIR", "")
+            self._values = SharedValues(directory) if directory else LocalValues()
+        return self._values
+
+    def histogram(self, *args, **kwargs):
+        histogram = Histogram(self, *args, **kwargs)
+        self.metrics.append(histogram)
+        return histogram
+
+    def counter(self, *args, **kwargs):
+        counter = Counter(self, *args, **kwargs)
+        self.metrics.append(counter)
+        return counter
+
+    def render(self):
+        by_name = defaultdict(dict)
+        for key, values in self.values.collect().items():
+            name, labels = json.loads(key)
+            by_name[name][tuple(labels)] = values
+        return "\n".join(line for metric in self.metrics for line in metric.render(by_name[metric.name])) + "\n"
+
+
+registry = Registry()
+REQUEST_SECONDS = registry.histogram(
+    "lostfound_http_request_duration_seconds", "Request latency by endpoint.", ("method", "route", "status")
+)
+REQUEST_QUERIES = registry.histogram(
+    "lostfound_http_request_queries", "SQL queries per request.", ("route",), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "lostfound_http_request_db_seconds", "Time per request spent in SQL.", ("route",)
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "lostfound_db_query_duration_seconds", "Duration of single SQL statements, in and out of requests.", ("alias",)
+)
+SERIALIZER_SECONDS = registry.histogram(
+    "lostfound_serializer_duration_seconds", "Serializer validation and rendering time.", ("serializer", "phase")
+)
+EXTERNAL_SECONDS = registry.histogram(
+    "lostfound_external_call_duration_seconds", "Calls to SMTP and Cloudinary.", ("service", "operation", "outcome")
+)
+PASSWORD_HASH_SECONDS = registry.histogram(
+    "lostfound_password_hash_duration_seconds", "Password hash computations.", ("algorithm",)
+)
+LOG_RECORDS_DROPPED = registry.counter(
+    "lostfound_log_records_dropped_total", "Log records dropped because the log writer fell behind."
+)
+RESPONSE_CACHE_HITS = registry.counter(
+    "lostfound_response_cache_hits_total", "GET responses served from the response cache."
+)
+RESPONSE_CACHE_MISSES = registry.counter(
+    "lostfound_response_cache_misses_total", "Cacheable GET responses rendered by a view."
+)
+RESPONSE_CACHE_NOT_MODIFIED = registry.counter(
+    "lostfound_response_cache_not_modified_total", "Cacheable GETs answered 304 Not Modified."
+)
+
+
+class RequestStats:
+    """Where one request's time went; filled in by the query wrapper and the timers below"""
+
+    MAX_DISTINCT_QUERIES = 200
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.external_seconds = 0.0
+        self.by_sql = {}  # SQL text (parameters are separate, so it is already normalised) -> [count, seconds]
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.query_seconds += seconds
+        entry = self.by_sql.get(sql)
+        if entry is None and len(self.by_sql) < self.MAX_DISTINCT_QUERIES:
+            entry = self.by_sql[sql] = [0, 0.0]
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def top_queries(self, limit=5):
+        ranked = sorted(self.by_sql.items(), key=lambda pair: pair[1][1], reverse=True)[:limit]
+        return "; ".join(f"{count}x {seconds * 1000:.1f}ms {sql[:200]}" for sql, (count, seconds) in ranked)
+
+
+current_request = ContextVar("lostfound_request_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper, installed on every connection (see signals)"""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        DB_QUERY_SECONDS.observe(elapsed, context["connection"].alias)
+        stats = current_request.get()
+        if stats is not None:
+            stats.add_query(sql, elapsed)
+
+
+@contextmanager
+def external_call(service, operation):
+    """Time a call to an outside service; failures are labelled outcome="error" """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - started
+        EXTERNAL_SECONDS.observe(elapsed, service, operation, outcome)
+        stats = current_request.get()
+        if stats is not None:
+            stats.external_seconds += elapsed
+
+
+@contextmanager
+def serializer_timer(name, phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SERIALIZER_SECONDS.observe(elapsed, name, phase)
+        stats = current_request.get()
+        if stats is not None:
+            stats.serializer_seconds += elapsed
+
+
+class TimedSerializerMixin:
+    """Record validation (is_valid) and rendering (.data) time per serializer class"""
+
+    @property
+    def metric_name(self):
+        child = getattr(self, "child", None)
+        return f"{type(child).__name__}[]" if child is not None else type(self).__name__
+
+    def is_valid(self, *args, **kwargs):
+        with serializer_timer(self.metric_name, "validate"):
+            return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        with serializer_timer(self.metric_name, "render"):
+            return super().data
+
+
+class MetricsMiddleware:
+    """Per-endpoint latency, query and serializer metrics; logs requests over SLOW_REQUEST_MS"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, "SLOW_REQUEST_MS", 500) / 1000
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, started = RequestStats(), time.perf_counter()
+        token = current_request.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats, started = RequestStats(), time.perf_counter()
+        token = current_request.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, stats, elapsed):
+        # Route patterns, not raw paths, keep label cardinality bounded
+        match = request.resolver_match
+        route = match.route if match else "<unmatched>"
+        REQUEST_SECONDS.observe(elapsed, request.method, route, response.status_code)
+        REQUEST_QUERIES.observe(stats.queries, route)
+        REQUEST_DB_SECONDS.observe(stats.query_seconds, route)
+
+        if elapsed >= self.slow_seconds:
+            logger.warning(
+                "Slow request %s %s -> %s in %.0f ms: %d queries (%.0f ms), serializers %.0f ms, "
+                "external calls %.0f ms; top queries: %s",
+                request.method, request.path, response.status_code, elapsed * 1000,
+                stats.queries, stats.query_seconds * 1000, stats.serializer_seconds * 1000,
+                stats.external_seconds * 1000, stats.top_queries() or "-",
+            )
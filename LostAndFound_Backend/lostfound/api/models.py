@@ -1,17 +1,40 @@
+import re
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 
+from .geo import encode as geohash_encode
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
 
 class UserProfile(AbstractUser):
     fcm_token = models.CharField(max_length=255, blank=True, null=True)
     password = models.CharField(max_length=128, default="defaultpassword")
     email = models.EmailField(unique=True, blank=False, null=False)
+    token_version = models.PositiveIntegerField(default=0)  # bump to revoke every issued JWT
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Case-insensitive uniqueness; also the indexes behind RegisterSerializer's conflict lookup
+            models.UniqueConstraint(Lower("username"), name="user_username_ci_unique"),
+            models.UniqueConstraint(Lower("email"), name="user_email_ci_unique"),
+        ]
 
     def __str__(self):
         return self.username
 
+    def revoke_tokens(self):
+        """Invalidate all access/refresh tokens issued so far; post_save evicts the auth cache"""
+        self.token_version = models.F("token_version") + 1
+        self.save(update_fields=["token_version"])
+        self.refresh_from_db(fields=["token_version"])
+
 
 
 class LostFoundItem(models.Model):
@@ -20,6 +43,15 @@ class LostFoundItem(models.Model):
         ('found', 'Found'),
     ]
 
+    IMAGE_PROCESSING = 'processing'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_PROCESSING, 'Processing'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    ]
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -31,16 +63,245 @@ class LostFoundItem(models.Model):
     description = models.TextField()
     category = models.CharField(max_length=10, choices=CATEGORY_CHOICES)
     location = models.CharField(max_length=255)
+    latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
     image = CloudinaryField('image', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Outcome of the background storage/variant stage; blank until an image is uploaded
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, blank=True, editable=False)
+    image_error = models.CharField(max_length=255, blank=True, editable=False)
+    # Original awaiting that stage once it is in storage, and when the stage was queued
+    image_key = models.CharField(max_length=255, blank=True, editable=False)
+    image_queued_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # 64-bit dHash of the image (signed, to fit a BIGINT); its bands are in ItemSignatureBand
+    image_phash = models.BigIntegerField(null=True, blank=True, editable=False)
+    # Earlier report of the same object by the same reporter or at the same place
+    duplicate_of = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, related_name="duplicates", null=True, blank=True, editable=False
+    )
     contact_email = models.EmailField(null=True, blank=True)
+    # When a lost report was marked found, i.e. the owner has it back; archive_items retires these
+    resolved_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["category", "location"])]
+        indexes = [
+            models.Index(fields=["category", "location"]),
+            # Serves the keyset-paginated feed: ORDER BY created_at DESC, id DESC over live items
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="item_feed_live_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # user_profile: a reporter's live items, newest first
+            models.Index(
+                fields=["user", "-created_at"],
+                name="item_user_live_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # Incremental pulls by the search/location indexes and export ?since=; these
+            # must also see soft-deleted rows, so the index is not partial.
+            models.Index(fields=["updated_at"], name="item_updated_idx"),
+            # Geohash prefix range scans for ?near= queries. Not partial: SQLite only
+            # turns the OR of cell ranges into index probes on a full index.
+            models.Index(fields=["geohash"], name="item_geohash_idx"),
+            # recover_stale_uploads: the few rows still processing, oldest first
+            models.Index(
+                fields=["image_queued_at"],
+                name="item_image_pending_idx",
+                condition=models.Q(image_status="processing"),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_category_display()}) - {self.location}"
 
+    # Fields that decide which dashboard rollup bucket an item counts towards
+    STATS_FIELDS = {"created_at", "category", "location", "is_deleted"}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if cls.STATS_FIELDS.issubset(field_names):
+            instance._stats_bucket = instance.stats_bucket()  # what the rollups currently count
+        return instance
+
+    def stats_bucket(self):
+        """(day, category, location) rollup bucket of this item; None while deleted"""
+        if self.is_deleted or self.created_at is None:
+            return None
+        return (timezone.localdate(self.created_at), self.category.lower(), self.location)
+
+    def refresh_geohash(self):
+        """Normalise coordinates to 6 decimals (~0.1 m) and derive the geohash cell"""
+        if self.latitude is None or self.longitude is None:
+            self.latitude = self.longitude = self.geohash = None
+            return
+        self.latitude = round(self.latitude, 6)
+        self.longitude = round(self.longitude, 6)
+        self.geohash = geohash_encode(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.refresh_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+        super().save(*args, **kwargs)
+
+
+
+class Location(models.Model):
+    """Canonical place name; item locations are resolved to one of these on write"""
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, unique=True, editable=False)  # normalised name
+    aliases = models.JSONField(default=list, blank=True)
+    is_active = models.BooleanField(default=True)
+    # Vetted by an admin: suggested by autocomplete however few items use it
+    is_approved = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+        indexes = [models.Index(fields=["updated_at"])]
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def make_key(text):
+        """Case-, spacing- and punctuation-insensitive form used for lookups"""
+        return " ".join(WORD_RE.findall((text or "").lower()))
+
+    def save(self, *args, **kwargs):
+        self.name = " ".join(self.name.split())
+        self.key = self.make_key(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"key"}
+        super().save(*args, **kwargs)
+
+
+class ArchivedItem(models.Model):
+    """Cold copy of an item moved out of the hot table by archive_items; restorable as-is"""
+    REASON_DELETED = 'deleted'
+    REASON_RESOLVED = 'resolved'
+    REASON_CHOICES = [
+        (REASON_DELETED, 'Soft deleted'),
+        (REASON_RESOLVED, 'Resolved'),
+    ]
+
+    original_id = models.BigIntegerField(unique=True)
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    data = models.JSONField()  # the row in Django's serialization format
+    item_created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-archived_at"]
+        # In-process indexes pull recent archivals by archived_at, like item changes by updated_at
+        indexes = [models.Index(fields=["archived_at"])]
+
+    def __str__(self):
+        return f"Item #{self.original_id} ({self.reason})"
+
+
+class ItemDailyCount(models.Model):
+    """Live items per (day reported, category, location); summed for the dashboard stats"""
+    day = models.DateField()
+    category = models.CharField(max_length=10, choices=LostFoundItem.CATEGORY_CHOICES)
+    location = models.CharField(max_length=255)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "category", "location"], name="item_daily_count_bucket"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category} {self.location}: {self.count}"
+
+
+class ItemSignatureBand(models.Model):
+    """One LSH band key of an item's text (MinHash) or image (dHash); shared keys mark likely matches"""
+    item = models.ForeignKey(LostFoundItem, on_delete=models.CASCADE, related_name="signature_bands")
+    key = models.CharField(max_length=40)
+
+    class Meta:
+        indexes = [models.Index(fields=["key", "item"])]
+
+    def __str__(self):
+        return self.key
+
+
+class NotificationJob(models.Model):
+    """Outbox entry for an email fan-out, drained by the process_notifications worker"""
+    KIND_ITEM_FOUND = 'item_found'
+    KIND_CONTACT_REPORTER = 'contact_reporter'
+    KIND_CHOICES = [
+        (KIND_ITEM_FOUND, 'Item found'),
+        (KIND_CONTACT_REPORTER, 'Contact reporter'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    item = models.ForeignKey(LostFoundItem, on_delete=models.CASCADE, related_name="notification_jobs")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    recipients_expanded = models.BooleanField(default=False)
+    payload = models.JSONField(default=dict, blank=True)  # kind-specific content, e.g. a contact message
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["available_at"]
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.item_id} ({self.status})"
+
+
+class NotificationDelivery(models.Model):
+    """Delivery status of one job for one recipient"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    job = models.ForeignKey(NotificationJob, on_delete=models.CASCADE, related_name="deliveries")
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["job", "email"], name="unique_delivery_per_job")]
+        indexes = [models.Index(fields=["job", "status"])]
+
+    def __str__(self):
+        return f"{self.email} ({self.status})"
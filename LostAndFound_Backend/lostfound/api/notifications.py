@@ -0,0 +1,221 @@
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .matching import match_recipients
+from .metrics import external_call
+from .models import NotificationDelivery, NotificationJob
+from .utils import build_contact_reporter_message, build_item_found_message
+
+logger = logging.getLogger(__name__)
+
+_smtp = None  # this worker's SMTP connection, kept open from one job to the next
+
+
+def get_batch_size():
+    return getattr(settings, "NOTIFICATION_BATCH_SIZE", 200)
+
+
+def get_max_attempts():
+    return getattr(settings, "NOTIFICATION_MAX_ATTEMPTS", 5)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base, ..."""
+    base = getattr(settings, "NOTIFICATION_RETRY_BASE_SECONDS", 60)
+    return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+
+def iter_recipients(job):
+    """Recipients of a job: reporters of the lost items that best match the found item,
+    or the one reporter a contact message is addressed to"""
+    if job.kind == NotificationJob.KIND_ITEM_FOUND:
+        return iter(match_recipients(job.item))
+    if job.kind == NotificationJob.KIND_CONTACT_REPORTER:
+        return iter([job.payload["to"]])
+    raise ValueError(f"Unknown notification kind: {job.kind}")
+
+
+def expand_recipients(job):
+    """Write one pending delivery row per recipient, a chunk at a time"""
+    batch_size = get_batch_size()
+    chunk = []
+    for email in iter_recipients(job):
+        chunk.append(NotificationDelivery(job=job, email=email))
+        if len(chunk) >= batch_size:
+            NotificationDelivery.objects.bulk_create(chunk, ignore_conflicts=True)
+            chunk = []
+    if chunk:
+        NotificationDelivery.objects.bulk_create(chunk, ignore_conflicts=True)
+
+    job.recipients_expanded = True
+    job.save(update_fields=["recipients_expanded", "updated_at"])
+
+
+def build_messages(job):
+    """(subject, plain text body, HTML body or None) of a job's email"""
+    if job.kind == NotificationJob.KIND_ITEM_FOUND:
+        return (*build_item_found_message(job.item), None)
+    if job.kind == NotificationJob.KIND_CONTACT_REPORTER:
+        return build_contact_reporter_message(job.payload["message"])
+    raise ValueError(f"Unknown notification kind: {job.kind}")
+
+
+def claimable_jobs(now):
+    """Due pending jobs, plus running jobs whose worker stopped heartbeating"""
+    lease = timedelta(seconds=getattr(settings, "NOTIFICATION_LEASE_SECONDS", 600))
+    return NotificationJob.objects.filter(
+        Q(status=NotificationJob.STATUS_PENDING, available_at__lte=now)
+        | Q(status=NotificationJob.STATUS_RUNNING, updated_at__lt=now - lease)
+    )
+
+
+def claim_next_job():
+    """Atomically move the next due job to running; safe with several workers"""
+    now = timezone.now()
+    for pk in claimable_jobs(now).values_list("pk", flat=True)[:10]:
+        claimed = claimable_jobs(now).filter(pk=pk).update(
+            status=NotificationJob.STATUS_RUNNING, updated_at=now
+        )
+        if claimed:
+            return NotificationJob.objects.select_related("item").get(pk=pk)
+    return None
+
+
+def deliver_chunk(connection, deliveries, subject, body, html=None):
+    """Send one message per recipient over an already-open connection"""
+    now = timezone.now()
+    for delivery in deliveries:
+        delivery.attempts += 1
+        message = EmailMultiAlternatives(subject, body, settings.DEFAULT_FROM_EMAIL, [delivery.email], connection=connection)
+        if html:
+            message.attach_alternative(html, "text/html")
+        try:
+            with external_call("smtp", "send"):
+                message.send()
+        except smtplib.SMTPServerDisconnected:
+            # Reconnect once and retry this recipient; later failures are recorded below.
+            connection.close()
+            try:
+                with external_call("smtp", "connect"):
+                    connection.open()
+                with external_call("smtp", "send"):
+                    message.send()
+            except Exception as e:
+                delivery.status = NotificationDelivery.STATUS_FAILED
+                delivery.last_error = str(e)
+                continue
+        except Exception as e:
+            delivery.status = NotificationDelivery.STATUS_FAILED
+            delivery.last_error = str(e)
+            continue
+        delivery.status = NotificationDelivery.STATUS_SENT
+        delivery.sent_at = now
+        delivery.last_error = ""
+
+    NotificationDelivery.objects.bulk_update(deliveries, ["status", "attempts", "last_error", "sent_at"])
+
+
+def smtp_connection():
+    """Open SMTP connection shared by the jobs this worker runs.
+
+    A burst of jobs pays for one TLS handshake and login instead of one per job. The
+    server may have dropped a connection that sat idle, so a reused one must answer NOOP
+    first; otherwise it is replaced.
+    """
+    global _smtp
+    if _smtp is not None:
+        smtp = getattr(_smtp, "connection", False)  # False: a backend without a socket (locmem, console)
+        try:
+            if smtp is False or (smtp is not None and smtp.noop()[0] == 250):
+                return _smtp
+        except (smtplib.SMTPException, OSError):
+            pass
+        close_smtp_connection()
+    connection = get_connection(fail_silently=False)
+    with external_call("smtp", "connect"):
+        connection.open()
+    _smtp = connection
+    return connection
+
+
+def close_smtp_connection():
+    """Drop the shared connection, e.g. when the worker exits or a job broke it"""
+    global _smtp
+    connection, _smtp = _smtp, None
+    if connection is not None:
+        try:
+            connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+
+def process_job(job):
+    """Expand recipients, deliver pending/retryable rows, then finish or reschedule the job"""
+    job.attempts += 1
+    if not job.recipients_expanded:
+        expand_recipients(job)
+
+    subject, body, html = build_messages(job)
+    batch_size = get_batch_size()
+    max_attempts = get_max_attempts()
+    outstanding = job.deliveries.exclude(status=NotificationDelivery.STATUS_SENT).filter(
+        attempts__lt=max_attempts
+    ).order_by("pk")
+
+    connection = smtp_connection()
+    try:
+        last_pk = 0
+        while True:
+            deliveries = list(outstanding.filter(pk__gt=last_pk)[:batch_size])
+            if not deliveries:
+                break
+            deliver_chunk(connection, deliveries, subject, body, html)
+            last_pk = deliveries[-1].pk
+            # Heartbeat so other workers do not treat the job as abandoned
+            NotificationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now())
+    except Exception:
+        close_smtp_connection()  # do not hand a connection in an unknown state to the next job
+        raise
+
+    retryable = outstanding.filter(status=NotificationDelivery.STATUS_FAILED).exists()
+    if retryable and job.attempts < max_attempts:
+        job.status = NotificationJob.STATUS_PENDING
+        job.available_at = timezone.now() + retry_delay(job.attempts)
+    elif retryable:
+        job.status = NotificationJob.STATUS_FAILED
+    else:
+        job.status = NotificationJob.STATUS_DONE
+    job.save(update_fields=["status", "attempts", "available_at", "updated_at"])
+
+    sent = job.deliveries.filter(status=NotificationDelivery.STATUS_SENT).count()
+    logger.info("Notification job %s: %s sent, status %s", job.pk, sent, job.status)
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """Drain due jobs; returns how many were processed"""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        try:
+            process_job(job)
+        except Exception as e:
+            logger.exception("Notification job %s crashed", job.pk)
+            exhausted = job.attempts >= get_max_attempts()
+            NotificationJob.objects.filter(pk=job.pk).update(
+                status=NotificationJob.STATUS_FAILED if exhausted else NotificationJob.STATUS_PENDING,
+                attempts=job.attempts,
+                available_at=timezone.now() + retry_delay(job.attempts),
+                last_error=str(e),
+                updated_at=timezone.now(),
+            )
+        processed += 1
+    return processed
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher
+from django.db import close_old_connections
+from rest_framework.exceptions import Throttled
+
+from .metrics import PASSWORD_HASH_SECONDS
+
+
+class HashTimings:
+    """Rolling sample of password hash durations per algorithm, for percentile reporting"""
+
+    def __init__(self, size=4096):
+        self._samples = defaultdict(lambda: deque(maxlen=size))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, algorithm, seconds):
+        with self._lock:
+            self._samples[algorithm].append(seconds)
+            self._counts[algorithm] += 1
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def percentiles(self):
+        """{algorithm: {"count", "p50", "p90", "p99", "max"}} with durations in ms"""
+        with self._lock:
+            samples = {algorithm: sorted(values) for algorithm, values in self._samples.items()}
+            counts = dict(self._counts)
+        report = {}
+        for algorithm, values in samples.items():
+            if not values:
+                continue
+            pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+            report[algorithm] = {
+                "count": counts[algorithm],
+                "p50": pick(0.50),
+                "p90": pick(0.90),
+                "p99": pick(0.99),
+                "max": values[-1] * 1000,
+            }
+        return report
+
+
+hash_timings = HashTimings()
+
+
+class TimedHasherMixin:
+    """Record every hash computation; verify() and rehashing both go through encode()"""
+
+    def encode(self, password, salt, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().encode(password, salt, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            hash_timings.record(self.algorithm, elapsed)
+            PASSWORD_HASH_SECONDS.observe(elapsed, self.algorithm)
+
+
+class TimedPBKDF2PasswordHasher(TimedHasherMixin, PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with its work factor taken from PASSWORD_HASH_ITERATIONS.
+
+    Stored hashes with a different iteration count are upgraded on the next login
+    (Django's check_password() rehashes whenever must_update() says so).
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_HASH_ITERATIONS", PBKDF2PasswordHasher.iterations)
+
+
+class TimedScryptPasswordHasher(TimedHasherMixin, ScryptPasswordHasher):
+    pass
+
+
+_pool = None
+_slots = None
+_running = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Bounded pool for login work, plus the slots that cap running + queued jobs"""
+    global _pool, _slots, _running
+    with _pool_lock:
+        if _pool is None:
+            workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 4)
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+            _slots = threading.BoundedSemaphore(workers + getattr(settings, "PASSWORD_HASHING_QUEUE", 32))
+            _running = threading.BoundedSemaphore(workers)
+        return _pool, _slots
+
+
+def _run_in_worker(fn, args):
+    # Pool threads keep their own DB connections; apply CONN_MAX_AGE like a request would
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+def _claim_slot():
+    pool, slots = get_hashing_pool()
+    if not slots.acquire(blocking=False):
+        # Shed load instead of queueing without bound: capacity stays predictable
+        raise Throttled(wait=1, detail="Too many logins in progress, please retry shortly.")
+    return pool, slots
+
+
+def run_password_work(fn, *args):
+    """Run fn (which hashes passwords) on the request thread, PASSWORD_HASHING_WORKERS at a time.
+
+    A WSGI worker thread waits for its response whichever thread hashes, so handing the
+    work to the pool would only add a thread switch. What this buys under WSGI is the cap:
+    hashes beyond the workers wait their turn, and logins beyond the queue get 429 at once
+    instead of piling up. Only the ASGI form frees its thread while the hash runs.
+    """
+    _, slots = _claim_slot()
+    try:
+        with _running:
+            return fn(*args)
+    finally:
+        slots.release()
+
+
+async def arun_password_work(fn, *args):
+    """Async form: the event loop keeps serving other requests while the pool hashes"""
+    pool, slots = _claim_slot()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, _run_in_worker, fn, args)
+    finally:
+        slots.release()
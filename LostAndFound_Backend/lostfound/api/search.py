@@ -0,0 +1,268 @@
+import bisect
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .archive import archive_watermark, archived_ids
+from .models import LostFoundItem
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SEARCH_CONFIG = "english"
+SEARCH_INDEX_NAME = "api_lostfounditem_search_gin"
+
+# Kept byte-for-byte identical to the GIN index expression so Postgres can use it.
+SEARCH_DOCUMENT_SQL = (
+    f"(setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(location, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C'))"
+)
+
+# Field weights for the in-process index, mirroring the A/B/C weights above.
+FIELD_WEIGHTS = (("title", 3.0), ("location", 2.0), ("description", 1.0))
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def build_tsquery(query):
+    """Build a to_tsquery() expression: all terms required, last term matched as a prefix"""
+    terms = tokenize(query)
+    if not terms:
+        return ""
+    terms[-1] = f"{terms[-1]}:*"
+    return " & ".join(terms)
+
+
+def uses_database_search(using="default"):
+    """Postgres has native full-text search; everything else uses the in-process index"""
+    return connections[using].vendor == "postgresql"
+
+
+def ensure_search_index(using="default"):
+    """Create the GIN full-text index on Postgres (migrations are not tracked in git)"""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+    table = LostFoundItem._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} "
+            f"ON {table} USING gin ({SEARCH_DOCUMENT_SQL})"
+        )
+
+
+class RankedResults:
+    """Lazy, sliceable sequence of items in relevance order, loaded one page at a time.
+
+    The index ranks every live item; the ids are first narrowed to the ones queryset
+    still admits (e.g. ?near=), so counts and page boundaries match what is served.
+    """
+
+    # Up to this many hits are checked with one pk IN (...) query, beyond it by reading queryset's pks
+    IN_LIMIT = 900
+
+    def __init__(self, queryset, ranked_ids):
+        self.queryset = queryset
+        self._ranked_ids = ranked_ids
+        self._ids = None
+
+    @property
+    def ranked_ids(self):
+        if self._ids is None:
+            if not self._ranked_ids:
+                self._ids = []
+            else:
+                admitted = self.queryset.order_by()
+                if len(self._ranked_ids) <= self.IN_LIMIT:
+                    admitted = admitted.filter(pk__in=self._ranked_ids)
+                admitted = set(admitted.values_list("pk", flat=True))
+                self._ids = [pk for pk in self._ranked_ids if pk in admitted]
+        return self._ids
+
+    def __len__(self):
+        return len(self.ranked_ids)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        ids = self.ranked_ids[key]
+        items = self.queryset.in_bulk(ids)
+        return [items[pk] for pk in ids if pk in items]
+
+
+class InvertedIndex:
+    """In-process ranked inverted index over item title, location and description"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # token -> {item_id: weighted term frequency}
+        self._documents = {}  # item_id -> tokens indexed for that item
+        self._vocabulary = None  # sorted tokens, rebuilt lazily for prefix lookups
+        self._watermark = None  # newest updated_at seen
+        self._archive_watermark = None  # newest archived_at seen
+        self._last_sync = 0.0
+        self._loaded = False
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._vocabulary = None
+            self._watermark = None
+            self._archive_watermark = None
+            self._loaded = False
+
+    def add(self, item_id, title, location, description):
+        weights = defaultdict(float)
+        for (_, weight), text in zip(FIELD_WEIGHTS, (title, location, description)):
+            for token in tokenize(text):
+                weights[token] += weight
+
+        with self._lock:
+            self._discard(item_id)
+            for token, weight in weights.items():
+                if token not in self._postings:
+                    self._vocabulary = None
+                self._postings[token][item_id] = weight
+            self._documents[item_id] = tuple(weights)
+
+    def discard(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def _discard(self, item_id):
+        for token in self._documents.pop(item_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+
+    def index_item(self, item):
+        """Add, refresh or drop a single item depending on its deleted flag"""
+        if item.is_deleted:
+            self.discard(item.pk)
+        else:
+            self.add(item.pk, item.title, item.location, item.description)
+        self._advance_watermark(item.updated_at)
+
+    def _advance_watermark(self, updated_at):
+        if updated_at and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def sync(self):
+        """Load the index on first use, then pull rows changed by other processes"""
+        refresh_every = getattr(settings, "SEARCH_INDEX_REFRESH_SECONDS", 30)
+        now = time.monotonic()
+        if self._loaded and now - self._last_sync < refresh_every:
+            return
+
+        with self._lock:
+            if self._loaded:
+                # Rows archive_items deleted outright never show up in the updated_at pull
+                archived, self._archive_watermark = archived_ids(self._archive_watermark)
+                for pk in archived:
+                    self._discard(pk)
+            else:
+                self._archive_watermark = archive_watermark()
+            rows = LostFoundItem.objects.all()
+            if self._loaded and self._watermark is not None:
+                rows = rows.filter(updated_at__gte=self._watermark)
+            elif not self._loaded:
+                rows = rows.filter(is_deleted=False)
+            fields = ("id", "title", "location", "description", "is_deleted", "updated_at")
+            for pk, title, location, description, is_deleted, updated_at in rows.values_list(
+                *fields
+            ).iterator(chunk_size=5000):
+                if is_deleted:
+                    self._discard(pk)
+                else:
+                    self.add(pk, title, location, description)
+                self._advance_watermark(updated_at)
+            self._loaded = True
+            self._last_sync = now
+
+    def _prefix_postings(self, prefix):
+        """Merge the postings of every token starting with prefix"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        merged = {}
+        position = bisect.bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            for item_id, weight in self._postings[vocabulary[position]].items():
+                if weight > merged.get(item_id, 0.0):
+                    merged[item_id] = weight
+            position += 1
+        return merged
+
+    def search(self, query):
+        """Return matching item ids ranked by TF-IDF score, best first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        self.sync()
+
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms[:-1]]
+            postings.append(self._prefix_postings(terms[-1]))
+            if not all(postings):
+                return []
+
+            total = len(self._documents) or 1
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for other in postings[1:]:
+                candidates.intersection_update(other)
+                if not candidates:
+                    return []
+
+            scores = dict.fromkeys(candidates, 0.0)
+            for term_postings in postings:
+                idf = math.log(1 + total / len(term_postings))
+                for item_id in candidates:
+                    scores[item_id] += term_postings[item_id] * idf
+
+        # Newer items win ties, matching the default feed ordering.
+        return sorted(scores, key=lambda item_id: (scores[item_id], item_id), reverse=True)
+
+
+search_index = InvertedIndex()
+
+
+def search_items(queryset, query):
+    """Filter queryset down to items matching query, ordered by relevance"""
+    if uses_database_search(queryset.db):
+        tsquery = build_tsquery(query)
+        if not tsquery:
+            return queryset.none()
+        return queryset.filter(
+            RawSQL(
+                f"{SEARCH_DOCUMENT_SQL} @@ to_tsquery('{SEARCH_CONFIG}', %s)",
+                (tsquery,),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({SEARCH_DOCUMENT_SQL}, to_tsquery('{SEARCH_CONFIG}', %s))",
+                (tsquery,),
+                output_field=FloatField(),
+            )
+        ).order_by("-search_rank", "-created_at")
+
+    return RankedResults(queryset, search_index.search(query))
@@ -1,58 +1,177 @@
+import posixpath
+from operator import attrgetter
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
 from rest_framework import serializers
-import cloudinary.uploader
+from rest_framework.relations import PKOnlyObject
 import logging
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from api.models import UserProfile
 
+from . import matching
 from .models import LostFoundItem
-from .utils import send_item_found_notification
+from .utils import enqueue_item_found_notification
+from .uploads import hash_uploaded_image, mark_processing, stage_uploaded_file
+from .images import build_srcset
+from .locations import location_dictionary
+from .metrics import TimedSerializerMixin
 
 logger = logging.getLogger(__name__)
 
 CustomUser = get_user_model()
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['id', 'username', 'email']
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['username', 'email', 'password']
+        # Uniqueness is checked case-insensitively in validate(); drop the per-field exists() queries
         extra_kwargs = {
             'password': {'write_only': True},
-            'email': {'required': True},
-            'username': {'required': True},
+            'email': {'required': True, 'validators': []},
+            'username': {'required': True, 'validators': [UnicodeUsernameValidator()]},
         }
 
+    # Field -> message for conflicts that race past validate()
+    CONFLICTS = {
+        "username": "A user with this username already exists.",
+        "email": "A user with this email already exists.",
+    }
+
+    @staticmethod
+    def conflict_markers(field):
+        """How a unique violation on field shows up in IntegrityError text: the Lower() constraint,
+        or the column's own unique=True index as named by PostgreSQL and by SQLite"""
+        table = CustomUser._meta.db_table
+        return (f"user_{field}_ci_unique", f"{table}_{field}_key", f"{table}.{field}")
+
     def validate_email(self, value):
-        """Ensure email is unique (case-insensitive)"""
-        if CustomUser.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
         return value.lower()  # Normalize email to lowercase
 
     def validate(self, data):
-        """Ensure username uniqueness (case-insensitive)"""
-        if CustomUser.objects.filter(username__iexact=data['username']).exists():
-            raise serializers.ValidationError({"username": "A user with this username already exists."})
+        """Case-insensitive username/email uniqueness in one query over the Lower() unique indexes"""
+        username, email = data["username"].lower(), data["email"]
+        taken = (
+            CustomUser.objects.annotate(username_ci=Lower("username"), email_ci=Lower("email"))
+            .filter(models.Q(username_ci=username) | models.Q(email_ci=email))
+            .values_list("username_ci", "email_ci")[:2]
+        )
+        errors = {}
+        for taken_username, taken_email in taken:
+            if taken_username == username:
+                errors["username"] = self.CONFLICTS["username"]
+            if taken_email == email:
+                errors["email"] = self.CONFLICTS["email"]
+        if errors:
+            raise serializers.ValidationError(errors)
         return data
 
     def create(self, validated_data):
         """Hash password before saving user"""
-        return CustomUser.objects.create_user(**validated_data)
+        try:
+            with transaction.atomic():
+                return CustomUser.objects.create_user(**validated_data)
+        except IntegrityError as e:
+            for field, message in self.CONFLICTS.items():
+                if any(marker in str(e) for marker in self.conflict_markers(field)):
+                    raise serializers.ValidationError({field: message})
+            raise
+
+
+# DRF fields whose to_representation() returns model values unchanged
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.JSONField,
+)
+
+
+class CompiledListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """many=True fast path: one accessor per field, compiled once per response.
+
+    Output is identical to calling child.to_representation() per row, without
+    DRF's per-row field loop, attribute lookups and SkipField handling.
+    """
+
+    def compile_accessors(self):
+        child = self.child
+        overrides = child.get_representation_overrides()
+        accessors = []
+        for field in child._readable_fields:
+            name = field.field_name
+            if name in overrides:
+                accessors.append((name, overrides[name]))
+            elif isinstance(field, serializers.SerializerMethodField):
+                accessors.append((name, getattr(child, field.method_name)))
+            elif isinstance(field, IDENTITY_FIELDS) and field.source_attrs == [name]:
+                accessors.append((name, attrgetter(name)))
+            elif isinstance(field, serializers.RelatedField):
+                # get_attribute() reads just the FK id instead of loading the related row
+                accessors.append((name, self.generic_accessor(field)))
+            elif field.source_attrs == [field.source] and field.source != "*":
+                accessors.append((name, self.plain_accessor(field)))
+            else:
+                accessors.append((name, self.generic_accessor(field)))
+        return accessors
+
+    @staticmethod
+    def plain_accessor(field):
+        get, represent = attrgetter(field.source), field.to_representation
+
+        def accessor(instance):
+            value = get(instance)
+            return None if value is None else represent(value)
+        return accessor
 
+    @staticmethod
+    def generic_accessor(field):
+        def accessor(instance):
+            attribute = field.get_attribute(instance)
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            return None if check_for_none is None else field.to_representation(attribute)
+        return accessor
 
-class LostFoundItemSerializer(serializers.ModelSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        accessors = self.compile_accessors()
+        return [{name: get(item) for name, get in accessors} for item in iterable]
+
+
+class LostFoundItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = LostFoundItem
-        exclude = ["user"]
+        exclude = ["user", "image_phash", "image_key", "image_queued_at"]
+        read_only_fields = ["image_variants", "image_status", "image_error", "geohash", "duplicate_of"]
+        list_serializer_class = CompiledListSerializer
+
+    def validate(self, data):
+        """Coordinates come in pairs"""
+        latitude = data.get("latitude", getattr(self.instance, "latitude", None))
+        longitude = data.get("longitude", getattr(self.instance, "longitude", None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("Provide both latitude and longitude, or neither.")
+        return data
+
+    def get_representation_overrides(self):
+        """Fields whose output to_representation() replaces after the generic pass"""
+        return {"image": self.get_image_url}
 
     def get_image_url(self, obj):
         """Correctly return image URL from CloudinaryResource"""
@@ -65,66 +184,112 @@ class LostFoundItemSerializer(serializers.ModelSerializer):
                 return str(obj.image) if obj.image else None
         return None
 
+    def get_image_srcset(self, obj):
+        """Responsive variants per encoding, ready for <source srcset=...>"""
+        return build_srcset(obj.image_variants or {})
+
     def to_representation(self, instance):
         """Override to include corrected image URL in response"""
         representation = super().to_representation(instance)
-        representation["image"] = self.get_image_url(instance)  # Add correct image URL
+        for name, get in self.get_representation_overrides().items():
+            representation[name] = get(instance)  # Add correct image URL
         return representation
 
     def create(self, validated_data):
-        """Handles creating a lost/found item with optional image upload"""
+        """Handles creating a lost/found item with optional image upload.
+
+        A repeat of a recent report by the same user or at the same place is flagged
+        through duplicate_of. With DEDUP_ACTION = "merge" a repeat of the user's own
+        report is folded into it instead; other people's reports are never merged into.
+        """
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             validated_data["user"] = request.user
 
+        validated_data["location"] = location_dictionary.resolve(validated_data["location"])
         image = validated_data.pop("image", None)
-        item = LostFoundItem.objects.create(**validated_data)
+        item = LostFoundItem(**validated_data)
+        if image:
+            item.image_phash = hash_uploaded_image(image)
+
+        original = matching.find_duplicate(item)
+        repeat = original is not None and item.user_id is not None and original.user_id == item.user_id
+        if original is not None:
+            if repeat and getattr(settings, "DEDUP_ACTION", "flag") == "merge":
+                return self.merge_into(original, image)
+            item.duplicate_of_id = original.duplicate_of_id or original.pk
+        if image:
+            mark_processing(item)  # Saved with the INSERT below
+        item.save(force_insert=True)
 
         if image:
-            self.upload_image_to_cloudinary(item, image)
+            stage_uploaded_file(item, image, marked=True)  # Stored and attached in the background
+
+        # A newly reported found item may be someone's lost item -> notify matching reporters.
+        # A user's repeat of their own report was announced the first time round.
+        if item.category.lower() == "found" and not repeat:
+            transaction.on_commit(lambda: enqueue_item_found_notification(item))
 
         return item
 
+    def merge_into(self, original, image):
+        """Return the earlier report instead of a new row, giving it this report's photo if it had none"""
+        self.merged = True
+        original = LostFoundItem.objects.get(pk=original.pk)
+        if image and not original.image:
+            stage_uploaded_file(original, image)
+        return original
+
     def update(self, instance, validated_data):
         """Handles updating an existing lost item, including optional image updates."""
         old_category = instance.category
         new_category = validated_data.get("category", old_category)
+        marked_found = old_category.lower() == "lost" and new_category.lower() == "found"
 
-        # Check if category changes from 'lost' to 'found' -> Send notification
-        if old_category.lower() == "lost" and new_category.lower() == "found":
-            logger.info(f"Item '{instance.title}' marked as found. Sending email...")
-            send_item_found_notification(instance)  # Trigger email
-            
-        # Check if category changes from 'lost' to 'found' -> Send notification
-        if "image" in validated_data:
-            image = validated_data.pop("image")
-            self.upload_image_to_cloudinary(instance, image)
+        image = validated_data.pop("image", None)
+        if "location" in validated_data:
+            validated_data["location"] = location_dictionary.resolve(validated_data["location"])
 
         # Update remaining fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-
-        instance.save()
+        if image:
+            mark_processing(instance)  # Saved with the row below
+
+        if marked_found:
+            instance.resolved_at = timezone.now()
+        elif new_category.lower() == "lost":
+            instance.resolved_at = None
+
+        with transaction.atomic():
+            instance.save()
+            # Category changed from 'lost' to 'found' -> Send notification, once the row
+            # is committed as found, so the worker never reads it still lost
+            if marked_found:
+                logger.info("Item '%s' marked as found. Queueing email...", instance.title)
+                transaction.on_commit(lambda: enqueue_item_found_notification(instance))  # Worker sends the email
+
+        # Staged after save() so the full-row save cannot overwrite the attached image
+        if image:
+            stage_uploaded_file(instance, image, marked=True)
         return instance
 
-    def upload_image_to_cloudinary(self, item, image):
-        """ Upload image to Cloudinary and store the URL"""
-        try:
-            logger.info("Uploading image to Cloudinary...")
-            upload_result = cloudinary.uploader.upload(image, resource_type="image")
-            secure_url = upload_result.get("secure_url")
 
-            if secure_url:
-                item.image = secure_url
-                item.save()
-                logger.info(f"Cloudinary Upload Success: {item.image}")
-        except Exception as e:
-            logger.error(f" Cloudinary Upload Failed: {str(e)}")
-            raise serializers.ValidationError({"image": f"Image upload failed: {str(e)}"})
+class UploadCompleteSerializer(TimedSerializerMixin, serializers.Serializer):
+    key = serializers.CharField(max_length=255)
+
+    def validate_key(self, value):
+        """Only keys issued for this item's upload tickets are accepted"""
+        item = self.context["item"]
+        # Compare the normalised key, so items/<pk>/../<other pk>/... cannot reach another item's upload
+        if ".." in value.split("/") or posixpath.normpath(value) != value:
+            raise serializers.ValidationError("Invalid upload key.")
+        if not value.startswith(f"items/{item.pk}/"):
+            raise serializers.ValidationError("Upload key does not belong to this item.")
+        return value
 
-    
 
-class ContactReporterSerializer(serializers.Serializer):
+class ContactReporterSerializer(TimedSerializerMixin, serializers.Serializer):
     item_id = serializers.IntegerField()
     mail = serializers.EmailField()
     message = serializers.CharField(max_length=1000, min_length=10)
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import matching, stats
+from .metrics import record_query
+from .authentication import user_cache
+from .cache import invalidate_item
+from .locations import location_dictionary
+from .models import Location, LostFoundItem, UserProfile
+from .search import ensure_search_index, search_index
+from .similarity import similarity_index
+from .throttling import reset_store
+
+
+@receiver(post_save, sender=LostFoundItem)
+def refresh_search_index(sender, instance, **kwargs):
+    """Keep the in-process search index in step with item writes"""
+    if search_index._loaded:
+        search_index.index_item(instance)
+
+
+@receiver(post_save, sender=LostFoundItem)
+def refresh_similarity_vector(sender, instance, **kwargs):
+    """Keep the in-process TF-IDF vectors in step with item writes"""
+    if similarity_index._loaded:
+        similarity_index.index_item(instance)
+
+
+@receiver(post_save, sender=LostFoundItem)
+def refresh_match_signature(sender, instance, **kwargs):
+    """Re-band the item for lost/found matching whenever its text or category may have changed"""
+    update_fields = kwargs.get("update_fields")
+    if update_fields and not {"title", "description", "category", "is_deleted"} & set(update_fields):
+        return
+    matching.index_item(instance)
+
+
+@receiver(post_save, sender=LostFoundItem)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    """Any save, including a soft delete, retires cached list pages and the detail page"""
+    invalidate_item(instance.pk)
+
+
+@receiver(post_save, sender=LostFoundItem)
+def update_stats_rollups(sender, instance, created, **kwargs):
+    """Shift the item's dashboard count when it is created, re-bucketed or soft deleted"""
+    if created or hasattr(instance, "_stats_bucket"):
+        stats.record_items([instance])
+
+
+@receiver(post_delete, sender=LostFoundItem)
+def drop_from_search_index(sender, instance, **kwargs):
+    search_index.discard(instance.pk)
+    similarity_index.discard(instance.pk)
+    invalidate_item(instance.pk)
+
+
+@receiver(post_delete, sender=LostFoundItem)
+def drop_from_stats_rollups(sender, instance, **kwargs):
+    stats.record_removed([instance])
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_dictionary(sender, instance, **kwargs):
+    """Admin edits to names and aliases apply here at once; other processes pick them up on sync"""
+    if location_dictionary._loaded:
+        location_dictionary.add(instance)
+
+
+@receiver(post_delete, sender=Location)
+def drop_from_location_dictionary(sender, instance, **kwargs):
+    location_dictionary.discard(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def evict_cached_user(sender, instance, **kwargs):
+    """Profile, password or active-flag changes must not be served from the auth cache"""
+    user_cache.evict(instance.pk)
+
+
+def warm_similarity_index(sender, **kwargs):
+    """Start loading the TF-IDF vectors when a server worker takes its first request.
+
+    Connected by the WSGI/ASGI entry points only, so tests and management commands never
+    pay for it; per worker, since a thread started before gunicorn forks would not survive.
+    """
+    if getattr(settings, "SIMILARITY_INDEX_WARM_UP", True):
+        similarity_index.warm_up()
+
+
+def create_search_index(sender, using="default", **kwargs):
+    """Create database-side search indexes after migrations run"""
+    ensure_search_index(using)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Time every SQL statement; connection_created fires again when a wrapper reconnects"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(setting_changed)
+def reopen_throttle_store(sender, setting, **kwargs):
+    """override_settings(THROTTLE_STORE=...) takes effect at once, e.g. a test's own store file"""
+    if setting == "THROTTLE_STORE":
+        reset_store()
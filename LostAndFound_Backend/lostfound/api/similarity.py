@@ -0,0 +1,343 @@
+"""TF-IDF similarity between item reports, scored with NumPy.
+
+Every live item is a sparse TF-IDF vector over its title and description words.
+Postings are kept term-major, like a transposed CSR matrix: `indptr[t]:indptr[t + 1]`
+slices `rows` and `tfs` to the items containing term t. Ranking every item against
+one report gathers the postings of that report's terms and sums them per row with a
+single bincount, a sparse matrix-vector product with no Python loop over items.
+
+Saves add rows and postings to a small delta; a compaction folds it into the arrays,
+drops superseded rows and recomputes the IDF weights and norms. Between compactions
+each term's IDF stays fixed (a new term's is fixed on first use), so stored norms and
+query weights always share one basis and scores are true cosines.
+"""
+import logging
+import math
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .archive import archive_watermark, archived_ids
+from .matching import OPPOSITE_CATEGORY, STOP_WORDS
+from .models import LostFoundItem
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_CODES = {"lost": 1, "found": 2}
+TITLE_WEIGHT = 2.0  # a title word counts as much as two description words
+MIN_DELTA_POSTINGS = 20000
+
+
+def term_counts(title, description):
+    """Weighted counts of an item's content words"""
+    counts = Counter()
+    for weight, text in ((TITLE_WEIGHT, title), (1.0, description)):
+        for token in tokenize(text):
+            if token not in STOP_WORDS:
+                counts[token] += weight
+    return counts
+
+
+def tf(count):
+    """Sublinear term frequency: a word repeated ten times is not ten times as telling"""
+    return 1.0 + math.log(count)
+
+
+class SimilarityIndex:
+    """In-process TF-IDF vectors of live items, kept current like the search index"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._last_sync = 0.0
+        self._loaded = False
+        self._warming = False
+        self._warm_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._terms = {}  # token -> term id
+        self._df = []  # term id -> live items containing it
+        self._idfs = []  # term id -> IDF weight, fixed until the next compaction (None until first use)
+        self._indptr = np.zeros(1, np.int64)
+        self._rows = np.zeros(0, np.int32)
+        self._tfs = np.zeros(0, np.float32)
+        self._delta = defaultdict(lambda: (array("i"), array("f")))  # term id -> rows, tfs since compaction
+        self._delta_size = 0
+        # Row-major copy of the compacted terms, and delta rows' terms, so a discard can decrement df
+        self._row_indptr = np.zeros(1, np.int64)
+        self._row_terms = np.zeros(0, np.int32)
+        self._delta_row_terms = {}
+        # Per row; a re-indexed item gets a new row and its old one is marked dead
+        self._item_ids = np.zeros(0, np.int64)
+        self._categories = np.zeros(0, np.int8)
+        self._versions = np.zeros(0, np.float64)  # updated_at timestamp the row was built from
+        self._norms = np.zeros(0, np.float32)
+        self._alive = np.zeros(0, bool)
+        self._size = 0
+        self._live = 0
+        self._row_of = {}  # item id -> live row
+        self._watermark = None
+        self._archive_watermark = None  # newest archived_at seen
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._loaded = False
+
+    def _idf(self, term):
+        idf = self._idfs[term]
+        if idf is None:
+            idf = self._idfs[term] = math.log((1 + self._live) / (1 + self._df[term])) + 1
+        return idf
+
+    def _term(self, token):
+        term = self._terms.get(token)
+        if term is None:
+            term = self._terms[token] = len(self._df)
+            self._df.append(0)
+            self._idfs.append(None)
+        return term
+
+    def _append_row(self, item_id, code, version, norm):
+        if self._size == len(self._item_ids):
+            capacity = max(1024, 2 * self._size)
+            for name in ("_item_ids", "_categories", "_versions", "_norms", "_alive"):
+                grown = np.zeros(capacity, getattr(self, name).dtype)
+                grown[:self._size] = getattr(self, name)[:self._size]
+                setattr(self, name, grown)
+        row = self._size
+        self._item_ids[row], self._categories[row], self._versions[row] = item_id, code, version
+        self._norms[row], self._alive[row] = norm, True
+        self._row_of[item_id] = row
+        self._size += 1
+        self._live += 1
+        return row
+
+    def add(self, item_id, category, title, description, version):
+        """Index (or re-index) one live item; version is its updated_at timestamp"""
+        code = CATEGORY_CODES.get((category or "").lower())
+        counts = term_counts(title, description)
+        with self._lock:
+            row = self._row_of.get(item_id)
+            if row is not None and self._versions[row] == version:
+                return
+            self._discard(item_id)
+            if code is None or not counts:
+                return
+            terms = [self._term(token) for token in counts]
+            for term in terms:
+                self._df[term] += 1
+            tfs = [tf(count) for count in counts.values()]
+            norm = math.sqrt(sum((value * self._idf(term)) ** 2 for term, value in zip(terms, tfs)))
+            row = self._append_row(item_id, code, version, norm)
+            self._delta_row_terms[row] = terms
+            for term, value in zip(terms, tfs):
+                rows, values = self._delta[term]
+                rows.append(row)
+                values.append(value)
+            self._delta_size += len(terms)
+            self._maybe_compact()
+
+    def discard(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def _discard(self, item_id):
+        row = self._row_of.pop(item_id, None)
+        if row is not None:
+            self._alive[row] = False
+            self._live -= 1
+            terms = self._delta_row_terms.pop(row, None)
+            if terms is None:
+                terms = self._row_terms[self._row_indptr[row]:self._row_indptr[row + 1]].tolist()
+            for term in terms:
+                self._df[term] -= 1
+
+    def index_item(self, item):
+        """Add, refresh or drop a single item depending on its deleted flag"""
+        if item.is_deleted:
+            self.discard(item.pk)
+        else:
+            self.add(item.pk, item.category, item.title, item.description, item.updated_at.timestamp())
+        self._advance_watermark(item.updated_at)
+
+    def _advance_watermark(self, updated_at):
+        if updated_at and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def sync(self):
+        """Load the vectors on first use, then pull rows changed by other processes"""
+        refresh_every = getattr(settings, "SIMILARITY_INDEX_REFRESH_SECONDS", 30)
+        now = time.monotonic()
+        if self._loaded and now - self._last_sync < refresh_every:
+            return
+
+        with self._lock:
+            if self._loaded and time.monotonic() - self._last_sync < refresh_every:
+                return  # another thread synced while this one waited
+            if not self._loaded:
+                self._load()
+            else:
+                # Rows archive_items deleted outright never show up in the updated_at pull
+                archived, self._archive_watermark = archived_ids(self._archive_watermark)
+                for pk in archived:
+                    self._discard(pk)
+                rows = LostFoundItem.objects.all()
+                if self._watermark is not None:
+                    rows = rows.filter(updated_at__gte=self._watermark)
+                fields = ("id", "category", "title", "description", "is_deleted", "updated_at")
+                for pk, category, title, description, is_deleted, updated_at in rows.values_list(
+                    *fields
+                ).iterator(chunk_size=5000):
+                    if is_deleted:
+                        self._discard(pk)
+                    else:
+                        self.add(pk, category, title, description, updated_at.timestamp())
+                    self._advance_watermark(updated_at)
+            self._loaded = True
+            self._last_sync = now
+
+    def warm_up(self):
+        """Load in a background thread, so the first matches request does not wait for it"""
+        if self._loaded or self._warming:
+            return  # checked without the lock: a long load holds it
+        with self._warm_lock:
+            if self._warming:
+                return
+            self._warming = True
+        threading.Thread(target=self._warm, name="similarity-warm-up", daemon=True).start()
+
+    def _warm(self):
+        started = time.monotonic()
+        try:
+            self.sync()
+            logger.info("Similarity index loaded %d items in %.1fs", self._live, time.monotonic() - started)
+        except Exception:
+            logger.exception("Warming the similarity index failed")
+        finally:
+            self._warming = False
+            connection.close()  # this thread's own connection
+
+    def _load(self):
+        """Build the arrays from every live item in one pass"""
+        self._reset()
+        self._archive_watermark = archive_watermark()
+        terms, rows, tfs = array("i"), array("i"), array("f")
+        fields = ("id", "category", "title", "description", "updated_at")
+        items = LostFoundItem.objects.filter(is_deleted=False).values_list(*fields)
+        for pk, category, title, description, updated_at in items.iterator(chunk_size=5000):
+            self._advance_watermark(updated_at)
+            code = CATEGORY_CODES.get((category or "").lower())
+            counts = term_counts(title, description)
+            if code is None or not counts:
+                continue
+            row = self._append_row(pk, code, updated_at.timestamp(), 0.0)
+            for token, count in counts.items():
+                terms.append(self._term(token))
+                rows.append(row)
+                tfs.append(tf(count))
+        self._rebuild(
+            np.frombuffer(terms, np.int32), np.frombuffer(rows, np.int32), np.frombuffer(tfs, np.float32)
+        )
+
+    def _maybe_compact(self):
+        dead = self._size - self._live
+        if self._delta_size > max(MIN_DELTA_POSTINGS, len(self._rows) // 50) or dead > max(1000, self._size // 5):
+            self._compact()
+
+    def _compact(self):
+        """Fold the delta into the term-major arrays"""
+        base_terms = np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int32), np.diff(self._indptr))
+        delta_terms = [np.full(len(rows), term, np.int32) for term, (rows, _) in self._delta.items()]
+        self._rebuild(
+            np.concatenate([base_terms, *delta_terms]),
+            np.concatenate([self._rows, *(np.frombuffer(rows, np.int32) for rows, _ in self._delta.values())]),
+            np.concatenate([self._tfs, *(np.frombuffer(tfs, np.float32) for _, tfs in self._delta.values())]),
+        )
+
+    def _rebuild(self, terms, rows, tfs):
+        """Sort (term, row, tf) postings into the term-major arrays, keeping only live rows"""
+        size = self._size
+        alive = self._alive[:size]
+        keep = alive[rows]
+        terms, rows, tfs = terms[keep], rows[keep], tfs[keep]
+
+        # Renumber the surviving rows densely
+        renumber = np.cumsum(alive, dtype=np.int64) - 1
+        rows = renumber[rows].astype(np.int32)
+        for name in ("_item_ids", "_categories", "_versions", "_alive"):
+            setattr(self, name, getattr(self, name)[:size][alive])
+        self._size = self._live = len(self._item_ids)
+        self._row_of = dict(zip(self._item_ids.tolist(), range(self._size)))
+
+        order = np.argsort(terms, kind="stable")
+        terms, self._rows, self._tfs = terms[order], rows[order], tfs[order]
+        df = np.bincount(terms, minlength=len(self._df))
+        self._indptr = np.concatenate(([0], np.cumsum(df)))
+        self._df = df.tolist()
+        self._delta.clear()
+        self._delta_size = 0
+
+        by_row = np.argsort(self._rows, kind="stable")
+        self._row_terms = terms[by_row]
+        self._row_indptr = np.concatenate(([0], np.cumsum(np.bincount(self._rows, minlength=self._size))))
+        self._delta_row_terms = {}
+
+        idf = np.log((1 + self._live) / (1 + df)) + 1
+        self._idfs = idf.tolist()
+        weights = self._tfs * idf[terms]
+        self._norms = np.sqrt(np.bincount(self._rows, weights=weights * weights, minlength=self._size)).astype(np.float32)
+
+    def similar(self, item, limit):
+        """(item id, cosine score) of the opposite-category items closest to item, best first"""
+        opposite = CATEGORY_CODES.get(OPPOSITE_CATEGORY.get(item.category.lower()))
+        if opposite is None:
+            return []
+        counts = term_counts(item.title, item.description)
+        min_score = getattr(settings, "SIMILARITY_MIN_SCORE", 0.1)
+        self.sync()
+
+        with self._lock:
+            query = [(self._terms[token], tf(count)) for token, count in counts.items() if token in self._terms]
+            if not query:
+                return []
+            weights = [(term, value * self._idf(term)) for term, value in query]
+            query_norm = math.sqrt(sum(weight * weight for _, weight in weights))
+
+            # Document weight is tf * idf, and the query's weight folds in the same idf
+            gathered_rows, gathered = [], []
+            compacted_terms = len(self._indptr) - 1
+            for term, weight in weights:
+                scale = weight * self._idf(term) / query_norm
+                if term < compacted_terms:
+                    start, end = self._indptr[term], self._indptr[term + 1]
+                    gathered_rows.append(self._rows[start:end])
+                    gathered.append(self._tfs[start:end] * scale)
+                delta = self._delta.get(term)
+                if delta:
+                    # Copies: an array.array cannot grow while a NumPy view of it is alive
+                    gathered_rows.append(np.array(delta[0], np.int32))
+                    gathered.append(np.array(delta[1], np.float32) * scale)
+            if not gathered_rows:
+                return []
+            scores = np.bincount(np.concatenate(gathered_rows), weights=np.concatenate(gathered), minlength=self._size)
+
+            hits = np.flatnonzero(scores)
+            hits = hits[self._alive[hits] & (self._categories[hits] == opposite) & (self._item_ids[hits] != item.pk)]
+            scores = scores[hits] / self._norms[hits]
+            ids = self._item_ids[hits]
+
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            scores, ids = scores[top], ids[top]
+        order = np.lexsort((-ids, -scores))  # newer items win ties, like search results
+        return [(pk, score) for pk, score in zip(ids[order].tolist(), scores[order].tolist()) if score >= min_score]
+
+
+similarity_index = SimilarityIndex()
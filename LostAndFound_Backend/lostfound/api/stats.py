@@ -0,0 +1,136 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Lower, TruncDate
+from django.utils import timezone
+
+from .cache import STATS_SCOPE, response_cache
+from .models import ArchivedItem, ItemDailyCount, LostFoundItem
+
+# Set while archive_items deletes rows that move to ArchivedItem and go on counting
+_archiving = ContextVar("stats_archiving", default=False)
+
+
+def apply_deltas(deltas):
+    """Add each non-zero delta to its (day, category, location) rollup row"""
+    changed = False
+    for (day, category, location), delta in deltas.items():
+        if not delta:
+            continue
+        changed = True
+        bucket = ItemDailyCount.objects.filter(day=day, category=category, location=location)
+        if bucket.update(count=F("count") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                ItemDailyCount.objects.create(day=day, category=category, location=location, count=delta)
+        except IntegrityError:
+            bucket.update(count=F("count") + delta)  # another writer created it first
+    if changed:
+        response_cache.bump(STATS_SCOPE)
+
+
+def record_items(items):
+    """Move items between rollup buckets based on their state when loaded vs. now.
+
+    Items need the bucket snapshot taken in LostFoundItem.from_db (or be new);
+    the snapshot is advanced so a second save is not counted twice.
+    """
+    deltas = Counter()
+    for item in items:
+        before = getattr(item, "_stats_bucket", None)
+        after = item.stats_bucket()
+        if before != after:
+            if before:
+                deltas[before] -= 1
+            if after:
+                deltas[after] += 1
+        item._stats_bucket = after
+    apply_deltas(deltas)
+
+
+@contextmanager
+def archiving():
+    """Rows deleted inside this block are archived, not removed: the rollups keep them"""
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def record_removed(items):
+    """Items hard-deleted from the table stop counting; archived ones still do"""
+    if _archiving.get():
+        return
+    deltas = Counter()
+    for item in items:
+        bucket = getattr(item, "_stats_bucket", None)
+        if bucket:
+            deltas[bucket] -= 1
+    apply_deltas(deltas)
+
+
+def rebuild():
+    """Recompute every rollup row from the item table and the resolved items archived out of it;
+    returns the number of buckets"""
+    rows = (
+        LostFoundItem.objects.filter(is_deleted=False)
+        .order_by()
+        .values(day=TruncDate("created_at"), category_key=Lower("category"), location_key=F("location"))
+        .annotate(count=Count("id"))
+    )
+    counts = Counter()
+    for row in rows.iterator(chunk_size=5000):
+        counts[(row["day"], row["category_key"], row["location_key"])] += row["count"]
+    archived = ArchivedItem.objects.filter(reason=ArchivedItem.REASON_RESOLVED).order_by().values_list(
+        "item_created_at", "data__fields__category", "data__fields__location"
+    )
+    for created_at, category, location in archived.iterator(chunk_size=5000):
+        counts[(timezone.localdate(created_at), category.lower(), location)] += 1
+    buckets = [
+        ItemDailyCount(day=day, category=category, location=location, count=count)
+        for (day, category, location), count in counts.items()
+    ]
+    with transaction.atomic():
+        ItemDailyCount.objects.all().delete()
+        ItemDailyCount.objects.bulk_create(buckets, batch_size=5000)
+    response_cache.bump(STATS_SCOPE)
+    return len(buckets)
+
+
+def by_category(rows):
+    """{"lost": n, "found": m, "total": n + m} from category-annotated totals"""
+    totals = {category: 0 for category, _ in LostFoundItem.CATEGORY_CHOICES}
+    for row in rows:
+        totals[row["category"]] = row["count"]
+    totals["total"] = sum(totals.values())
+    return totals
+
+
+def summary(days=30, top_locations=10):
+    """Dashboard figures summed from the rollup table; cost grows with buckets, not items"""
+    buckets = ItemDailyCount.objects.filter(count__gt=0).order_by()
+    per_category = {
+        category: Sum("count", filter=Q(category=category), default=0)
+        for category, _ in LostFoundItem.CATEGORY_CHOICES
+    }
+
+    totals = by_category(buckets.values("category").annotate(count=Sum("count")))
+    locations = (
+        buckets.values("location")
+        .annotate(total=Sum("count"), **per_category)
+        .order_by("-total", "location")[:top_locations]
+    )
+    since = timezone.localdate() - timedelta(days=days - 1)
+    daily = buckets.filter(day__gte=since).values("day").annotate(**per_category).order_by("day")
+
+    return {
+        "totals": totals,
+        "by_location": list(locations),
+        "by_day": [{**row, "day": row["day"].isoformat()} for row in daily],
+    }
@@ -0,0 +1,167 @@
+import os
+import time
+from io import BytesIO
+from uuid import uuid4
+
+import cloudinary
+import cloudinary.api
+import cloudinary.uploader
+import cloudinary.utils
+import requests
+from cloudinary.exceptions import NotFound
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .metrics import external_call
+
+UPLOAD_TOKEN_SALT = "api.storage.upload"
+
+
+def get_upload_settings():
+    options = {
+        "BACKEND": "api.storage.CloudinaryUploadStorage",
+        "TICKET_MAX_AGE": 900,
+        "PUBLIC_BASE_URL": "http://localhost:8000",
+        "MAX_BYTES": 10 * 1024 * 1024,
+    }
+    options.update(getattr(settings, "UPLOAD_STORAGE", {}))
+    return options
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class LimitedReader:
+    """File-like view of a request body that raises UploadTooLarge past max_bytes"""
+
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.remaining = max_bytes
+
+    def read(self, size=-1):
+        # One byte more than allowed tells "exactly at the limit" from "over it"
+        size = self.remaining + 1 if size is None or size < 0 else min(size, self.remaining + 1)
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise UploadTooLarge()
+        return data
+
+
+def new_upload_key(item):
+    """Storage key for a new original image; the item id prefix ties a ticket to its item"""
+    return f"items/{item.pk}/{uuid4().hex}"
+
+
+class CloudinaryUploadStorage:
+    """Images live in Cloudinary; clients POST straight to Cloudinary with signed parameters"""
+
+    def __init__(self, options):
+        self.options = options
+
+    def create_ticket(self, key, request):
+        config = cloudinary.config()
+        params = {"public_id": key, "timestamp": int(time.time())}
+        signature = cloudinary.utils.api_sign_request(params, config.api_secret)
+        return {
+            "key": key,
+            "method": "POST",
+            "upload_url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/image/upload",
+            "fields": {**params, "api_key": config.api_key, "signature": signature},
+            "expires_in": self.options["TICKET_MAX_AGE"],
+        }
+
+    def exists(self, key):
+        with external_call("cloudinary", "resource"):
+            try:
+                cloudinary.api.resource(key)
+            except NotFound:
+                return False
+        return True
+
+    def save(self, key, data):
+        if isinstance(data, bytes):
+            data = BytesIO(data)
+        with external_call("cloudinary", "upload"):
+            result = cloudinary.uploader.upload(data, public_id=key, resource_type="image", overwrite=True)
+        return result["secure_url"]
+
+    def open(self, key):
+        with external_call("cloudinary", "download"):
+            response = requests.get(self.url(key), timeout=30)
+            response.raise_for_status()
+        return response.content
+
+    def url(self, key):
+        return cloudinary.CloudinaryImage(key).build_url(secure=True)
+
+
+class LocalUploadStorage:
+    """Local-filesystem stand-in: files under MEDIA_ROOT, uploaded with a signed PUT to this API"""
+
+    def __init__(self, options):
+        self.options = options
+        self.root = settings.MEDIA_ROOT
+
+    def path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def create_ticket(self, key, request):
+        token = signing.dumps({"key": key}, salt=UPLOAD_TOKEN_SALT)
+        return {
+            "key": key,
+            "method": "PUT",
+            "upload_url": request.build_absolute_uri(reverse("direct-upload", args=[token])),
+            "fields": {},
+            "expires_in": self.options["TICKET_MAX_AGE"],
+        }
+
+    def read_ticket(self, token):
+        """Key a signed upload token was issued for, or None if forged/expired"""
+        try:
+            return signing.loads(token, salt=UPLOAD_TOKEN_SALT, max_age=self.options["TICKET_MAX_AGE"])["key"]
+        except signing.BadSignature:
+            return None
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def save(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path, "wb") as f:
+                if isinstance(data, bytes):
+                    f.write(data)
+                else:
+                    for chunk in iter(lambda: data.read(64 * 1024), b""):
+                        f.write(chunk)
+        except BaseException:
+            os.remove(path)  # never leave a partial upload behind
+            raise
+        return self.url(key)
+
+    def open(self, key):
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def url(self, key):
+        return f"{self.options['PUBLIC_BASE_URL'].rstrip('/')}{settings.MEDIA_URL}{key}"
+
+
+_storage = None
+
+
+def get_storage():
+    """The configured upload storage backend (UPLOAD_STORAGE['BACKEND'])"""
+    global _storage
+    if _storage is None:
+        options = get_upload_settings()
+        _storage = import_string(options["BACKEND"])(options)
+    return _storage
@@ -1,3 +1,1398 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.client import encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
+from . import stats
+from .authentication import user_cache
+from .archive import archive_candidates, archive_items, restore_items
+from .locations import location_dictionary
+from .logs import JSONLineFormatter, QueuedLogHandler
+from .geo import EARTH_RADIUS_KM, decode_bounds, distance_expression, encode, filter_nearby
+from .matching import find_duplicate, item_shingles, jaccard, match_recipients
+from .metrics import (
+    LOG_RECORDS_DROPPED, RESPONSE_CACHE_HITS, RESPONSE_CACHE_MISSES, RESPONSE_CACHE_NOT_MODIFIED,
+    ProcessFile, Registry, registry,
+)
+from .models import ItemDailyCount, ItemSignatureBand, Location, LostFoundItem, NotificationDelivery, NotificationJob, UserProfile
+from . import notifications
+from .notifications import close_smtp_connection, run_pending_jobs
+from .passwords import get_hashing_pool
+from .search import search_index
+from .signals import drop_from_search_index
+from .serializers import ContactReporterSerializer, LostFoundItemSerializer, RegisterSerializer
+from .similarity import SimilarityIndex, similarity_index, term_counts, tf
+from benchmarks.smtp_sink import SMTPSink
+from .storage import LocalUploadStorage, get_upload_settings
+from .uploads import _run as run_upload_task
+from .uploads import recover_stale_uploads
+from .throttling import SLIDING_WINDOW, SharedMemoryStore, get_store, get_store_settings, sliding_window, token_bucket
+from .views import CustomTokenObtainPairSerializer, async_update_reported_item, async_upload_complete
+
+
+CENTER = (12.9716, 77.5946)  # a point fixtures are placed around
+
+
+_throttle_store = []
+
+
+def setUpModule():
+    """Throttle state goes to a file of this run's own, not the host's shared table"""
+    directory = tempfile.TemporaryDirectory()
+    store = override_settings(THROTTLE_STORE={
+        "BACKEND": "api.throttling.SharedMemoryStore", "LOCATION": os.path.join(directory.name, "throttle"), "SLOTS": 4096,
+    })
+    store.enable()
+    _throttle_store.extend([store, directory])
+
+
+def tearDownModule():
+    store, directory = _throttle_store
+    store.disable()
+    directory.cleanup()
+
+
+def hit_from_another_process(key, limit):
+    store = SharedMemoryStore(get_store_settings())
+    if not all(store.hit(key, limit, 60)[0] for _ in range(limit)):
+        raise SystemExit(1)
+
+
+def make_user(username):
+    return UserProfile.objects.create(username=username, email=f"{username}@example.com")
+
+
+def make_item(user=None, **fields):
+    values = {"title": "Black leather wallet", "description": "Lost near the main entrance",
+              "category": "lost", "location": "Library"}
+    values.update(fields)
+    return LostFoundItem.objects.create(user=user, **values)
+
+
+class APITestCase(TestCase):
+    """Request-level tests: throttle counts, cached responses and users, the in-process indexes and
+    the worker's SMTP connection outlive each test's rolled-back rows, so every test starts them empty"""
+
+    def setUp(self):
+        get_store().clear()
+        cache.clear()
+        user_cache.clear()
+        for index in (search_index, similarity_index, location_dictionary):
+            index.clear()
+        close_smtp_connection()
+        self.client = APIClient()
+
+
+class ItemFoundNotificationTests(TestCase):
+    def setUp(self):
+        self.user = make_user("reporter")
+        self.item = make_item(self.user)
+
+    def test_marking_found_queues_job_once_committed(self):
+        serializer = LostFoundItemSerializer(self.item, data={"category": "found"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            serializer.save()
+            self.assertFalse(NotificationJob.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+        job = NotificationJob.objects.get()
+        self.assertEqual(job.item.category, "found")
+
+    def test_other_edits_queue_nothing(self):
+        serializer = LostFoundItemSerializer(self.item, data={"title": "Brown wallet"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        self.assertFalse(NotificationJob.objects.exists())
+
+    def test_only_reporters_of_similar_lost_items_are_emailed(self):
+        finder = make_user("finder")
+        make_item(finder, title="Black leather wallet", description="Lost my own wallet near the entrance")
+        make_item(make_user("bob"), title="Red umbrella", description="Broken handle, left on the bus")
+        make_item(None, contact_email="guest@example.com", title="Black wallet", description="Leather, lost near the entrance")
+        make_item(make_user("carol"), title="Black leather wallet", description="Lost near the main entrance", is_deleted=True)
+        found = make_item(finder, category="found", title="Black leather wallet", description="Found near the main entrance")
+
+        self.assertEqual(sorted(match_recipients(found)), ["guest@example.com", "reporter@example.com"])
+
+        close_smtp_connection()  # deliver through this test's locmem backend
+        self.addCleanup(close_smtp_connection)
+        NotificationJob.objects.create(kind=NotificationJob.KIND_ITEM_FOUND, item=found)
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(sorted(to for message in mail.outbox for to in message.to), ["guest@example.com", "reporter@example.com"])
+
+
+class RegisterConflictTests(APITestCase):
+    def register(self, **fields):
+        return self.client.post("/api/auth/register/", {"password": "s3cret-pass", **fields}, format="json")
+
+    def test_case_insensitive_conflicts_are_rejected_up_front(self):
+        make_user("alice")
+        response = self.register(username="ALICE", email="Alice@Example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"username", "email"})
+
+    def test_single_query_check_agrees_with_per_field_lookups(self):
+        UserProfile.objects.create(username="Alice", email="Alice@Example.com")
+        UserProfile.objects.create(username="bob", email="bob@example.com")
+        probes = [("ALICE", "new@example.com"), ("carol", "alice@example.COM"), ("alice", "BOB@example.com"),
+                  ("Bob", "bob@EXAMPLE.com"), ("carol", "carol@example.com")]
+        for username, email in probes:
+            expected = {field for field, taken in (
+                ("username", UserProfile.objects.filter(username__iexact=username).exists()),
+                ("email", UserProfile.objects.filter(email__iexact=email).exists()),
+            ) if taken}
+            serializer = RegisterSerializer(data={"username": username, "email": email, "password": "s3cret-pass"})
+            with self.assertNumQueries(1) as captured:
+                serializer.is_valid()
+            self.assertEqual(set(serializer.errors), expected, (username, email))
+            sql = captured.captured_queries[0]["sql"]
+            self.assertEqual(full_scans(explain(sql), UserProfile._meta.db_table), [], sql)
+
+    def test_conflicts_racing_past_validation_map_to_fields(self):
+        make_user("alice")
+        # Another request commits the same name between validate() and the INSERT
+        with mock.patch.object(RegisterSerializer, "validate", lambda self, data: data):
+            by_username = self.register(username="alice", email="other@example.com")
+            by_email = self.register(username="bob", email="alice@example.com")
+        self.assertEqual(by_username.status_code, 400)
+        self.assertEqual(list(by_username.data), ["username"])
+        self.assertEqual(by_email.status_code, 400)
+        self.assertEqual(list(by_email.data), ["email"])
+
+
+class SearchTests(APITestCase):
+    def search(self, **params):
+        response = self.client.get("/api/items/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_title_hits_rank_above_description_hits(self):
+        mention = make_item(title="Blue bag", description="an umbrella strapped to it")
+        titled = make_item(title="Blue umbrella", description="folding, wooden handle")
+        make_item(title="Black wallet")
+        data = self.search(search="umbrella")
+        self.assertEqual([row["id"] for row in data["results"]], [titled.pk, mention.pk])
+        self.assertEqual(data["count"], 2)
+
+    def test_search_within_radius_counts_and_pages_only_nearby_hits(self):
+        near = [make_item(title=f"Blue umbrella {n}", latitude=CENTER[0], longitude=CENTER[1] + n * 0.001) for n in range(3)]
+        for n in range(4):  # better ranked (title says it twice) but ~50 km away
+            make_item(title=f"Umbrella umbrella {n}", latitude=CENTER[0] + 0.5, longitude=CENTER[1])
+        params = {"search": "umbrella", "near": f"{CENTER[0]},{CENTER[1]}", "radius": 2, "page_size": 2}
+
+        first = self.search(**params)
+        second = self.search(**params, page=2)
+        self.assertEqual(first["count"], 3)
+        self.assertEqual(len(first["results"]), 2)
+        self.assertEqual(len(second["results"]), 1)
+        self.assertIsNone(second["next"])
+        self.assertEqual(
+            {row["id"] for row in first["results"] + second["results"]}, {item.pk for item in near}
+        )
+
+
+class LoginTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("walker")
+
+    def login(self):
+        return self.client.post("/api/auth/login/", {"username": "walker", "password": "s3cret-pass"}, format="json")
+
+    def test_saturated_hashing_slots_shed_logins_with_429(self):
+        _, slots = get_hashing_pool()
+        while slots.acquire(blocking=False):
+            self.addCleanup(slots.release)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=2000)
+    def test_login_upgrades_a_hash_made_with_fewer_iterations(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.user.set_password("s3cret-pass")
+            self.user.save()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertEqual(self.login().status_code, 200)
+
+
+class BulkItemTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = make_user("alice"), make_user("bob")
+        self.client.force_authenticate(self.bob)
+
+    def row(self, **fields):
+        return {"title": "Grey backpack", "description": "Left in the lecture hall", "category": "lost",
+                "location": "Library", **fields}
+
+    def send(self, method, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)("/api/items/bulk/", body, format="json")
+
+    def test_valid_rows_are_kept_and_bad_rows_reported_with_207(self):
+        response = self.send("post", {"items": [self.row(), self.row(title=""), "not a row", self.row(title="Red cap")]})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([row["index"] for row in response.data["results"]], [0, 3])
+        self.assertEqual([row["index"] for row in response.data["errors"]], [1, 2])
+        self.assertIn("title", response.data["errors"][0]["errors"])
+        self.assertEqual(LostFoundItem.objects.filter(user=self.bob).count(), 2)
+
+    def test_batches_without_a_valid_row_are_a_400(self):
+        for body in ({"items": [self.row(category="stolen")]}, {"items": []}, {"items": "x"}, []):
+            self.assertEqual(self.send("post", body).status_code, 400, body)
+        self.assertFalse(LostFoundItem.objects.exists())
+
+    @override_settings(BULK_MAX_ITEMS=2)
+    def test_batches_over_the_limit_are_refused_whole(self):
+        response = self.send("post", [self.row(), self.row(), self.row()])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(LostFoundItem.objects.exists())
+        self.assertEqual(self.send("delete", {"ids": [1, 2, 3]}).status_code, 400)
+
+    def test_updates_and_deletes_only_touch_the_callers_items(self):
+        theirs, mine = make_item(self.alice), make_item(self.bob)
+        response = self.send("patch", [{"id": theirs.pk, "title": "Mine now"}, {"id": [mine.pk]}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["errors"], {"id": ["Item not found."]})
+
+        response = self.send("patch", [{"id": theirs.pk, "title": "Mine now"}, {"id": mine.pk, "category": "found"}])
+        self.assertEqual(response.status_code, 207)
+        theirs.refresh_from_db()
+        mine.refresh_from_db()
+        self.assertEqual((theirs.title, mine.category), ("Black leather wallet", "found"))
+        self.assertIsNotNone(mine.resolved_at)
+
+        response = self.send("delete", {"ids": [theirs.pk, mine.pk, {"id": 1}]})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data["results"], [{"id": mine.pk}])
+        self.assertEqual([row["index"] for row in response.data["errors"]], [0, 2])
+        self.assertEqual(
+            dict(LostFoundItem.objects.values_list("pk", "is_deleted")), {theirs.pk: False, mine.pk: True}
+        )
+
+    def test_indexes_and_cache_follow_the_batch_once_it_commits(self):
+        search_index.sync()
+        self.assertEqual(self.client.get("/api/items/").json()["results"], [])
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post("/api/items/bulk/", [self.row()], format="json")
+        pk = response.data["results"][0]["id"]
+        self.assertNotIn(pk, search_index._documents)
+        self.assertFalse(ItemSignatureBand.objects.filter(item_id=pk).exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertIn(pk, search_index._documents)
+        self.assertTrue(ItemSignatureBand.objects.filter(item_id=pk).exists())
+        self.assertEqual([row["id"] for row in self.client.get("/api/items/").json()["results"]], [pk])
+
+        self.send("delete", [pk])
+        self.assertNotIn(pk, search_index._documents)
+        self.assertFalse(ItemSignatureBand.objects.filter(item_id=pk).exists())
+        self.assertEqual(self.client.get("/api/items/").json()["results"], [])
+
+
+class NearbyTests(APITestCase):
+    KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180  # along a meridian
+
+    def nearby(self, latitude, longitude, radius):
+        response = self.client.get("/api/items/", {"near": f"{latitude},{longitude}", "radius": radius, "page_size": 100})
+        self.assertEqual(response.status_code, 200)
+        return {row["id"] for row in response.json()["results"]}
+
+    def test_items_across_a_cell_boundary_are_found(self):
+        (_, north), _ = decode_bounds(encode(*CENTER, precision=5))  # the cell a 1 km search uses
+        step = 0.2 / self.KM_PER_DEGREE
+        inside = make_item(latitude=north - step, longitude=CENTER[1])
+        across = make_item(title="Blue umbrella", latitude=north + step, longitude=CENTER[1])
+        self.assertNotEqual(inside.geohash[:5], across.geohash[:5])
+        self.assertEqual(self.nearby(north - step, CENTER[1], 1), {inside.pk, across.pk})
+        self.assertEqual(self.nearby(north + step, CENTER[1], 1), {inside.pk, across.pk})
+
+    def test_radius_is_the_great_circle_distance(self):
+        latitude, longitude = CENTER
+        inside = make_item(latitude=latitude + 0.95 / self.KM_PER_DEGREE, longitude=longitude)
+        make_item(title="Blue umbrella", latitude=latitude - 1.05 / self.KM_PER_DEGREE, longitude=longitude)
+        make_item(title="Red cap")  # no coordinates
+        self.assertEqual(self.nearby(latitude, longitude, 1), {inside.pk})
+        self.assertEqual(len(self.nearby(latitude, longitude, 1.1)), 2)
+
+    def test_geohash_ranges_return_what_a_full_distance_scan_does(self):
+        rng = random.Random(12)
+        for _ in range(200):
+            make_item(latitude=CENTER[0] + rng.uniform(-0.1, 0.1), longitude=CENTER[1] + rng.uniform(-0.1, 0.1))
+        live = LostFoundItem.objects.filter(is_deleted=False)
+        for radius in (0.3, 1, 5, 20):
+            for _ in range(5):
+                latitude, longitude = CENTER[0] + rng.uniform(-0.1, 0.1), CENTER[1] + rng.uniform(-0.1, 0.1)
+                scanned = live.alias(distance_km=distance_expression(latitude, longitude)).filter(distance_km__lte=radius)
+                self.assertEqual(
+                    set(filter_nearby(live, f"{latitude},{longitude}", radius).values_list("pk", flat=True)),
+                    set(scanned.values_list("pk", flat=True)),
+                    (latitude, longitude, radius),
+                )
+
+    def test_invalid_near_or_radius_is_a_400(self):
+        for params in (
+            {"near": "12.97"}, {"near": "north,east"}, {"near": "12.97,77.59,1"}, {"near": "91,0"},
+            {"near": "0,181"}, {"near": "12.97,77.59", "radius": "0"}, {"near": "12.97,77.59", "radius": "51"},
+            {"near": "12.97,77.59", "radius": "far"},
+        ):
+            response = self.client.get("/api/items/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class FeedPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = [make_item(title=f"Wallet {number}") for number in range(7)]
+        # Bulk imports and fast clients give many rows the same created_at
+        tied = timezone.now() - timedelta(hours=1)
+        LostFoundItem.objects.filter(pk__in=[item.pk for item in self.items[1:6]]).update(created_at=tied)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row["id"] for row in response.json()["results"])
+            url = response.json()["next"]
+        return ids
+
+    def test_next_links_walk_every_item_once_in_a_stable_order(self):
+        expected = list(LostFoundItem.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+        self.assertEqual(self.walk("/api/items/?page_size=2"), expected)
+        self.assertEqual(self.walk("/api/items/?page_size=3"), expected)  # ties split across other pages
+
+    def test_next_link_keeps_the_other_query_parameters(self):
+        url = self.client.get("/api/items/?page_size=2&category=lost").json()["next"]
+        self.assertIn("page_size=2", url)
+        self.assertIn("category=lost", url)
+        self.assertIn("cursor=", url)
+
+    def test_malformed_cursor_is_a_400(self):
+        def encoded(text):
+            return base64.urlsafe_b64encode(text.encode()).decode()
+
+        for cursor in (
+            "not-base64!", encoded("yesterday|1"), encoded("2024-01-01T00:00:00+00:00"),
+            encoded("2024-01-01T00:00:00+00:00|x"), encoded("2024-01-01T00:00:00|1"),
+            encoded(f"2024-01-01T00:00:00+00:00|{2 ** 70}"), "w6k=",
+        ):
+            response = self.client.get("/api/items/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_page_parameter_falls_back_to_numbered_pages(self):
+        body = self.client.get("/api/items/?page=2&page_size=3").json()
+        self.assertEqual(body["count"], 7)
+        expected = list(LostFoundItem.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+        self.assertEqual([row["id"] for row in body["results"]], expected[3:6])
+        self.assertIn("page=3", body["next"])
+        self.assertIsNotNone(body["previous"])
+        self.assertEqual(self.client.get("/api/items/?page=9").status_code, 404)
+
+
+class AuthCacheTests(APITestCase):
+    """Cached users serve requests for AUTH_USER_CACHE_TTL, but local writes must not wait for it"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("walker")
+
+    def profile(self, token):
+        return self.client.get("/api/user/profile/", headers={"Authorization": f"Bearer {token}"})
+
+    def assertRefused(self, response, detail):
+        # SessionAuthentication is listed first, so DRF answers a failed login with 403, not 401
+        self.assertEqual((response.status_code, str(response.data["detail"])), (403, detail))
+
+    def token(self):
+        return CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def test_revoked_tokens_are_refused_at_once(self):
+        old = self.token()
+        self.assertEqual(self.profile(old).status_code, 200)
+        self.assertEqual(self.profile(old).status_code, 200)  # now from the cache
+        self.user.revoke_tokens()
+        self.assertRefused(self.profile(old), "Token has been revoked.")
+        self.assertEqual(self.profile(self.token()).status_code, 200)
+
+    def test_deleted_and_deactivated_users_are_refused_at_once(self):
+        token = self.token()
+        self.assertEqual(self.profile(token).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertRefused(self.profile(token), "User is inactive")
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.profile(token).status_code, 200)
+        self.user.delete()
+        self.assertRefused(self.profile(token), "User not found")
+
+
+class ThrottleTests(APITestCase):
+    def test_token_bucket_allows_a_burst_then_refills_steadily(self):
+        state = None
+        for _ in range(2):
+            allowed, _, state = token_bucket(state, 100.0, 2, 10)
+            self.assertTrue(allowed)
+        allowed, wait, state = token_bucket(state, 100.0, 2, 10)
+        self.assertEqual((allowed, wait), (False, 5.0))
+        allowed, _, state = token_bucket(state, 105.0, 2, 10)
+        self.assertTrue(allowed)
+        self.assertFalse(token_bucket(state, 105.0, 2, 10)[0])
+
+    def test_sliding_window_weighs_the_previous_window(self):
+        state = None
+        for _ in range(4):
+            allowed, _, state = sliding_window(state, 101.0, 4, 10)
+            self.assertTrue(allowed)
+        self.assertEqual(sliding_window(state, 101.0, 4, 10)[:2], (False, 9.0))
+
+        # Halfway through the next window the previous 4 requests still weigh 2
+        for _ in range(2):
+            allowed, _, state = sliding_window(state, 115.0, 4, 10)
+            self.assertTrue(allowed)
+        self.assertEqual(sliding_window(state, 115.0, 4, 10)[:2], (False, 2.5))
+        self.assertTrue(sliding_window(state, 117.5, 4, 10)[0])
+
+        store = get_store()
+        self.assertEqual([store.hit("ip:1", 1, 60, SLIDING_WINDOW)[0] for _ in range(2)], [True, False])
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_login_scope_answers_429_after_its_rate(self):
+        body = {"username": "nobody", "password": "wrong"}
+        statuses = [self.client.post("/api/auth/login/", body, format="json").status_code for _ in range(6)]
+        self.assertEqual(statuses, [401] * 5 + [429])
+
+    def test_worker_processes_share_one_table(self):
+        worker = multiprocessing.get_context("fork").Process(target=hit_from_another_process, args=("user:7", 3))
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        self.assertFalse(get_store().hit("user:7", 3, 60)[0])  # the other process spent the bucket
+        self.assertTrue(get_store().hit("user:8", 3, 60)[0])
+
+
+class DuplicateReportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = make_user("alice"), make_user("bob")
+
+    def report(self, user):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/items/", {
+                "title": "Black leather wallet", "description": "Found near the main entrance",
+                "category": "found", "location": "Library",
+            }, format="json")
+        self.assertIn(response.status_code, (200, 201))
+        return response
+
+    def notified(self):
+        return list(NotificationJob.objects.filter(kind=NotificationJob.KIND_ITEM_FOUND).values_list("item_id", flat=True))
+
+    def test_own_repeat_is_flagged_and_not_announced_again(self):
+        first = self.report(self.alice).data["id"]
+        repeat = LostFoundItem.objects.get(pk=self.report(self.alice).data["id"])
+        self.assertEqual(repeat.duplicate_of_id, first)
+        self.assertEqual(self.notified(), [first])
+
+    def test_band_probe_finds_what_a_pairwise_scan_finds(self):
+        reports = [
+            ("Black leather wallet", "Found near the main entrance with two cards"),
+            ("Black leather wallet", "Found in the reading room, no cards inside"),
+            ("Blue umbrella", "Folded umbrella left under a study desk"),
+            ("Silver bicycle key", "Small key on a red ring by the stairs"),
+            ("Grey wool scarf", "Long striped scarf hanging on a chair"),
+        ]
+        originals = [make_item(self.alice, category="found", title=title, description=description)
+                     for title, description in reports]
+        min_similarity = getattr(settings, "DEDUP_MIN_SIMILARITY", 0.6)
+
+        def pairwise(item):
+            shingles = item_shingles(item.title, item.description)
+            scored = [(jaccard(shingles, item_shingles(other.title, other.description)), other) for other in originals]
+            score, best = max(scored, key=lambda pair: pair[0])
+            return best if score >= min_similarity else None
+
+        for original in originals:
+            # The same object reported again by someone else, reworded slightly
+            repeat = LostFoundItem(user=self.bob, category="found", location="Library", title=original.title,
+                                   description=f"{original.description} please help")
+            self.assertEqual(pairwise(repeat), original)
+            self.assertEqual(find_duplicate(repeat), original)
+        unrelated = LostFoundItem(user=self.bob, category="found", location="Library", title="Black phone charger",
+                                  description="White cable left by the printers")
+        self.assertIsNone(pairwise(unrelated))
+        self.assertIsNone(find_duplicate(unrelated))
+
+    @override_settings(DEDUP_ACTION="merge")
+    def test_own_repeat_is_merged(self):
+        first = self.report(self.alice).data["id"]
+        response = self.report(self.alice)
+        self.assertEqual((response.status_code, response.data["id"]), (200, first))
+        self.assertEqual(LostFoundItem.objects.count(), 1)
+
+    @override_settings(DEDUP_ACTION="merge")
+    def test_another_reporter_at_the_same_place_gets_their_own_item(self):
+        first = self.report(self.alice).data["id"]
+        response = self.report(self.bob)
+        self.assertEqual(response.status_code, 201)
+        second = LostFoundItem.objects.get(pk=response.data["id"])
+        self.assertEqual((second.user_id, second.duplicate_of_id), (self.bob.pk, first))
+        self.assertEqual(self.notified(), [first, second.pk])
+
+
+class ContactReporterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.sink = SMTPSink(port=0)
+        self.sink.start()
+        self.addCleanup(self.sink.server_close)
+        self.addCleanup(self.sink.shutdown)
+        host, port = self.sink.server_address
+        smtp = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=host, EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+        )
+        smtp.enable()
+        self.addCleanup(smtp.disable)
+        self.addCleanup(close_smtp_connection)  # before the sink shuts down
+
+        self.client.force_authenticate(make_user("finder"))
+        self.item = make_item(make_user("owner"))
+
+    def contact(self, **data):
+        body = {"item_id": self.item.pk, "mail": "owner@example.com", "message": "I think I found your wallet."}
+        body.update(data)
+        return self.client.post("/api/contact-reporter/", body, format="json")
+
+    def test_message_is_stored_then_delivered_by_the_worker(self):
+        response = self.contact()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sink.messages, [])  # nothing sent on the request path
+
+        job = NotificationJob.objects.get(kind=NotificationJob.KIND_CONTACT_REPORTER)
+        self.assertEqual(job.item, self.item)
+        self.assertEqual(run_pending_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, NotificationJob.STATUS_DONE)
+        self.assertEqual(len(self.sink.messages), 1)
+        message = self.sink.messages[0]
+        self.assertEqual(message["to"], ["owner@example.com"])
+        self.assertIn(b"I think I found your wallet.", message["data"])
+        self.assertIn(b"text/html", message["data"])
+
+    def test_failed_delivery_stays_queued_for_retry(self):
+        self.contact()
+        with override_settings(EMAIL_PORT=1):  # nothing listening
+            run_pending_jobs()
+        job = NotificationJob.objects.get()
+        self.assertEqual(job.status, NotificationJob.STATUS_PENDING)
+        self.assertEqual(self.sink.messages, [])
+
+        job.available_at = job.created_at
+        job.save(update_fields=["available_at"])
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, NotificationJob.STATUS_DONE)
+        self.assertEqual(NotificationDelivery.objects.get().status, NotificationDelivery.STATUS_SENT)
+        self.assertEqual(len(self.sink.messages), 1)
+
+    def test_worker_reuses_its_connection_until_the_server_drops_it(self):
+        self.contact()
+        self.contact(message="Is this yours?")
+        self.assertEqual(run_pending_jobs(), 2)
+        self.assertEqual((len(self.sink.messages), self.sink.sessions), (2, 1))
+
+        notifications._smtp.connection.close()  # as if the server timed the idle connection out
+        self.contact(message="Still there?")
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual((len(self.sink.messages), self.sink.sessions), (3, 2))
+        self.assertEqual(set(NotificationDelivery.objects.values_list("status", flat=True)), {"sent"})
+
+    def test_invalid_request_is_rejected(self):
+        response = self.contact(item_id=self.item.pk + 1000)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(NotificationJob.objects.exists())
+
+
+class AsyncItemUpdateTests(APITestCase):
+    """The ASGI update endpoint takes the same bodies DRF's parsers do"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("owner")
+        self.item = make_item(self.user)
+        self.factory = AsyncRequestFactory()
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def patch(self, body, content_type):
+        request = self.factory.patch(
+            f"/api/items/{self.item.pk}/update-delete/", body, content_type=content_type, headers=self.headers
+        )
+        return await async_update_reported_item(request, item_id=self.item.pk)
+
+    async def test_form_bodies_are_parsed(self):
+        response = await self.patch("title=Brown+wallet", "application/x-www-form-urlencoded")
+        self.assertEqual(response.status_code, 200)
+        await self.item.arefresh_from_db()
+        self.assertEqual(self.item.title, "Brown wallet")
+
+    async def test_multipart_bodies_keep_their_files(self):
+        png = io.BytesIO()
+        Image.new("RGB", (4, 4)).save(png, "PNG")
+        photo = SimpleUploadedFile("wallet.png", png.getvalue(), content_type="image/png")
+        body = encode_multipart("BoUnDaRy", {"title": "Brown wallet", "image": photo})
+        with mock.patch("api.serializers.stage_uploaded_file") as stage:
+            response = await self.patch(body, "multipart/form-data; boundary=BoUnDaRy")
+        self.assertEqual(response.status_code, 200)
+        await self.item.arefresh_from_db()
+        self.assertEqual(self.item.title, "Brown wallet")
+        self.assertEqual(stage.call_args.args[1].name, "wallet.png")
+
+    async def test_other_bodies_are_refused(self):
+        response = await self.patch("title=Brown wallet", "text/plain")
+        self.assertEqual(response.status_code, 415)
+
+
+class DirectUploadTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        with override_settings(MEDIA_ROOT=media.name):
+            self.storage = LocalUploadStorage({**get_upload_settings(), "MAX_BYTES": 1024})
+        patcher = mock.patch("api.storage._storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        limit = override_settings(UPLOAD_STORAGE={**get_upload_settings(), "MAX_BYTES": 1024})
+        limit.enable()
+        self.addCleanup(limit.disable)
+
+        self.user = make_user("uploader")
+        self.client.force_authenticate(self.user)
+        self.item = make_item(self.user)
+        self.other = make_item(self.user, title="Blue umbrella")
+
+    def ticket(self, item):
+        return self.client.post(f"/api/items/{item.pk}/upload-ticket/").json()
+
+    def test_key_outside_the_item_prefix_is_rejected(self):
+        ticket = self.ticket(self.other)
+        self.storage.save(ticket["key"], b"image bytes")
+        sneaky = ticket["key"].replace(f"items/{self.other.pk}/", f"items/{self.item.pk}/../{self.other.pk}/")
+        for key in (sneaky, ticket["key"]):
+            response = self.client.post(f"/api/items/{self.item.pk}/upload-complete/", {"key": key}, format="json")
+            self.assertEqual(response.status_code, 400, key)
+
+    def test_async_view_answers_like_the_sync_view(self):
+        stored = self.ticket(self.item)["key"]
+        self.storage.save(stored, b"image bytes")
+        missing = self.ticket(self.item)["key"]
+        foreign = self.ticket(self.other)["key"].replace(f"items/{self.other.pk}/", f"items/{self.item.pk}/../{self.other.pk}/")
+        path = f"/api/items/{self.item.pk}/upload-complete/"
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        scheduled = []
+        for key in (stored, missing, foreign):
+            with mock.patch("api.views.process_direct_upload") as sync_process:
+                expected = self.client.post(path, {"key": key}, format="json")
+            request = AsyncRequestFactory().post(path, json.dumps({"key": key}), content_type="application/json",
+                                                 headers=headers)
+            with mock.patch("api.views.process_direct_upload") as async_process:
+                response = async_to_sync(async_upload_complete)(request, pk=self.item.pk)
+            self.assertEqual(response.status_code, expected.status_code, key)
+            self.assertEqual(json.loads(response.content), expected.json(), key)
+            self.assertEqual(async_process.call_args, sync_process.call_args, key)
+            scheduled.append(async_process.call_args)
+        self.assertEqual(scheduled, [mock.call(self.item, stored), None, None])
+
+    def test_body_over_the_limit_is_refused_and_not_kept(self):
+        ticket = self.ticket(self.item)
+        response = self.client.put(ticket["upload_url"], b"x" * 2048, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(self.storage.exists(ticket["key"]))
+
+        response = self.client.put(ticket["upload_url"], b"x" * 1024, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(self.storage.exists(ticket["key"]))
+
+    def test_body_longer_than_its_content_length_is_refused(self):
+        ticket = self.ticket(self.item)
+        with mock.patch("api.views.check_direct_upload", return_value=(ticket["key"], None)):
+            response = self.client.put(ticket["upload_url"], b"x" * 2048, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(self.storage.exists(ticket["key"]))
+
+    def test_background_failure_is_recorded_on_the_item(self):
+        def broken(item_id, key):
+            raise OSError("cannot identify image file")
+
+        with self.assertLogs("api.uploads", "ERROR"):
+            run_upload_task(broken, self.item.pk, "items/1/abc")
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.image_status, LostFoundItem.IMAGE_FAILED)
+        self.assertEqual(self.item.image_error, "cannot identify image file")
+        response = self.client.get(f"/api/items/{self.item.pk}/")
+        self.assertEqual(response.json()["image_status"], "failed")
+
+    def test_report_with_a_photo_is_inserted_as_processing_in_one_write(self):
+        png = io.BytesIO()
+        Image.new("RGB", (4, 4)).save(png, "PNG")
+        photo = SimpleUploadedFile("wallet.png", png.getvalue(), content_type="image/png")
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        with CaptureQueriesContext(connection) as queries, mock.patch("api.uploads.get_executor"), \
+                override_settings(UPLOAD_SPOOL_DIR=spool.name):
+            response = self.client.post("/api/items/", {
+                "title": "Red wallet", "description": "Left on a bench", "category": "lost",
+                "location": "Library", "image": photo,
+            }, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(LostFoundItem.objects.get(pk=response.data["id"]).image_status, LostFoundItem.IMAGE_PROCESSING)
+        writes = [q["sql"] for q in queries if 'UPDATE "api_lostfounditem"' in q["sql"]]
+        self.assertEqual(writes, [])
+        self.assertNotIn("image_key", response.data)
+        self.assertNotIn("image_queued_at", response.data)
+
+    def test_sweep_reruns_stored_originals_and_fails_lost_ones(self):
+        stale = timezone.now() - timedelta(hours=1)
+        key = f"items/{self.item.pk}/original"
+        self.storage.save(key, b"image bytes")
+        LostFoundItem.objects.filter(pk=self.item.pk).update(
+            image_status=LostFoundItem.IMAGE_PROCESSING, image_key=key, image_queued_at=stale
+        )
+        LostFoundItem.objects.filter(pk=self.other.pk).update(
+            image_status=LostFoundItem.IMAGE_PROCESSING, image_queued_at=stale
+        )
+        fresh = make_item(self.user, title="Green scarf", image_status=LostFoundItem.IMAGE_PROCESSING,
+                          image_queued_at=timezone.now())
+
+        with mock.patch("api.uploads.attach_image") as attach, self.assertLogs("api.uploads", "WARNING"):
+            self.assertEqual(recover_stale_uploads(), 2)
+        attach.assert_called_once_with(self.item.pk, key)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.image_status, LostFoundItem.IMAGE_FAILED)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.image_status, LostFoundItem.IMAGE_PROCESSING)
+        self.assertEqual(recover_stale_uploads(), 0)  # the re-run item was claimed afresh
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.live = make_item(title="Red scarf")
+        self.deleted = make_item(title="Green gloves")
+        self.deleted.is_deleted = True
+        self.deleted.save()
+
+    def export(self, **params):
+        response = self.client.get("/api/items/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_full_export_has_live_items_only(self):
+        self.assertEqual([row["id"] for row in self.export()], [self.live.pk])
+
+    def test_since_export_carries_tombstones_for_soft_deletes(self):
+        rows = self.export(since=self.live.created_at.isoformat())
+        self.assertEqual([row["id"] for row in rows], [self.live.pk, self.deleted.pk])
+        self.assertEqual(rows[0]["title"], "Red scarf")
+        self.assertEqual(set(rows[1]), {"id", "is_deleted", "updated_at"})
+        self.assertTrue(rows[1]["is_deleted"])
+
+        # The feed resumes from the last row's updated_at
+        self.assertEqual(self.export(since=rows[-1]["updated_at"]), [])
+
+    def test_since_export_carries_tombstones_for_archived_items(self):
+        since = timezone.now().isoformat()
+        archive_items([self.deleted])
+        rows = self.export(since=since)
+        self.assertEqual([(row["id"], row["is_deleted"]) for row in rows], [(self.deleted.pk, True)])
+
+
+class ArchiveTests(APITestCase):
+    def age(self, *items, days=400):
+        LostFoundItem.objects.filter(pk__in=[item.pk for item in items]).update(
+            updated_at=timezone.now() - timedelta(days=days)
+        )
+
+    def test_unclaimed_found_reports_are_not_resolved(self):
+        waiting = make_item(category="found")
+        returned = make_item(category="lost")
+        serializer = LostFoundItemSerializer(returned, data={"category": "found"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.assertIsNotNone(returned.resolved_at)
+        self.age(waiting, returned)
+
+        self.assertEqual(list(archive_candidates().values_list("pk", flat=True)), [returned.pk])
+
+    def test_other_processes_drop_archived_items(self):
+        item = make_item(title="Blue umbrella")
+        kept = make_item(title="Blue umbrella", category="found")
+        search_index.sync()
+        similarity_index.sync()
+        self.assertIn(item.pk, similarity_index._row_of)
+
+        # archive_items runs in its own process, so this one's post_delete receiver never fires
+        post_delete.disconnect(drop_from_search_index, sender=LostFoundItem)
+        self.addCleanup(post_delete.connect, drop_from_search_index, sender=LostFoundItem)
+        archive_items([item])
+
+        with override_settings(SEARCH_INDEX_REFRESH_SECONDS=0, SIMILARITY_INDEX_REFRESH_SECONDS=0):
+            search_index.sync()
+            similarity_index.sync()
+        self.assertNotIn(item.pk, search_index._documents)
+        self.assertNotIn(item.pk, similarity_index._row_of)
+        self.assertIn(kept.pk, similarity_index._row_of)
+
+
+    def test_archived_resolved_items_keep_counting_in_stats(self):
+        returned = make_item(category="found", resolved_at=timezone.now())
+        withdrawn = make_item(title="Blue umbrella", is_deleted=True)
+        make_item(title="Green scarf")
+        before = stats.summary()
+        self.assertEqual(before["totals"]["total"], 2)
+
+        archive_items([returned, withdrawn])
+        self.assertEqual(stats.summary(), before)
+        stats.rebuild()
+        self.assertEqual(stats.summary(), before)
+
+        restore_items([returned.pk, withdrawn.pk])
+        self.assertEqual(stats.summary(), before)
+        LostFoundItem.objects.get(pk=returned.pk).delete()  # a real delete still stops counting
+        self.assertEqual(stats.summary()["totals"]["total"], 1)
+
+
+class StatsRollupTests(APITestCase):
+    """The rollups kept by the write paths must always equal a rebuild from the item table"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("owner")
+        self.client.force_authenticate(self.user)
+
+    def assertRollupsMatchRebuild(self):
+        def buckets():
+            return dict(
+                ((row.day, row.category, row.location), row.count) for row in ItemDailyCount.objects.exclude(count=0)
+            )
+        incremental = buckets()
+        stats.rebuild()
+        self.assertEqual(incremental, buckets())
+
+    def test_single_item_writes(self):
+        item = make_item(self.user, category="Lost")
+        make_item(self.user, category="found", location="Cafeteria")
+        self.assertRollupsMatchRebuild()
+
+        item.category = "found"
+        item.save()
+        self.assertRollupsMatchRebuild()
+        item.location = "Cafeteria"
+        item.save(update_fields=["location", "updated_at"])
+        self.assertRollupsMatchRebuild()
+
+        self.assertEqual(self.client.delete(f"/api/items/{item.pk}/").status_code, 200)
+        self.assertRollupsMatchRebuild()
+        item = LostFoundItem.objects.get(pk=item.pk)
+        item.is_deleted = False  # restored
+        item.save()
+        self.assertRollupsMatchRebuild()
+        item.delete()
+        self.assertRollupsMatchRebuild()
+        self.assertEqual(stats.summary()["totals"], {"lost": 0, "found": 1, "total": 1})
+
+    def test_api_and_bulk_writes(self):
+        row = {"title": "Grey backpack", "description": "Left in the lecture hall", "category": "lost", "location": "Library"}
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = self.client.post("/api/items/", row, format="json").data["id"]
+            self.client.patch(f"/api/items/{pk}/", {"category": "found"}, format="json")
+            created = self.client.post("/api/items/bulk/", [row, {**row, "location": "Gym"}], format="json")
+        self.assertRollupsMatchRebuild()
+
+        first, second = (result["id"] for result in created.data["results"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch("/api/items/bulk/", [{"id": first, "category": "found", "location": "Gym"}], format="json")
+            self.client.delete("/api/items/bulk/", [second, pk], format="json")
+        self.assertRollupsMatchRebuild()
+        self.assertEqual(stats.summary()["totals"]["total"], 1)
+
+
+class CompiledListSerializerTests(TestCase):
+    def test_output_is_byte_identical_to_drf_per_row_rendering(self):
+        variants = {"jpeg": {"320": "https://cdn.example.com/a.jpg", "640": "https://cdn.example.com/b.jpg"},
+                    "webp": {"320": "https://cdn.example.com/a.webp"}}
+        original = make_item(make_user("owner"), latitude=CENTER[0], longitude=CENTER[1])
+        for number in range(6):
+            make_item(
+                title=f"Lost item {number}", category="found" if number % 2 else "lost",
+                image="https://res.cloudinary.com/demo/image/upload/v1/items/sample.jpg" if number % 3 else None,
+                image_variants=variants if number % 3 else {}, contact_email="owner@example.com" if number % 2 else None,
+                latitude=CENTER[0] + number * 0.01 if number % 2 else None,
+                longitude=CENTER[1] if number % 2 else None,
+            )
+        LostFoundItem.objects.exclude(pk=original.pk).filter(category="found").update(duplicate_of=original)
+        items = list(LostFoundItem.objects.order_by("pk"))
+
+        serializer = LostFoundItemSerializer(items, many=True)
+        renderer = JSONRenderer()
+        generic = renderer.render([serializer.child.to_representation(item) for item in items])
+        self.assertEqual(renderer.render(serializer.data), generic)
+        self.assertEqual(renderer.render(LostFoundItemSerializer(LostFoundItem.objects.order_by("pk"), many=True).data), generic)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("owner")
+        self.item = make_item(self.user)
+
+    def counts(self):
+        values = registry.values.collect()
+        return [
+            values.get(counter.key, [0])[0]
+            for counter in (RESPONSE_CACHE_HITS, RESPONSE_CACHE_MISSES, RESPONSE_CACHE_NOT_MODIFIED)
+        ]
+
+    def test_repeat_get_is_a_hit_with_the_same_body_and_etag(self):
+        hits, misses, _ = self.counts()
+        first = self.client.get("/api/items/")
+        second = self.client.get("/api/items/")
+        self.assertEqual((first["X-Cache"], second["X-Cache"]), ("MISS", "HIT"))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertEqual(self.counts()[:2], [hits + 1, misses + 1])
+
+    def test_miss_renders_the_body_once(self):
+        render = JSONRenderer.render
+        with mock.patch.object(JSONRenderer, "render", autospec=True, side_effect=render) as rendered:
+            response = self.client.get(f"/api/items/{self.item.pk}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(rendered.call_count, 1)
+
+    def test_matching_etag_answers_304_on_hit_and_miss(self):
+        etag = self.client.get("/api/items/")["ETag"]
+        _, _, not_modified = self.counts()
+        response = self.client.get("/api/items/", headers={"If-None-Match": etag})
+        self.assertEqual((response.status_code, response.content), (304, b""))
+        self.assertEqual(response["ETag"], etag)
+
+        cache.clear()  # the body is rendered afresh, to the same ETag
+        response = self.client.get("/api/items/", headers={"If-None-Match": f'"stale", {etag}'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.counts()[2], not_modified + 2)
+        self.assertEqual(self.client.get("/api/items/", headers={"If-None-Match": '"stale"'}).status_code, 200)
+
+    def test_writes_bump_the_versions_of_list_and_detail_pages(self):
+        detail = f"/api/items/{self.item.pk}/"
+        listing, page = self.client.get("/api/items/"), self.client.get(detail)
+        make_item(self.user, title="Blue umbrella")
+        self.assertEqual(self.client.get(detail)["X-Cache"], "HIT")  # another item's write
+        response = self.client.get("/api/items/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotEqual(response["ETag"], listing["ETag"])
+
+        self.item.title = "Brown wallet"
+        self.item.save()
+        response = self.client.get(detail, headers={"If-None-Match": page["ETag"]})
+        self.assertEqual((response.status_code, response["X-Cache"]), (200, "MISS"))
+        self.assertEqual(response.json()["title"], "Brown wallet")
+
+
+class MetricsTests(TestCase):
+    def test_scrape_sums_every_worker_and_keeps_exited_ones(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        exited = subprocess.Popen(["true"])
+        exited.wait()
+        for pid, count in ((os.getppid(), 2), (exited.pid, 3)):  # a live and an exited worker
+            other = ProcessFile(os.path.join(directory.name, f"{pid}.db"))
+            offset = other.values_offset('["latency", ["/items/"]]', 4)
+            for index, amount in ((0, count), (2, 0.5 * count), (3, count)):
+                other.add(offset, index, amount)
+            other.close()
+
+        with override_settings(METRICS_DIR=directory.name):
+            registry = Registry()
+            histogram = registry.histogram("latency", "Latency.", ("route",), buckets=(1.0,))
+            histogram.observe(2.0, "/items/")
+            text = registry.render()
+
+        self.assertIn('latency_bucket{route="/items/",le="1.0"} 5', text)
+        self.assertIn('latency_bucket{route="/items/",le="+Inf"} 6', text)
+        self.assertIn('latency_count{route="/items/"} 6', text)
+        self.assertEqual(
+            sorted(os.listdir(directory.name)), sorted(["lock", "totals.db", f"{os.getppid()}.db", f"{os.getpid()}.db"])
+        )
+
+    @override_settings(DEBUG=False, METRICS_TOKEN="")
+    def test_scraping_needs_a_token_outside_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 401)
+            response = self.client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+            self.assertEqual(response.status_code, 200)
+
+
+class LoggingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "django.log")
+
+    def handler(self, **options):
+        handler = QueuedLogHandler(self.path, **options)
+        handler.setFormatter(JSONLineFormatter())
+        self.addCleanup(handler.close)
+        return handler
+
+    def record(self, message):
+        return logging.makeLogRecord({"name": "api", "levelno": logging.INFO, "levelname": "INFO", "msg": message})
+
+    def test_records_from_every_thread_are_written_with_their_arguments(self):
+        handler = self.handler()
+        logger = logging.getLogger("api.tests.queued")
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        def log(thread):
+            for number in range(50):
+                logger.warning("Item '%s' marked as found (%s)", f"wallet {thread}", number, extra={"item_id": number})
+        threads = [threading.Thread(target=log, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        handler.flush()
+
+        with open(self.path) as log_file:
+            entries = [json.loads(line) for line in log_file]
+        self.assertEqual(handler.dropped, 0)
+        self.assertEqual(
+            sorted(entry["message"] for entry in entries),
+            sorted(f"Item 'wallet {thread}' marked as found ({number})" for thread in range(4) for number in range(50)),
+        )
+        self.assertEqual({entry["level"] for entry in entries}, {"WARNING"})
+        self.assertEqual(sorted(entry["item_id"] for entry in entries), sorted(list(range(50)) * 4))
+
+    def test_file_moved_by_logrotate_is_reopened(self):
+        handler = self.handler()
+        handler.handle(self.record("before"))
+        handler.flush()
+        os.rename(self.path, f"{self.path}.1")
+        handler.handle(self.record("after"))
+        handler.flush()
+        with open(self.path) as log:
+            self.assertEqual([json.loads(line)["message"] for line in log], ["after"])
+
+    def test_dropped_records_are_counted_in_the_registry(self):
+        def dropped():
+            return registry.values.collect().get(LOG_RECORDS_DROPPED.key, [0])[0]
+
+        handler = self.handler(queueSize=1)
+        handler._listener_pid = os.getpid()  # a writer that has stalled: nothing drains the queue
+        before = dropped()
+        for message in ("kept", "dropped", "dropped"):
+            handler.handle(self.record(message))
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual(dropped() - before, 2)
+        handler._listener_pid = None
+
+
+class SimilarityIndexTests(TestCase):
+    WORDS = "black brown leather wallet phone charger keys umbrella scarf library hall bench".split()
+
+    def text(self, rng):
+        return " ".join(rng.choice(self.WORDS) for _ in range(rng.randint(2, 5)))
+
+    def brute_force(self, index, documents, query):
+        """Cosine of query against every live found item, on the index's own IDF weights"""
+        def vector(title, description):
+            counts = term_counts(title, description)
+            return {token: tf(count) * index._idf(index._terms[token]) for token, count in counts.items()
+                    if token in index._terms}
+
+        wanted = vector(query.title, query.description)
+        wanted_norm = math.sqrt(sum(weight * weight for weight in wanted.values()))
+        scores = {}
+        for pk, (category, title, description) in documents.items():
+            if category != "found":
+                continue
+            weights = vector(title, description)
+            dot = sum(weight * weights.get(token, 0.0) for token, weight in wanted.items())
+            if dot:
+                scores[pk] = dot / (wanted_norm * math.sqrt(sum(weight * weight for weight in weights.values())))
+        return scores
+
+    def assertMatchesBruteForce(self, index, documents):
+        for token, term in index._terms.items():
+            live = sum(token in term_counts(title, description) for _, title, description in documents.values())
+            self.assertEqual(index._df[term], live, token)
+        query = LostFoundItem(category="lost", title="black leather wallet", description="left in the library hall")
+        with override_settings(SIMILARITY_MIN_SCORE=0):
+            scores = dict(index.similar(query, limit=len(documents)))
+        expected = self.brute_force(index, documents, query)
+        self.assertEqual(set(scores), set(expected))
+        for pk, score in scores.items():
+            self.assertAlmostEqual(score, expected[pk], places=5)
+            self.assertLessEqual(score, 1 + 1e-6)
+
+    def test_scores_stay_cosines_through_edits_and_compaction(self):
+        rng = random.Random(7)
+        index = SimilarityIndex()
+        index.sync()
+        documents = {}
+        for pk in range(1, 61):
+            documents[pk] = (rng.choice(("lost", "found")), self.text(rng), self.text(rng))
+            index.add(pk, *documents[pk], version=float(pk))
+        index._compact()
+        for version, pk in enumerate(rng.sample(sorted(documents), 30), start=100):
+            if version % 3:
+                documents[pk] = (documents[pk][0], self.text(rng), self.text(rng))
+                index.add(pk, *documents[pk], version=float(version))
+            else:
+                del documents[pk]
+                index.discard(pk)
+        self.assertMatchesBruteForce(index, documents)
+
+        index._compact()
+        self.assertMatchesBruteForce(index, documents)
+
+    def test_warm_up_loads_once_in_the_background(self):
+        index = SimilarityIndex()
+        release, loaded = threading.Event(), threading.Event()
+
+        def sync():
+            release.wait(5)
+            loaded.set()
+
+        with mock.patch.object(index, "sync", side_effect=sync) as slow_sync:
+            index.warm_up()
+            index.warm_up()  # already warming: returns at once
+            release.set()
+            self.assertTrue(loaded.wait(5))
+        self.assertEqual(slow_sync.call_count, 1)
+
+
+class ItemMatchesTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        user = make_user("reporter")
+        self.lost = make_item(user, title="Black leather wallet", description="Lost in the library")
+        self.exact = make_item(user, category="found", title="Black leather wallet", description="Found in the library")
+        self.close = make_item(user, category="found", title="Brown wallet", description="Found on a bench")
+        self.other = make_item(user, category="found", title="Blue umbrella", description="Found in the hall")
+        make_item(user, title="Black leather wallet", description="Lost in the library too")  # same category
+
+    def matches(self):
+        response = self.client.get(f"/api/items/{self.lost.pk}/matches/")
+        self.assertEqual(response.status_code, 200)
+        return [(row["id"], row["score"]) for row in response.data["results"]]
+
+    def test_opposite_category_items_are_ranked_by_score(self):
+        matches = self.matches()
+        self.assertEqual([pk for pk, _ in matches], [self.exact.pk, self.close.pk])
+        self.assertEqual(matches, [(pk, round(score, 4)) for pk, score in similarity_index.similar(self.lost, 10)])
+
+    def test_saved_edit_is_matched_without_a_reload(self):
+        self.matches()  # loads the index
+        self.other.title, self.other.description = "Black leather wallet", "Found in the library hall"
+        self.other.save()
+        with mock.patch.object(similarity_index, "_load") as load:
+            matches = self.matches()
+        load.assert_not_called()
+        self.assertEqual({pk for pk, _ in matches[:2]}, {self.exact.pk, self.other.pk})
+
+
+class LocationDictionaryTests(TestCase):
+    def setUp(self):
+        location_dictionary.clear()
+        self.addCleanup(location_dictionary.clear)
+
+    def test_resolve_never_counts_items(self):
+        make_item(location=location_dictionary.resolve("Main  Library"))
+        with self.assertNumQueries(1):  # the incremental Location pull only
+            with override_settings(LOCATION_DICTIONARY_REFRESH_SECONDS=0, LOCATION_USAGE_REFRESH_SECONDS=0):
+                self.assertEqual(location_dictionary.resolve("MAIN library"), "Main Library")
+
+    @override_settings(LOCATION_SUGGEST_MIN_ITEMS=0)
+    def test_autocomplete_ranks_by_usage(self):
+        for name in ("Library Annex", "Library Annex", "Library Hall"):
+            make_item(location=location_dictionary.resolve(name))
+        make_item(location=location_dictionary.resolve("Library Cafe"), is_deleted=True)
+        self.assertEqual(
+            [name for _, name in location_dictionary.autocomplete("lib")],
+            ["Library Annex", "Library Hall", "Library Cafe"],
+        )
+
+    @override_settings(LOCATION_SUGGEST_MIN_ITEMS=2, LOCATION_DICTIONARY_REFRESH_SECONDS=0)
+    def test_unseen_variant_is_not_suggested_until_used_or_approved(self):
+        hall = Location.objects.create(name="Library Hall", is_approved=True)
+        make_item(location=location_dictionary.resolve("Libary Hal"))
+        self.assertEqual(location_dictionary.resolve("libary  hal"), "Libary Hal")  # registered, kept raw
+        self.assertEqual(location_dictionary.autocomplete("lib"), [(hall.pk, "Library Hall")])
+
+        make_item(location=location_dictionary.resolve("Libary Hal"))
+        location_dictionary.clear()  # a fresh worker, counting usage now rather than in the background
+        self.assertEqual([name for _, name in location_dictionary.autocomplete("lib")], ["Libary Hal", "Library Hall"])
+
+
+ITEM_TABLE = LostFoundItem._meta.db_table
+
+
+def explain(sql):
+    """Plan lines for a captured statement; Postgres is told to avoid seq scans it could avoid"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Small fixture tables make seq scans cheapest; only flag ones no index can replace
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan, table=ITEM_TABLE):
+    """Plan lines that read the whole of table (the item table by default)"""
+    if connection.vendor == "postgresql":
+        return [line for line in plan if f"Seq Scan on {table}" in line]
+    pattern = re.compile(rf"^SCAN {table}\b")
+    return [line for line in plan if pattern.match(line.strip()) and "USING" not in line]
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+class QueryPlanTests(APITestCase):
+    """Hot item endpoints: a fixed number of queries however many rows they return (no N+1),
+    and none of them a full scan of the item table. No response cache, so every request is measured."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("plan-owner")
+        other = make_user("plan-other")
+        items = []
+        for number in range(300):
+            item = LostFoundItem(
+                user=cls.owner if number % 3 == 0 else other,
+                title=f"Black wallet {number}",
+                description=f"leather wallet number {number}",
+                category="lost" if number % 2 else "found",
+                location=f"Hall {number % 7}",
+                latitude=CENTER[0] + (number % 17) * 0.001,
+                longitude=CENTER[1] + (number % 13) * 0.001,
+                is_deleted=number % 10 == 0,
+            )
+            item.refresh_geohash()
+            items.append(item)
+        LostFoundItem.objects.bulk_create(items)
+        cls.item = LostFoundItem.objects.filter(user=cls.owner, is_deleted=False).latest("created_at")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.owner)
+        # Warm the in-process indexes so their one-off initial loads are not measured
+        search_index.sync()
+        location_dictionary.sync()
+        similarity_index.sync()
+
+    def assertPlannedQueries(self, num, call, consume=False):
+        """call() runs exactly num queries, none of which scans the whole item table"""
+        with self.assertNumQueries(num) as captured:
+            response = call()
+            if consume:
+                b"".join(response.streaming_content)
+        self.assertLess(getattr(response, "status_code", 200), 400)
+        for query in captured.captured_queries:
+            sql = query["sql"]
+            if ITEM_TABLE in sql and sql.lstrip().upper().startswith("SELECT"):
+                self.assertEqual(full_scans(explain(sql)), [], sql)
+        return response
+
+    def test_feed(self):
+        feed = self.assertPlannedQueries(1, lambda: self.client.get("/api/items/"))
+        self.assertEqual(len(feed.data["results"]), 10)
+        self.assertPlannedQueries(1, lambda: self.client.get(feed.data["next"]))
+
+    def test_page_number_list(self):
+        self.assertPlannedQueries(2, lambda: self.client.get("/api/items/?page=2&page_size=100"))
+
+    def test_nearby(self):
+        self.assertPlannedQueries(1, lambda: self.client.get(f"/api/items/?near={CENTER[0]},{CENTER[1]}&radius=1"))
+
+    def test_search(self):
+        # The hits still admitted by the queryset, then the page
+        self.assertPlannedQueries(2, lambda: self.client.get("/api/items/?search=wallet&page_size=100"))
+
+    def test_detail(self):
+        self.assertPlannedQueries(1, lambda: self.client.get(f"/api/items/{self.item.pk}/"))
+
+    @override_settings(SIMILARITY_MIN_SCORE=0)
+    def test_matches(self):
+        response = self.assertPlannedQueries(2, lambda: self.client.get(f"/api/items/{self.item.pk}/matches/?limit=50"))
+        self.assertEqual(len(response.data["results"]), 50)
+
+    def test_user_profile(self):
+        self.assertPlannedQueries(1, lambda: self.client.get("/api/user/profile/"))
+
+    def test_stats(self):
+        self.assertPlannedQueries(3, lambda: self.client.get("/api/stats/"))
+
+    def test_export_since(self):
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        # Changed rows, then archival tombstones
+        self.assertPlannedQueries(2, lambda: self.client.get("/api/items/export/", {"since": since}), consume=True)
+
+    def test_contact_validation(self):
+        self.assertPlannedQueries(1, lambda: ContactReporterSerializer(
+            data={"item_id": self.item.pk, "mail": "a@example.com", "message": "Is this mine?"}
+        ).is_valid(raise_exception=True))
+
+    def test_duplicate_probe(self):
+        self.assertPlannedQueries(1, lambda: find_duplicate(LostFoundItem(
+            user=self.owner, title="Black wallet", description="leather wallet", category="lost", location="Hall 1"
+        )))
+
+    def test_update(self):
+        self.assertPlannedQueries(6, lambda: self.client.patch(
+            f"/api/items/{self.item.pk}/update-delete/", {"title": "Black wallet (edited)"}, format="json"
+        ))
+
+    def test_soft_delete(self):
+        self.assertPlannedQueries(7, lambda: self.client.delete(f"/api/items/{self.item.pk}/update-delete/"))
@@ -0,0 +1,184 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+TOKEN_BUCKET = "token_bucket"
+SLIDING_WINDOW = "sliding_window"
+
+
+def token_bucket(state, now, limit, period):
+    """Bucket of `limit` tokens refilled over `period` seconds; state is (tokens, updated_at).
+
+    Returns (allowed, seconds until the next token, new state). A missing state is a full bucket.
+    """
+    rate = limit / period
+    tokens, updated_at = state or (limit, now)
+    tokens = min(limit, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= 1:
+        return True, 0.0, (tokens - 1, now)
+    return False, (1 - tokens) / rate, (tokens, now)
+
+
+def sliding_window(state, now, limit, period):
+    """Sliding-window counter: the previous fixed window's count, weighted by its remaining overlap.
+
+    State is (window start, count in this window, count in the previous window).
+    """
+    start = now - now % period
+    window_start, current, previous = state or (start, 0, 0)
+    if window_start != start:
+        previous = current if window_start == start - period else 0
+        current = 0
+    overlap = 1 - (now - start) / period
+    if previous * overlap + current + 1 <= limit:
+        return True, 0.0, (start, current + 1, previous)
+    if current + 1 > limit or not previous:
+        wait = start + period - now
+    else:
+        # The previous window's weight drops until one more request fits
+        wait = max(0.0, start + period * (1 - (limit - 1 - current) / previous) - now)
+    return False, wait, (start, current, previous)
+
+
+# Algorithm -> (function, number of state values it keeps)
+ALGORITHMS = {TOKEN_BUCKET: (token_bucket, 2), SLIDING_WINDOW: (sliding_window, 3)}
+
+
+class SharedMemoryStore:
+    """Rate-limit state in a memory-mapped file shared by every worker process on the host.
+
+    The file is a set-associative table: a key hashes to a group of SLOTS_PER_GROUP
+    fixed-size slots, and each check locks just that group (a thread lock plus an
+    fcntl byte-range lock) for one read-modify-write. When a group is full the
+    least recently touched slot is reused; by then its bucket has usually refilled.
+    """
+
+    SLOT = struct.Struct("<Q3d")  # key hash (0 = empty), then up to three numbers of algorithm state
+    SLOTS_PER_GROUP = 8
+    THREAD_LOCKS = 256
+
+    def __init__(self, options):
+        self.groups = max(1, options.get("SLOTS", 65536) // self.SLOTS_PER_GROUP)
+        self.group_size = self.SLOT.size * self.SLOTS_PER_GROUP
+        size = self.groups * self.group_size
+        self.fd = os.open(options["LOCATION"], os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+        self._locks = [threading.Lock() for _ in range(self.THREAD_LOCKS)]
+
+    def hit(self, key, limit, period, algorithm=TOKEN_BUCKET):
+        """Count one request against key; returns (allowed, seconds to wait if not)"""
+        check, size = ALGORITHMS[algorithm]
+        digest = int.from_bytes(hashlib.blake2b(f"{algorithm}:{key}".encode(), digest_size=8).digest(), "little") or 1
+        group = digest % self.groups
+        offset = group * self.group_size
+        now = time.time()
+        # fcntl locks are per process, so threads of one worker also need a lock of their own
+        with self._locks[group % self.THREAD_LOCKS]:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, self.group_size, offset)
+            try:
+                slot, state = self._find(offset, digest)
+                allowed, wait, state = check(state and state[:size], now, limit, period)
+                self.SLOT.pack_into(self.map, slot, digest, *state, *([0.0] * (3 - size)))
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, self.group_size, offset)
+        return allowed, wait
+
+    def _find(self, offset, digest):
+        """Offset of key's slot in the group and its state (None when new or reclaimed)"""
+        stalest = None
+        for slot in range(offset, offset + self.group_size, self.SLOT.size):
+            found, *state = self.SLOT.unpack_from(self.map, slot)
+            if found == digest:
+                return slot, tuple(state)
+            if found == 0:
+                return slot, None
+            # Both layouts keep an epoch timestamp in one of the first two values, far above any count
+            touched = max(state[0], state[1])
+            if stalest is None or touched < stalest[1]:
+                stalest = (slot, touched)
+        return stalest[0], None
+
+    def clear(self):
+        self.map[:] = bytes(len(self.map))
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+def get_store_settings():
+    options = {
+        "BACKEND": "api.throttling.SharedMemoryStore",
+        "LOCATION": "/dev/shm/lostfound-throttle" if os.path.isdir("/dev/shm") else "/tmp/lostfound-throttle",
+        "SLOTS": 65536,
+    }
+    options.update(getattr(settings, "THROTTLE_STORE", {}))
+    return options
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The configured throttle store (THROTTLE_STORE['BACKEND']), opened once per process"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            options = get_store_settings()
+            _store = import_string(options["BACKEND"])(options)
+        return _store
+
+
+def reset_store():
+    """Close the store; the next get_store() opens it with the current settings"""
+    global _store
+    with _store_lock:
+        if _store is not None and hasattr(_store, "close"):
+            _store.close()
+        _store = None
+
+
+class SharedRateThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle on the shared store: one atomic hit() per check, no history in the cache.
+
+    Rates, scopes and cache keys are DRF's; THROTTLE_ALGORITHM (or a subclass's
+    `algorithm`) picks a token bucket or a sliding window.
+    """
+
+    algorithm = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        algorithm = self.algorithm or getattr(settings, "THROTTLE_ALGORITHM", TOKEN_BUCKET)
+        allowed, self._wait = get_store().hit(self.key, self.num_requests, self.duration, algorithm)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class SharedUserRateThrottle(UserRateThrottle, SharedRateThrottle):
+    pass
+
+
+class SharedAnonRateThrottle(AnonRateThrottle, SharedRateThrottle):
+    pass
+
+
+class SharedScopedRateThrottle(ScopedRateThrottle, SharedRateThrottle):
+    pass
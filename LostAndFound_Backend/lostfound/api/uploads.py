@@ -0,0 +1,181 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import matching
+from .cache import invalidate_item
+from .images import perceptual_hash, render_variants
+from .models import LostFoundItem
+from .storage import get_storage, new_upload_key
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_process_pool = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "UPLOAD_PROCESSING_WORKERS", 2),
+            thread_name_prefix="upload-processing",
+        )
+    return _executor
+
+
+def get_process_pool():
+    """CPU-bound resizing/encoding runs in separate processes, this worker's share of the cores"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_PROCESSING_PROCESSES", 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def store_variants(storage, data):
+    """Render variants in the process pool and store them; returns {format: {width: url}}"""
+    variants = {}
+    for key, width, name, encoded in get_process_pool().submit(render_variants, data).result():
+        if not storage.exists(name):
+            storage.save(name, encoded)
+        variants.setdefault(key, {})[str(width)] = storage.url(name)
+    return variants
+
+
+def hash_uploaded_image(uploaded_file):
+    """image_phash value of an uploaded image, or None when Pillow cannot read it"""
+    try:
+        return matching.signed_hash(perceptual_hash(uploaded_file))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    finally:
+        uploaded_file.seek(0)
+
+
+def attach_image(item_id, key, data=None):
+    """Background stage: build responsive variants of the stored original and attach them in one UPDATE.
+
+    The image's dHash is stored alongside, its bands are indexed, and a report not
+    yet flagged as a duplicate is checked again now that its photo can be compared.
+    """
+    storage = get_storage()
+    if data is None:
+        data = storage.open(key)
+    phash = get_process_pool().submit(perceptual_hash, data)
+    variants = store_variants(storage, data)
+    smallest = min(variants["jpeg"], key=int)
+    variants["thumb"] = variants["jpeg"][smallest]
+    phash = matching.signed_hash(phash.result())
+    LostFoundItem.objects.filter(pk=item_id).update(
+        image=storage.url(key), image_variants=variants, image_phash=phash,
+        image_status=LostFoundItem.IMAGE_READY, image_error="", image_key="",
+    )
+    # update() skips post_save: re-index and invalidate here
+    item = LostFoundItem.objects.get(pk=item_id)
+    matching.index_item(item)
+    if item.duplicate_of_id is None and matching.flag_duplicate(item):
+        logger.info("Item %s repeats item %s", item_id, item.duplicate_of_id)
+    invalidate_item(item_id)
+    logger.info("Attached image %s to item %s", key, item_id)
+
+
+def _run(task, item_id, *args):
+    try:
+        task(item_id, *args)
+    except Exception as e:
+        logger.exception("Image processing failed for item %s %s", item_id, args)
+        # The client was answered before this ran: leave the outcome on the item
+        LostFoundItem.objects.filter(pk=item_id).update(
+            image_status=LostFoundItem.IMAGE_FAILED, image_error=(str(e) or type(e).__name__)[:255], image_key=""
+        )
+        invalidate_item(item_id)
+    finally:
+        close_old_connections()
+
+
+def mark_processing(item, key=""):
+    """Record on item that its image is queued; returns the fields, for a save() or UPDATE to persist"""
+    item.image_status, item.image_error = LostFoundItem.IMAGE_PROCESSING, ""
+    item.image_key, item.image_queued_at = key, timezone.now()
+    return {"image_status": item.image_status, "image_error": "", "image_key": key,
+            "image_queued_at": item.image_queued_at}
+
+
+def schedule(task, item, *args, key="", marked=False):
+    """Run task(item.pk, *args) off the request thread once the current transaction commits.
+
+    marked=True means the caller already saved mark_processing() with the row, so no
+    second UPDATE (and cache invalidation) is needed here.
+    """
+    if not marked:
+        LostFoundItem.objects.filter(pk=item.pk).update(**mark_processing(item, key))
+        invalidate_item(item.pk)
+    transaction.on_commit(lambda: get_executor().submit(_run, task, item.pk, *args))
+
+
+def recover_stale_uploads():
+    """Re-run or fail images left processing past UPLOAD_PROCESSING_TIMEOUT; returns how many.
+
+    The thread pool and spool file die with their web worker. An original that reached
+    storage is taken through attach_image again, here; anything else is marked failed.
+    """
+    timeout = getattr(settings, "UPLOAD_PROCESSING_TIMEOUT", 900)
+    stale = LostFoundItem.objects.filter(
+        image_status=LostFoundItem.IMAGE_PROCESSING, image_queued_at__lt=timezone.now() - timedelta(seconds=timeout)
+    )
+    storage = get_storage()
+    recovered = 0
+    for item_id, key, queued_at in stale.values_list("pk", "image_key", "image_queued_at"):
+        # Conditional on queued_at, so a stage that finished meanwhile or another sweep wins
+        row = LostFoundItem.objects.filter(
+            pk=item_id, image_status=LostFoundItem.IMAGE_PROCESSING, image_queued_at=queued_at
+        )
+        if key and storage.exists(key):
+            if row.update(image_queued_at=timezone.now()):
+                logger.warning("Re-running interrupted image processing for item %s", item_id)
+                _run(attach_image, item_id, key)
+                recovered += 1
+        elif row.update(
+            image_status=LostFoundItem.IMAGE_FAILED, image_error="Image processing was interrupted.", image_key=""
+        ):
+            logger.warning("Image processing for item %s was interrupted before storage", item_id)
+            invalidate_item(item_id)
+            recovered += 1
+    return recovered
+
+
+def process_direct_upload(item, key):
+    """A client finished uploading key straight to storage; attach it in the background"""
+    schedule(attach_image, item, key, key=key)
+
+
+def _ingest_spooled_file(item_id, key, spool_path):
+    try:
+        with open(spool_path, "rb") as f:
+            data = f.read()
+        get_storage().save(key, data)
+        # From here on the original survives this process: the sweep can finish the job
+        LostFoundItem.objects.filter(pk=item_id).update(image_key=key)
+        attach_image(item_id, key, data)
+    finally:
+        os.remove(spool_path)
+
+
+def stage_uploaded_file(item, uploaded_file, marked=False):
+    """Multipart fallback: spool the upload to local disk and move it to storage in the background"""
+    fd, spool_path = tempfile.mkstemp(prefix="upload-", dir=getattr(settings, "UPLOAD_SPOOL_DIR", None))
+    with os.fdopen(fd, "wb") as spool:
+        for chunk in uploaded_file.chunks():
+            spool.write(chunk)
+    schedule(_ingest_spooled_file, item, new_upload_key(item), spool_path, marked=marked)
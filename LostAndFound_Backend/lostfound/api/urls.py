@@ -1,24 +1,48 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from api.views import (
     RegisterView, user_profile, logout_view,
     LostFoundItemListCreateView, LostFoundItemDetailView, update_reported_item,
-    ContactReporterView,CustomTokenObtainPairView
+    ContactReporterView,CustomTokenObtainPairView,
+    ItemUploadTicketView, ItemUploadCompleteView, direct_upload, LostFoundItemExportView, ItemBulkView,
+    LocationAutocompleteView, ItemStatsView, ItemMatchesView,
+    async_login, async_contact_reporter, async_update_reported_item,
+    async_upload_ticket, async_upload_complete, async_direct_upload,
 )
 
+
+def by_server_mode(sync_view, async_view):
+    """Under ASGI, I/O-bound endpoints use their async implementations"""
+    return async_view if settings.SERVER_MODE == "asgi" else sync_view
+
+
 urlpatterns = [
     path("auth/register/", RegisterView.as_view(), name="register"),  
-    path("auth/login/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"), 
+    path(
+        "auth/login/",
+        by_server_mode(CustomTokenObtainPairView.as_view(), async_login),
+        name="token_obtain_pair",
+    ),
     path("auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),  
     path("auth/logout/", logout_view, name="logout"),  
 
     path("user/profile/", user_profile, name="user-profile"), 
 
     path("items/", LostFoundItemListCreateView.as_view(), name="item-list-create"), 
+    path("items/export/", LostFoundItemExportView.as_view(), name="item-export"),
+    path("items/bulk/", ItemBulkView.as_view(), name="item-bulk"),
+    path("stats/", ItemStatsView.as_view(), name="item-stats"),
     path("items/<int:pk>/", LostFoundItemDetailView.as_view(), name="item-detail"),  
-    path("items/<int:item_id>/update-delete/", update_reported_item, name="update-delete-reported-item"), 
+    path("items/<int:pk>/matches/", ItemMatchesView.as_view(), name="item-matches"),
+    path("items/<int:item_id>/update-delete/", by_server_mode(update_reported_item, async_update_reported_item), name="update-delete-reported-item"), 
+    path("items/<int:pk>/upload-ticket/", by_server_mode(ItemUploadTicketView.as_view(), async_upload_ticket), name="item-upload-ticket"),
+    path("items/<int:pk>/upload-complete/", by_server_mode(ItemUploadCompleteView.as_view(), async_upload_complete), name="item-upload-complete"),
+    path("uploads/<str:token>/", by_server_mode(direct_upload, async_direct_upload), name="direct-upload"),
+
+    path("locations/autocomplete/", LocationAutocompleteView.as_view(), name="location-autocomplete"),
 
-    path("contact-reporter/", ContactReporterView.as_view(), name="contact-reporter"), 
+    path("contact-reporter/", by_server_mode(ContactReporterView.as_view(), async_contact_reporter), name="contact-reporter"), 
 
 
 ]
@@ -1,9 +1,8 @@
-from django.core.mail import send_mail
-from django.conf import settings
-from django.contrib.auth import get_user_model
+from .models import NotificationJob
 
-def send_item_found_notification(item):
-    """Send Email Notification to All Users When Item is Marked as Found."""
+
+def build_item_found_message(item):
+    """Subject and body of the email sent when an item is marked as found."""
     subject = f"🎉 Item Found: {item.title}"
     message = f"""
     Hello,
@@ -18,20 +17,81 @@ def send_item_found_notification(item):
     Regards,
     Lost & Found Team
     """
+    return subject, message
+
+
+def build_contact_reporter_message(message):
+    """Subject, plain text and HTML of the 'regarding your report' email to a reporter."""
+    subject = "🔔 Important Update: Regarding Your Report"
+
+    # Enhanced Email Content
+    html = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; background-color: #f4f4f4; margin: 0; padding: 0;">
+        <table width="100%" border="0" cellspacing="0" cellpadding="0" bgcolor="#f4f4f4" style="padding: 20px;">
+            <tr>
+                <td align="center">
+                    <table width="600" border="0" cellspacing="0" cellpadding="10" bgcolor="#ffffff" style="border: 1px solid #dddddd; border-radius: 8px;">
+                        <tr>
+                            <td align="center" bgcolor="#4CAF50" style="padding: 15px 0;">
+                                <h2 style="color: #ffffff; margin: 0;">Lost & Found - Notification</h2>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td style="padding: 20px; text-align: left;">
+                                <p style="font-size: 16px; margin-top: 0;">Dear User,</p>
+                                <p style="font-size: 14px; color: #333333;">
+                                    {message}
+                                </p>
+                                <p style="font-size: 14px; color: #333333;">
+                                    If you have any questions, please feel free to contact our support team.
+                                </p>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td align="center" bgcolor="#f4f4f4" style="padding: 10px;">
+                                <p style="font-size: 12px; color: #777777; margin: 0;">
+                                    &copy; 2025 Lost & Found Platform. All rights reserved.
+                                </p>
+                            </td>
+                        </tr>
+                    </table>
+                </td>
+            </tr>
+        </table>
+    </body>
+    </html>
+    """
+    return subject, "This is a plain text fallback for email clients that do not support HTML.", html
+
+
+def contact_reporter_job(item_id, mail, message):
+    return NotificationJob(
+        kind=NotificationJob.KIND_CONTACT_REPORTER, item_id=item_id, payload={"to": mail, "message": message}
+    )
+
+
+def enqueue_contact_reporter_mail(item_id, mail, message):
+    """Queue a message to an item's reporter; the process_notifications worker delivers it."""
+    job = contact_reporter_job(item_id, mail, message)
+    job.save(force_insert=True)
+    return job
+
+
+async def aenqueue_contact_reporter_mail(item_id, mail, message):
+    """Async form of enqueue_contact_reporter_mail for ASGI views."""
+    job = contact_reporter_job(item_id, mail, message)
+    await job.asave(force_insert=True)
+    return job
+
+
+def enqueue_item_found_notification(item):
+    """Queue the 'item found' email; the process_notifications worker delivers it."""
+    return NotificationJob.objects.create(kind=NotificationJob.KIND_ITEM_FOUND, item=item)
+
 
-    #  Use get_user_model() instead of importing CustomUser
-    CustomUser = get_user_model()
-    recipient_list = list(CustomUser.objects.values_list("email", flat=True))
-
-    # Send email only if users exist
-    if recipient_list:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            recipient_list,
-            fail_silently=False,  # Set to False to log errors during sending
-        )
-        print(f"Email sent to {len(recipient_list)} users about found item: {item.title}")
-    else:
-        print(" No users to send the email notification.")
+def enqueue_item_found_notifications(items):
+    """Bulk form of enqueue_item_found_notification: one INSERT for all jobs."""
+    return NotificationJob.objects.bulk_create(
+        [NotificationJob(kind=NotificationJob.KIND_ITEM_FOUND, item=item) for item in items]
+    )
@@ -1,24 +1,48 @@
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
-from rest_framework import generics, permissions, status, pagination
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.db.models import Q
+from rest_framework import generics, permissions, serializers, status, pagination
+from rest_framework.exceptions import ParseError
+from .throttling import SharedScopedRateThrottle
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView
-from api.utils import send_item_found_notification
+from api.utils import aenqueue_contact_reporter_mail, enqueue_contact_reporter_mail
 from .models import LostFoundItem
-from .models import LostFoundItem
-from .serializers import LostFoundItemSerializer, RegisterSerializer, CustomUserSerializer, ContactReporterSerializer
+from .models import ArchivedItem
+from .serializers import LostFoundItemSerializer, RegisterSerializer, CustomUserSerializer, ContactReporterSerializer, UploadCompleteSerializer
+from .search import search_items
+from .similarity import similarity_index
+from .geo import filter_nearby
+from .locations import location_dictionary
+from .authentication import TOKEN_VERSION_CLAIM, user_cache
+from .passwords import arun_password_work, run_password_work
+from .asyncapi import async_endpoint, parse_data, parse_json
+from .metrics import RESPONSE_CACHE_HITS, RESPONSE_CACHE_MISSES, RESPONSE_CACHE_NOT_MODIFIED, registry
+from . import stats
+from .cache import ITEMS_SCOPE, STATS_SCOPE, cached_response, etag_matches, item_scope, not_modified, response_cache
+from .storage import LimitedReader, UploadTooLarge, get_storage, get_upload_settings, new_upload_key
+from .uploads import process_direct_upload
+from .bulk import bulk_create_items, bulk_soft_delete, bulk_update_items, get_max_batch
 import logging
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 import json
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.renderers import JSONRenderer
 from django.views.decorators.csrf import csrf_exempt
 import json
+import itertools
 import os
-import ssl
-import smtplib
-from email.message import EmailMessage
+import binascii
+import hmac
+from base64 import b64decode, b64encode
+from datetime import datetime
 
 
 
@@ -32,9 +56,84 @@ class StandardResultsPagination(pagination.PageNumberPagination):
     max_page_size = 100
 
 
+class ItemFeedCursorPagination(pagination.BasePagination):
+    """Keyset pagination on (created_at, id): every page is an index range scan, never an OFFSET"""
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # Fetch one extra row to learn whether a next page exists without a COUNT(*)
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        """(created_at, id) after which the page starts; a cursor we did not issue is a 400"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = b64decode(encoded.encode("ascii"), altchars=b"-_").decode("ascii").split("|")
+            created_at, pk = datetime.fromisoformat(created_at), int(pk)
+            if created_at.tzinfo is None or not 0 < pk < 2 ** 63:
+                raise ValueError(encoded)  # the database would reject or misread these
+            return created_at, pk
+        except (ValueError, UnicodeError, binascii.Error):
+            raise ParseError("Invalid cursor")
+
+    def encode_cursor(self, item):
+        position = f"{item.created_at.isoformat()}|{item.pk}"
+        return b64encode(position.encode("ascii"), altchars=b"-_").decode("ascii")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """ Return user info in token response"""
 
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
 
@@ -47,21 +146,40 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 
 
+def issue_tokens(data):
+    """Check credentials and mint a token pair; hashes a password, so it runs under the hashing cap"""
+    serializer = CustomTokenObtainPairSerializer(data=data)
+    try:
+        serializer.is_valid(raise_exception=True)
+    except TokenError as e:
+        raise InvalidToken(e.args[0])
+    body = dict(serializer.validated_data)
+
+    fcm_token = data.get("fcm_token")
+    if fcm_token:
+        # Single-column UPDATE keyed by the id the serializer already resolved
+        user_id = body["user"]["id"]
+        CustomUser.objects.filter(pk=user_id).update(fcm_token=fcm_token)
+        user_cache.evict(user_id)  # update() skips post_save
+        body["message"] = "Login successful & FCM token stored!"
+    return body
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Override TokenObtainPairView to include FCM token handling."""
     serializer_class = CustomTokenObtainPairSerializer 
+    # Checked before any password is hashed
+    throttle_classes = [*APIView.throttle_classes, SharedScopedRateThrottle]
+    throttle_scope = "login_attempts"
 
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        
-        fcm_token = request.data.get("fcm_token")
-        if fcm_token and response.status_code == 200:
-            user = CustomUser.objects.get(username=request.data.get("username"))
-            user.fcm_token = fcm_token
-            user.save()
-            response.data["message"] = "Login successful & FCM token stored!"
-        
-        return response
+        return Response(run_password_work(issue_tokens, request.data), status=status.HTTP_200_OK)
+
+
+@async_endpoint(["POST"], authenticated=False, throttle_scope="login_attempts")
+async def async_login(request):
+    """Login for ASGI deployments: the event loop keeps serving while the pool hashes"""
+    return JsonResponse(await arun_password_work(issue_tokens, parse_json(request)))
 
 
 
@@ -72,7 +190,7 @@ class RegisterView(generics.CreateAPIView):
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
-        user = get_object_or_404(CustomUser, username=request.data.get("username"))
+        user = self.created_user  # no need to read back the row just inserted
         response.data.update({
             "message": "Registration successful!",
             "user": {
@@ -83,12 +201,61 @@ class RegisterView(generics.CreateAPIView):
         })
         return response
 
+    def perform_create(self, serializer):
+        self.created_user = serializer.save()
+
+
+
+class CachedResponseMixin:
+    """Serve GET from the versioned response cache with strong ETags and 304s"""
+
+    def get_cache_scopes(self):
+        return [ITEMS_SCOPE]
+
+    def get(self, request, *args, **kwargs):
+        return self.cached_get(request, super().get, *args, **kwargs)
+
+    def cached_get(self, request, handler, *args, **kwargs):
+        """Answer from the cache, or run handler and let finalize_response store its response"""
+        key = response_cache.make_key(request, self.get_cache_scopes())
+        entry = response_cache.get(key)
+        if entry is not None:
+            RESPONSE_CACHE_HITS.inc()
+            response = cached_response(request, entry)
+            response["X-Cache"] = "HIT"
+            return response
+
+        RESPONSE_CACHE_MISSES.inc()
+        self.response_cache_key = key
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            etag = response_cache.store(key, response)
+            response["X-Cache"] = "MISS"
+            if etag_matches(request, etag):
+                RESPONSE_CACHE_NOT_MODIFIED.inc()
+                return not_modified(etag)
+        return response
 
 
-class LostFoundItemListCreateView(generics.ListCreateAPIView):
+class LostFoundItemListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
     queryset = LostFoundItem.objects.filter(is_deleted=False).order_by('-created_at')
     serializer_class = LostFoundItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = ItemFeedCursorPagination
+
+    @property
+    def paginator(self):
+        """Cursor pages by default; ?page=N opts into page-number pagination (admin UI)"""
+        if not hasattr(self, "_paginator"):
+            if "page" in self.request.query_params:
+                self._paginator = StandardResultsPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_serializer_context(self):
         """Pass request context to serializer to handle user automatically"""
@@ -96,16 +263,207 @@ class LostFoundItemListCreateView(generics.ListCreateAPIView):
         context['request'] = self.request
         return context
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        near = self.request.query_params.get("near")
+        if near:
+            queryset = filter_nearby(queryset, near, self.request.query_params.get("radius"))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """Serve ?search= from the full-text index as relevance-ranked pages"""
+        query = request.query_params.get("search", "").strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+
+        results = search_items(self.get_queryset(), query)
+        paginator = StandardResultsPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        if self.merged:
+            response.status_code = status.HTTP_200_OK  # folded into an existing report, nothing created
+        return response
+
     def perform_create(self, serializer):
         serializer.save()
+        self.merged = getattr(serializer, "merged", False)
 
 
  
-class LostFoundItemDetailView(generics.RetrieveUpdateDestroyAPIView):
+class LostFoundItemExportView(APIView):
+    """Stream every live item as NDJSON (default) or a JSON array, in constant memory.
+
+    With ?since= the stream is a change feed: items soft deleted since then appear
+    as tombstones ({"id", "is_deleted": true, "updated_at"}) so mirrors can drop them,
+    followed by tombstones for items archive_items has moved out since (updated_at is
+    when they were archived).
+    """
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    chunk_size = 2000
+
+    def get(self, request):
+        queryset = LostFoundItem.objects.filter(is_deleted=False).order_by("id")
+        since = request.query_params.get("since")
+        if since:
+            since_value = parse_datetime(since)
+            if since_value is None:
+                return Response({"error": "since must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            # Walk item_updated_idx in order, deleted rows included; the last row's updated_at is the next ?since=
+            queryset = LostFoundItem.objects.filter(updated_at__gt=since_value).order_by("updated_at", "id")
+
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in ("ndjson", "json"):
+            return Response({"error": "export_format must be 'ndjson' or 'json'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = self.serialize_rows(queryset.iterator(chunk_size=self.chunk_size))
+        if since:
+            rows = itertools.chain(rows, self.archived_tombstones(since_value))
+        if export_format == "json":
+            body, content_type = self.json_array(rows), "application/json"
+        else:
+            body, content_type = (row + b"\n" for row in rows), "application/x-ndjson"
+
+        response = StreamingHttpResponse(body, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="items.{export_format}"'
+        return response
+
+    def serialize_rows(self, items):
+        """Encode one chunk of rows at a time so only chunk_size objects are alive"""
+        serializer = LostFoundItemSerializer(many=True, context={"request": self.request})
+        renderer = JSONRenderer()
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                yield from self.render_chunk(serializer, renderer, chunk)
+                chunk = []
+        yield from self.render_chunk(serializer, renderer, chunk)
+
+    @staticmethod
+    def render_chunk(serializer, renderer, chunk):
+        rows = iter(serializer.to_representation([item for item in chunk if not item.is_deleted]))
+        updated_at = serializer.child.fields["updated_at"]
+        for item in chunk:
+            if item.is_deleted:
+                row = {"id": item.pk, "is_deleted": True, "updated_at": updated_at.to_representation(item.updated_at)}
+            else:
+                row = next(rows)
+            yield renderer.render(row)
+
+    def archived_tombstones(self, since):
+        updated_at = serializers.DateTimeField()
+        archived = ArchivedItem.objects.filter(archived_at__gt=since).order_by("archived_at", "original_id")
+        renderer = JSONRenderer()
+        for original_id, archived_at in archived.values_list("original_id", "archived_at").iterator(chunk_size=self.chunk_size):
+            yield renderer.render({"id": original_id, "is_deleted": True, "updated_at": updated_at.to_representation(archived_at)})
+
+    @staticmethod
+    def json_array(rows):
+        yield b"["
+        for index, row in enumerate(rows):
+            yield row if index == 0 else b"," + row
+        yield b"]"
+
+
+class ItemStatsView(CachedResponseMixin, APIView):
+    """Dashboard counts by category, location and day, read from the rollup table"""
+    permission_classes = [permissions.AllowAny]
+
+    def get_cache_scopes(self):
+        return [STATS_SCOPE]
+
+    def get(self, request):
+        return self.cached_get(request, self.summary)
+
+    def summary(self, request):
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+            top = min(max(int(request.query_params.get("locations", 10)), 1), 100)
+        except ValueError:
+            return Response({"error": "days and locations must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats.summary(days=days, top_locations=top))
+
+
+class ItemMatchesView(CachedResponseMixin, APIView):
+    """Opposite-category items most likely to be the same object, by TF-IDF cosine similarity"""
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, pk):
+        return self.cached_get(request, self.matches, pk)
+
+    def matches(self, request, pk):
+        item = get_object_or_404(LostFoundItem, pk=pk, is_deleted=False)
+        try:
+            limit = min(max(int(request.query_params.get("limit", settings.MATCH_TOP_K)), 1), 50)
+        except ValueError:
+            limit = settings.MATCH_TOP_K
+        ranked = similarity_index.similar(item, limit)
+        items = LostFoundItem.objects.filter(is_deleted=False).in_bulk([match_id for match_id, _ in ranked])
+        matches = [(items[match_id], score) for match_id, score in ranked if match_id in items]
+        rows = LostFoundItemSerializer([match for match, _ in matches], many=True, context={"request": request}).data
+        return Response({
+            "item": item.pk,
+            "results": [{**row, "score": round(score, 4)} for row, (_, score) in zip(rows, matches)],
+        })
+
+
+class ItemBulkView(APIView):
+    """Batch create (POST), update (PATCH) and soft delete (DELETE) with per-row error reports"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_rows(self, request, key):
+        rows = request.data.get(key) if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return None, Response({"error": f"Expected a non-empty list (or {{'{key}': [...]}})."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > get_max_batch():
+            return None, Response({"error": f"At most {get_max_batch()} rows per request."}, status=status.HTTP_400_BAD_REQUEST)
+        return rows, None
+
+    def batch_response(self, results, errors, success_status):
+        if errors and not results:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = success_status
+        return Response({"results": results, "errors": errors}, status=response_status)
+
+    def post(self, request):
+        rows, error = self.get_rows(request, "items")
+        if error:
+            return error
+        created, errors = bulk_create_items(request.user, rows, context={"request": request})
+        results = [{"index": index, "id": item.pk} for index, item in created]
+        return self.batch_response(results, errors, status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        rows, error = self.get_rows(request, "items")
+        if error:
+            return error
+        updated, errors = bulk_update_items(request.user, rows)
+        results = [{"index": index, "id": item.pk} for index, item in updated]
+        return self.batch_response(results, errors, status.HTTP_200_OK)
+
+    def delete(self, request):
+        ids, error = self.get_rows(request, "ids")
+        if error:
+            return error
+        deleted, errors = bulk_soft_delete(request.user, ids)
+        return self.batch_response([{"id": pk} for pk in deleted], errors, status.HTTP_200_OK)
+
+
+class LostFoundItemDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = LostFoundItem.objects.filter(is_deleted=False)
     serializer_class = LostFoundItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_cache_scopes(self):
+        return [item_scope(self.kwargs["pk"])]
+
     def get_queryset(self):
         return LostFoundItem.objects.filter(is_deleted=False)
 
@@ -118,76 +476,151 @@ class LostFoundItemDetailView(generics.RetrieveUpdateDestroyAPIView):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance.is_deleted = True
-        instance.save()
+        instance.save(update_fields=["is_deleted", "updated_at"])
         return Response({"message": "Item deleted (soft delete) successfully!"}, status=status.HTTP_200_OK)
 
     
 
 
+class ItemUploadTicketView(APIView):
+    """Issue a signed URL so the client uploads the image straight to storage"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        item = get_object_or_404(LostFoundItem, pk=pk, user=request.user, is_deleted=False)
+        ticket = get_storage().create_ticket(new_upload_key(item), request)
+        return Response(ticket, status=status.HTTP_201_CREATED)
+
+
+class ItemUploadCompleteView(APIView):
+    """Client finished a direct upload: attach it and build thumbnails in the background"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        item = get_object_or_404(LostFoundItem, pk=pk, user=request.user, is_deleted=False)
+        serializer = UploadCompleteSerializer(data=request.data, context={"item": item})
+        serializer.is_valid(raise_exception=True)
+
+        key = serializer.validated_data["key"]
+        if not get_storage().exists(key):
+            return Response({"error": "Upload not found in storage."}, status=status.HTTP_400_BAD_REQUEST)
+
+        process_direct_upload(item, key)
+        return Response({"message": "Upload accepted for processing."}, status=status.HTTP_202_ACCEPTED)
+
+
+@async_endpoint(["POST"])
+async def async_upload_ticket(request, pk):
+    """ASGI form of ItemUploadTicketView"""
+    item = await aget_object_or_404(LostFoundItem, pk=pk, user=request.user, is_deleted=False)
+    ticket = get_storage().create_ticket(new_upload_key(item), request)
+    return JsonResponse(ticket, status=status.HTTP_201_CREATED)
+
+
+@async_endpoint(["POST"])
+async def async_upload_complete(request, pk):
+    """ASGI form of ItemUploadCompleteView; the storage lookup waits off the event loop"""
+    item = await aget_object_or_404(LostFoundItem, pk=pk, user=request.user, is_deleted=False)
+    serializer = UploadCompleteSerializer(data=parse_json(request), context={"item": item})
+    serializer.is_valid(raise_exception=True)
+
+    key = serializer.validated_data["key"]
+    # Network round trip to Cloudinary (or disk): run it in a thread, not the event loop
+    if not await sync_to_async(get_storage().exists, thread_sensitive=False)(key):
+        return JsonResponse({"error": "Upload not found in storage."}, status=status.HTTP_400_BAD_REQUEST)
+
+    await sync_to_async(process_direct_upload)(item, key)
+    return JsonResponse({"message": "Upload accepted for processing."}, status=status.HTTP_202_ACCEPTED)
+
+
+def check_direct_upload(request, token):
+    """(key, None) for a valid PUT within the size limit, else (None, error response)"""
+    storage = get_storage()
+    if request.method != "PUT" or not hasattr(storage, "read_ticket"):
+        return None, JsonResponse({"error": "Method not allowed"}, status=405)
+    key = storage.read_ticket(token)
+    if key is None:
+        return None, JsonResponse({"error": "Invalid or expired upload ticket"}, status=403)
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length > get_upload_settings()["MAX_BYTES"]:
+        return None, upload_too_large()
+    return key, None
+
+
+def upload_too_large():
+    limit = get_upload_settings()["MAX_BYTES"]
+    return JsonResponse({"error": f"Upload exceeds the {limit} byte limit."}, status=413)
+
+
+@csrf_exempt
+def direct_upload(request, token):
+    """PUT target of LocalUploadStorage tickets; streams the body to disk up to UPLOAD_STORAGE['MAX_BYTES']"""
+    key, error = check_direct_upload(request, token)
+    if error:
+        return error
+    try:
+        get_storage().save(key, LimitedReader(request, get_upload_settings()["MAX_BYTES"]))
+    except UploadTooLarge:
+        return upload_too_large()  # a body longer than its Content-Length claimed
+    return JsonResponse({"key": key}, status=201)
+
+
+@csrf_exempt
+async def async_direct_upload(request, token):
+    """ASGI form of direct_upload; the body is copied to disk off the event loop"""
+    key, error = check_direct_upload(request, token)
+    if error:
+        return error
+    try:
+        await sync_to_async(get_storage().save, thread_sensitive=False)(
+            key, LimitedReader(request, get_upload_settings()["MAX_BYTES"])
+        )
+    except UploadTooLarge:
+        return upload_too_large()
+    return JsonResponse({"key": key}, status=201)
+
+
+class LocationAutocompleteView(APIView):
+    """Per-keystroke location suggestions from the in-memory prefix index"""
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [SharedScopedRateThrottle]
+    throttle_scope = "location_autocomplete"
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 20)
+        except ValueError:
+            limit = 10
+        matches = location_dictionary.autocomplete(request.query_params.get("q", ""), limit)
+        response = Response({"results": [{"id": pk, "name": name} for pk, name in matches]})
+        response["Cache-Control"] = "public, max-age=60"
+        return response
+
+
 class ContactReporterView(APIView):
     serializer_class = ContactReporterSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        data = json.loads(request.body)
-        mail = data['mail']
-        subject = "🔔 Important Update: Regarding Your Report"
-        
-        # Enhanced Email Content
-        message_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; background-color: #f4f4f4; margin: 0; padding: 0;">
-            <table width="100%" border="0" cellspacing="0" cellpadding="0" bgcolor="#f4f4f4" style="padding: 20px;">
-                <tr>
-                    <td align="center">
-                        <table width="600" border="0" cellspacing="0" cellpadding="10" bgcolor="#ffffff" style="border: 1px solid #dddddd; border-radius: 8px;">
-                            <tr>
-                                <td align="center" bgcolor="#4CAF50" style="padding: 15px 0;">
-                                    <h2 style="color: #ffffff; margin: 0;">Lost & Found - Notification</h2>
-                                </td>
-                            </tr>
-                            <tr>
-                                <td style="padding: 20px; text-align: left;">
-                                    <p style="font-size: 16px; margin-top: 0;">Dear User,</p>
-                                    <p style="font-size: 14px; color: #333333;">
-                                        {data['message']}
-                                    </p>
-                                    <p style="font-size: 14px; color: #333333;">
-                                        If you have any questions, please feel free to contact our support team.
-                                    </p>
-                                </td>
-                            </tr>
-                            <tr>
-                                <td align="center" bgcolor="#f4f4f4" style="padding: 10px;">
-                                    <p style="font-size: 12px; color: #777777; margin: 0;">
-                                        &copy; 2025 Lost & Found Platform. All rights reserved.
-                                    </p>
-                                </td>
-                            </tr>
-                        </table>
-                    </td>
-                </tr>
-            </table>
-        </body>
-        </html>
-        """
-
-        objmail = EmailMessage()
-        objmail["from"] = os.getenv("EMAIL_HOST_USER")
-        objmail["to"] = mail
-        objmail["subject"] = subject
-        objmail.set_content("This is a plain text fallback for email clients that do not support HTML.")
-        objmail.add_alternative(message_content, subtype='html')
-
-        context = ssl.create_default_context()
-
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as all:
-            all.login(os.getenv("EMAIL_HOST_USER"), os.getenv("EMAIL_HOST_PASSWORD"))
-            all.sendmail(
-                os.getenv("EMAIL_HOST_USER"), mail, objmail.as_string()
-            )
-
-        return Response({"message": "Email sent successfully!"})
+        serializer = ContactReporterSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Stored in the notification outbox; the worker sends it through EMAIL_BACKEND
+        enqueue_contact_reporter_mail(**serializer.validated_data)
+
+        return Response({"message": "Email accepted for delivery!"})
+
+
+@async_endpoint(["POST"])
+async def async_contact_reporter(request):
+    """ASGI form of ContactReporterView; validation and the outbox insert run off the event loop"""
+    serializer = ContactReporterSerializer(data=parse_json(request))
+    await sync_to_async(serializer.is_valid)(raise_exception=True)
+    await aenqueue_contact_reporter_mail(**serializer.validated_data)
+    return JsonResponse({"message": "Email accepted for delivery!"})
 
 
 @api_view(['GET'])
@@ -205,6 +638,14 @@ def user_profile(request):
 
 
 
+def apply_item_update(item, data):
+    """Validate and save a partial update; saving queues the found notification if it applies"""
+    serializer = LostFoundItemSerializer(item, data=data, partial=True)
+    if serializer.is_valid():
+        serializer.save()
+    return serializer
+
+
 @api_view(["PUT", "PATCH", "DELETE"])
 @permission_classes([permissions.IsAuthenticated])
 def update_reported_item(request, item_id):
@@ -212,22 +653,31 @@ def update_reported_item(request, item_id):
 
     if request.method == "DELETE":
         item.is_deleted = True
-        item.save()
+        item.save(update_fields=["is_deleted", "updated_at"])
         return Response({"message": " Item deleted (soft delete) successfully!"}, status=status.HTTP_200_OK)
 
-    previous_status = item.category
-    serializer = LostFoundItemSerializer(item, data=request.data, partial=True)
+    serializer = apply_item_update(item, request.data)
+    if serializer.errors:
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"message": "Item updated successfully!", "data": serializer.data}, status=status.HTTP_200_OK)
 
-    if serializer.is_valid():
-        serializer.save()
 
-        # Check if item is marked as "found" and notify users
-        if previous_status == "Lost" and serializer.validated_data.get("category") == "Found":
-            send_item_found_notification(item)
+@async_endpoint(["PUT", "PATCH", "DELETE"])
+async def async_update_reported_item(request, item_id):
+    """ASGI form of update_reported_item: async lookup and delete; JSON, form and multipart bodies"""
+    item = await aget_object_or_404(LostFoundItem, id=item_id, user=request.user, is_deleted=False)
 
-        return Response({"message": "Item updated successfully!", "data": serializer.data}, status=status.HTTP_200_OK)
+    if request.method == "DELETE":
+        item.is_deleted = True
+        await item.asave(update_fields=["is_deleted", "updated_at"])
+        return JsonResponse({"message": " Item deleted (soft delete) successfully!"}, status=status.HTTP_200_OK)
 
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    # Saving runs the sync signal handlers (search, matching, stats), so it stays one sync block
+    serializer = await sync_to_async(apply_item_update)(item, parse_data(request))
+    if serializer.errors:
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = await sync_to_async(lambda: serializer.data)()
+    return JsonResponse({"message": "Item updated successfully!", "data": data}, status=status.HTTP_200_OK)
 
 
 
@@ -238,4 +688,11 @@ def logout_view(request):
     return Response({"message": "Logout successful!"}, status=status.HTTP_200_OK)
 
 
-
+def metrics_view(request):
+    """Prometheus scrape target: the host's histograms in text exposition format"""
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=404)  # open scraping is for development only
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,6 @@
+"""Benchmark and load-test commands.
+
+Kept out of the api app so they are not part of the production manage.py; they are
+installed only with BENCHMARKS=1, e.g. `BENCHMARKS=1 python manage.py bench_search`.
+Correctness is covered by api/tests.py; these only measure.
+"""
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import AsyncRequestFactory
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import LostFoundItem, UserProfile
+from api.views import CustomTokenObtainPairSerializer, ItemUploadCompleteView, async_upload_complete
+
+
+class SlowStorage:
+    """Storage whose exists() stalls like a Cloudinary Admin API round trip"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def exists(self, key):
+        time.sleep(self.latency)
+        return True
+
+
+class Command(BaseCommand):
+    help = "Compare upload-complete throughput at a fixed worker count: sync (WSGI) vs. async (ASGI) views"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=2, help="Server workers (sync threads or event loops)")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight per async worker")
+        parser.add_argument("--latency", type=float, default=0.1, help="Seconds each storage lookup takes")
+
+    def handle(self, *args, **options):
+        user, _ = UserProfile.objects.get_or_create(
+            username="bench-asgi", defaults={"email": "bench-asgi@example.com"}
+        )
+        item = LostFoundItem.objects.create(user=user, title="Bench umbrella", description="asgi bench",
+                                            category="lost", location="Library")
+        token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        body = json.dumps({"key": f"items/{item.pk}/bench"})
+        authorization = f"Bearer {token}"
+        path = f"/api/items/{item.pk}/upload-complete/"
+        count, workers = options["requests"], options["workers"]
+
+        sync_factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        sync_view = ItemUploadCompleteView.as_view(throttle_classes=[])
+
+        def sync_call(_):
+            request = sync_factory.post(path, body, content_type="application/json", HTTP_AUTHORIZATION=authorization)
+            response = sync_view(request, pk=item.pk)
+            close_old_connections()
+            return response.status_code
+
+        async_factory = AsyncRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+
+        async def async_call(slots):
+            async with slots, ThreadSensitiveContext():  # per-request context, as ASGIHandler sets up
+                request = async_factory.post(path, body, content_type="application/json",
+                                             headers={"Authorization": authorization})
+                response = await async_upload_complete(request, pk=item.pk)
+                await sync_to_async(close_old_connections)()
+                return response.status_code
+
+        async def event_loop_worker(share):
+            slots = asyncio.Semaphore(options["concurrency"])
+            return await asyncio.gather(*(async_call(slots) for _ in range(share)))
+
+        def async_workers():
+            results = [None] * workers
+            def run(number):
+                results[number] = asyncio.run(event_loop_worker(count // workers + (number < count % workers)))
+            threads = [threading.Thread(target=run, args=(number,)) for number in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return [status for share in results for status in share]
+
+        def report(label, run):
+            started = time.perf_counter()
+            statuses = run()
+            elapsed = time.perf_counter() - started
+            accepted = statuses.count(202)
+            self.stdout.write(f"{label:<34} {accepted / elapsed:8.1f} req/s  ({accepted}/{len(statuses)} accepted)")
+
+        rest_framework = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_CLASSES": []}
+        # Only the request path is measured: background thumbnailing is stubbed out
+        with override_settings(REST_FRAMEWORK=rest_framework), \
+                mock.patch("api.views.get_storage", lambda: SlowStorage(options["latency"])), \
+                mock.patch("api.views.process_direct_upload", lambda item, key: None):
+            self.stdout.write(f"{count} requests, {workers} workers, {options['latency'] * 1000:.0f} ms storage latency")
+            report(f"WSGI ({workers} sync workers)", lambda: list(ThreadPoolExecutor(workers).map(sync_call, range(count))))
+            report(f"ASGI ({workers} event loops)", async_workers)
+
+        item.delete()
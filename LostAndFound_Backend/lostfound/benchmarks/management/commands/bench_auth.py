@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import CachedJWTAuthentication, user_cache
+from api.models import UserProfile
+from api.views import CustomTokenObtainPairSerializer
+
+
+def whoami_view(authentication_class):
+    class WhoAmI(APIView):
+        authentication_classes = [authentication_class]
+        permission_classes = [permissions.IsAuthenticated]
+        throttle_classes = []
+
+        def get(self, request):
+            return Response({"id": request.user.pk})
+
+    return WhoAmI.as_view()
+
+
+class Command(BaseCommand):
+    help = "Benchmark authenticated requests/sec: plain JWTAuthentication vs. the cached backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--users", type=int, default=50, help="Distinct users the requests rotate through")
+
+    def handle(self, *args, **options):
+        users = []
+        for number in range(options["users"]):
+            user, _ = UserProfile.objects.get_or_create(
+                username=f"bench-auth-{number}", defaults={"email": f"bench-auth-{number}@example.com"}
+            )
+            users.append(user)
+        tokens = [str(CustomTokenObtainPairSerializer.get_token(user).access_token) for user in users]
+
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        requests = [
+            factory.get("/whoami/", HTTP_AUTHORIZATION=f"Bearer {tokens[n % len(tokens)]}")
+            for n in range(options["requests"])
+        ]
+        user_cache.clear()
+        for label, backend in (("JWTAuthentication", JWTAuthentication), ("CachedJWTAuthentication", CachedJWTAuthentication)):
+            view = whoami_view(backend)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                for request in requests:
+                    response = view(request)
+                    assert response.status_code == 200, response.data
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:<24} {len(requests) / elapsed:9.0f} req/s  "
+                f"{len(captured.captured_queries) / len(requests):.3f} queries/request"
+            )
+        self.stdout.write(f"user cache: {user_cache.hits} hits, {user_cache.misses} misses")
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from api.locations import location_dictionary
+from api.models import Location
+from api.views import LocationAutocompleteView
+
+WORDS = [
+    "main", "north", "south", "east", "west", "old", "new", "central", "upper", "lower",
+    "library", "cafeteria", "gym", "parking", "hall", "block", "lab", "gate", "stop", "ground",
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark /api/locations/autocomplete/ per keystroke against an istartswith/icontains query"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--locations", type=int, default=0, help="Seed the dictionary up to this many locations first")
+        parser.add_argument("--queries", type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(3)
+        missing = options["locations"] - Location.objects.count()
+        while missing > 0:
+            batch = []
+            for _ in range(min(missing, 5000)):
+                name = " ".join(rng.sample(WORDS, 3)).title() + f" {rng.randint(1, 10**6)}"
+                batch.append(Location(name=name, key=Location.make_key(name), is_approved=True))
+            Location.objects.bulk_create(batch, ignore_conflicts=True)
+            missing -= len(batch)
+        self.stdout.write(f"{Location.objects.count()} locations in dictionary")
+
+        started = time.perf_counter()
+        location_dictionary.sync()
+        location_dictionary.autocomplete("a")
+        self.stdout.write(f"Dictionary load: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        # Every prefix of a few typed words, as a client sends them keystroke by keystroke
+        keystrokes = []
+        while len(keystrokes) < options["queries"]:
+            typed = " ".join(rng.sample(WORDS, 2))
+            keystrokes.extend(typed[:length] for length in range(1, len(typed) + 1))
+        keystrokes = keystrokes[:options["queries"]]
+
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = LocationAutocompleteView.as_view(throttle_classes=[])
+        in_memory, requests, database = [], [], []
+        for prefix in keystrokes:
+            started = time.perf_counter()
+            location_dictionary.autocomplete(prefix)
+            in_memory.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            view(factory.get("/api/locations/autocomplete/", {"q": prefix})).render()
+            requests.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            list(Location.objects.filter(name__icontains=prefix, is_active=True)[:10])
+            database.append((time.perf_counter() - started) * 1000)
+
+        self.report("prefix index", in_memory)
+        self.report("endpoint", requests)
+        self.report("icontains query", database)
+
+    def report(self, label, timings):
+        timings.sort()
+        p99 = timings[max(0, int(len(timings) * 0.99) - 1)]
+        self.stdout.write(f"{label:<16} median={statistics.median(timings):8.3f} ms  p99={p99:8.3f} ms")
@@ -0,0 +1,67 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from benchmarks.synthetic import seed_items
+from api.matching import find_duplicate, index_items, item_shingles, jaccard
+from api.models import LostFoundItem
+
+
+def pairwise_duplicate(item):
+    """The lookup without band keys: compare item against every recent report at its location"""
+    since = timezone.now() - timedelta(hours=getattr(settings, "DEDUP_WINDOW_HOURS", 72))
+    shingles = item_shingles(item.title, item.description)
+    best = None
+    for candidate in LostFoundItem.objects.filter(
+        category=item.category, location=item.location, is_deleted=False, created_at__gte=since,
+    ).only("id", "title", "description"):
+        score = jaccard(shingles, item_shingles(candidate.title, candidate.description))
+        if score >= getattr(settings, "DEDUP_MIN_SIMILARITY", 0.6) and (best is None or score > best[0]):
+            best = (score, candidate)
+    return best and best[1]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the duplicate check at item creation: band-key index probe vs. a pairwise scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=0, help="Seed the item table up to this many rows first (e.g. 500000)")
+        parser.add_argument("--queries", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options["items"]:
+            seed_items(options["items"])
+        # Seeded rows skip post_save, so band the ones the index has not seen
+        unbanded = LostFoundItem.objects.filter(is_deleted=False, signature_bands__isnull=True)
+        while batch := list(unbanded[:5000]):
+            index_items(batch)
+        self.stdout.write(f"{LostFoundItem.objects.count()} items in table")
+
+        rng = random.Random(11)
+        ids = list(LostFoundItem.objects.filter(is_deleted=False).values_list("id", flat=True))
+        originals = LostFoundItem.objects.in_bulk(rng.sample(ids, min(options["queries"], len(ids))))
+        probed, scanned, found = [], [], 0
+        for original in originals.values():
+            # The same report filed again, reworded slightly
+            repeat = LostFoundItem(
+                title=original.title, description=f"{original.description} please help",
+                category=original.category, location=original.location,
+            )
+            started = time.perf_counter()
+            found += find_duplicate(repeat) is not None
+            probed.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            pairwise_duplicate(repeat)
+            scanned.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(
+            f"{found}/{len(originals)} repeats caught  "
+            f"index probe {statistics.median(probed):8.2f} ms  "
+            f"pairwise scan {statistics.median(scanned):8.2f} ms  (median per new report)"
+        )
@@ -0,0 +1,61 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from api.geo import distance_expression, filter_nearby
+from benchmarks.synthetic import CENTER, SPREAD_DEGREES, seed_items
+from api.models import LostFoundItem
+from api.views import LostFoundItemListCreateView
+
+
+class Command(BaseCommand):
+    help = "Benchmark ?near=lat,lng&radius= queries: geohash index probes vs. a distance-only scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=0, help="Seed the item table up to this many rows first (e.g. 1000000)")
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument("--radii", type=float, nargs="+", default=[0.5, 2.0, 10.0])
+
+    def handle(self, *args, **options):
+        if options["items"]:
+            seed_items(options["items"])
+        self.stdout.write(f"{LostFoundItem.objects.count()} items in table")
+
+        rng = random.Random(7)
+        points = [
+            (CENTER[0] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), CENTER[1] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES))
+            for _ in range(options["queries"])
+        ]
+        live = LostFoundItem.objects.filter(is_deleted=False)
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = LostFoundItemListCreateView.as_view(throttle_classes=[])
+
+        for radius in options["radii"]:
+            indexed, scanned, requests, matches = [], [], [], 0
+            for latitude, longitude in points:
+                started = time.perf_counter()
+                matches += filter_nearby(live, f"{latitude},{longitude}", radius).count()
+                indexed.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                live.alias(distance_km=distance_expression(latitude, longitude)).filter(distance_km__lte=radius).count()
+                scanned.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                view(factory.get(f"/api/items/?near={latitude},{longitude}&radius={radius}")).render()
+                requests.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(
+                f"radius {radius:>5} km  avg matches {matches / len(points):>9.1f}  "
+                f"count via geohash {statistics.median(indexed):8.2f} ms  "
+                f"count via full scan {statistics.median(scanned):8.2f} ms  "
+                f"first page {statistics.median(requests):8.2f} ms"
+            )
+
+        latitude, longitude = points[0]
+        plan = filter_nearby(live, f"{latitude},{longitude}", options["radii"][0]).explain()
+        self.stdout.write(f"plan for radius {options['radii'][0]} km:\n{plan}")
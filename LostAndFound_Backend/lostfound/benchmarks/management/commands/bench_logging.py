@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from api.logs import JSONLineFormatter, QueuedLogHandler
+
+PAYLOAD = [{"id": number, "title": f"Item {number}", "location": "Library"} for number in range(50)]
+
+
+class Item:
+    title = "Black leather wallet"
+    location = "Library, 2nd floor"
+
+
+def old_style(logger, item, number):
+    # What the request path used to do: messages built before the level check
+    logger.debug(f"Rendering item {item.title!r} at {item.location!r} for request {number}")
+    logger.info(f"Item '{item.title}' marked as found ({number}). Queueing email...")
+
+
+def new_style(logger, item, number):
+    logger.debug("Rendering item %r at %r for request %s", item.title, item.location, number)
+    logger.info("Item '%s' marked as found (%s). Queueing email...", item.title, number)
+
+
+def slow_down(handler, seconds):
+    """Make every write to handler's file take at least `seconds` (a busy or network disk)"""
+    emit = handler.emit
+
+    def slow_emit(record):
+        time.sleep(seconds)
+        emit(record)
+    handler.emit = slow_emit
+
+
+class Command(BaseCommand):
+    help = "Request throughput with a blocking FileHandler vs. the queued JSON-lines handler"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Simulated requests per thread")
+        parser.add_argument("--threads", type=int, default=8, help="Request threads")
+        parser.add_argument("--write-delay", type=float, default=0.0002, help="Extra seconds per file write")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            blocking = logging.FileHandler(os.path.join(directory, "blocking.log"))
+            blocking.setFormatter(logging.Formatter("{levelname} {asctime} {module} {message}", style="{"))
+            slow_down(blocking, options["write_delay"])
+
+            # Queue sized for the whole run so both handlers write every record
+            queued = QueuedLogHandler(
+                os.path.join(directory, "queued.log"), queueSize=options["requests"] * options["threads"] * 2,
+            )
+            queued.setFormatter(JSONLineFormatter())
+            slow_down(queued.target, options["write_delay"])
+
+            self.stdout.write(
+                f"{options['threads']} threads x {options['requests']} requests, "
+                f"{options['write_delay'] * 1e6:.0f}us per file write"
+            )
+            self.run("FileHandler + f-strings", blocking, old_style, options)
+            self.run("queued JSON + lazy args", queued, new_style, options)
+            for handler in (blocking, queued):
+                handler.close()
+
+    def run(self, label, handler, log, options):
+        logger = logging.getLogger(f"bench_logging.{id(handler)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        item = Item()
+
+        def request(number):
+            started = time.perf_counter()
+            json.dumps(PAYLOAD)  # stand-in for the request's own work
+            log(logger, item, number)
+            return time.perf_counter() - started
+
+        count = options["requests"] * options["threads"]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["threads"]) as executor:
+            latencies = sorted(executor.map(request, range(count)))
+        elapsed = time.perf_counter() - started
+        handler.flush()
+        written = time.perf_counter() - started
+
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e6
+        self.stdout.write(
+            f"{label:<26} {count / elapsed:8.0f} req/s  p50={pick(0.5):7.1f}us p99={pick(0.99):8.1f}us  "
+            f"log written after {written:.2f}s, {getattr(handler, 'dropped', 0)} dropped"
+        )
+        logger.removeHandler(handler)
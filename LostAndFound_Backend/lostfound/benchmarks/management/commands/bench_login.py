@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import UserProfile
+from api.passwords import hash_timings
+from api.views import CustomTokenObtainPairView
+
+PASSWORD = "bench-login-password"
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent logins under the hashing cap and report hash time percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=64)
+        parser.add_argument("--concurrency", type=int, default=16, help="Simultaneous login requests")
+        parser.add_argument("--users", type=int, default=8)
+
+    def handle(self, *args, **options):
+        users = []
+        for number in range(options["users"]):
+            user, _ = UserProfile.objects.get_or_create(
+                username=f"bench-login-{number}", defaults={"email": f"bench-login-{number}@example.com"}
+            )
+            user.set_password(PASSWORD)
+            user.save(update_fields=["password"])
+            users.append(user)
+
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = CustomTokenObtainPairView.as_view(throttle_classes=[])
+
+        def login(number):
+            user = users[number % len(users)]
+            request = factory.post("/api/auth/login/", {"username": user.username, "password": PASSWORD}, format="json")
+            return view(request).status_code
+
+        hash_timings.clear()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as clients:
+            statuses = list(clients.map(login, range(options["logins"])))
+        elapsed = time.perf_counter() - started
+
+        ok = statuses.count(200)
+        shed = statuses.count(429)
+        self.stdout.write(
+            f"{ok} logins in {elapsed:.2f}s ({ok / elapsed:.1f}/s), {shed} shed with 429, "
+            f"{len(statuses) - ok - shed} other"
+        )
+        self.report()
+
+        # Raising the work factor upgrades each stored hash on that user's next login
+        iterations = settings.PASSWORD_HASH_ITERATIONS + 10000
+        with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+            login(0)
+            users[0].refresh_from_db(fields=["password"])
+            stored = identify_hasher(users[0].password).decode(users[0].password)["iterations"]
+        self.stdout.write(f"rehash on login: stored iterations now {stored} (target {iterations})")
+
+    def report(self):
+        workers = settings.PASSWORD_HASHING_WORKERS
+        for algorithm, timing in hash_timings.percentiles().items():
+            self.stdout.write(
+                f"{algorithm:<16} n={timing['count']:<5} p50={timing['p50']:.1f}ms p90={timing['p90']:.1f}ms "
+                f"p99={timing['p99']:.1f}ms max={timing['max']:.1f}ms  "
+                f"~{workers * 1000 / timing['p50']:.0f} logins/s with {workers} workers"
+            )
@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.synthetic import seed_items
+from api.models import LostFoundItem
+from api.similarity import similarity_index, term_counts, tf
+from api.views import ItemMatchesView
+
+
+def python_scores(item, limit):
+    """The same ranking with per-posting Python loops instead of NumPy, for comparison"""
+    index = similarity_index
+    opposite = 2 if item.category.lower() == "lost" else 1
+    scores = {}
+    for token, count in term_counts(item.title, item.description).items():
+        term = index._terms.get(token)
+        if term is None:
+            continue
+        start, end = index._indptr[term], index._indptr[term + 1]
+        idf = index._idf(term)
+        for row, value in zip(index._rows[start:end].tolist(), index._tfs[start:end].tolist()):
+            scores[row] = scores.get(row, 0.0) + value * idf * idf * tf(count)
+    ranked = [
+        (index._item_ids[row], score / index._norms[row]) for row, score in scores.items()
+        if index._alive[row] and index._categories[row] == opposite
+    ]
+    return sorted(ranked, key=lambda pair: pair[1], reverse=True)[:limit]
+
+
+class Command(BaseCommand):
+    help = "Benchmark /api/items/<pk>/matches/: index load, NumPy scoring vs. Python loops, incremental saves"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=0, help="Seed the item table up to this many rows first (e.g. 500000)")
+        parser.add_argument("--queries", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options["items"]:
+            seed_items(options["items"])
+        self.stdout.write(f"{LostFoundItem.objects.count()} items in table")
+
+        similarity_index.clear()
+        started = time.perf_counter()
+        similarity_index.sync()
+        index = similarity_index
+        megabytes = sum(a.nbytes for a in (index._indptr, index._rows, index._tfs, index._row_indptr, index._row_terms,
+                                           index._item_ids, index._categories, index._versions, index._norms,
+                                           index._alive)) / 2**20
+        self.stdout.write(
+            f"loaded {index._live} vectors, {len(index._rows)} postings ({megabytes:.0f} MB of arrays) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        rng = random.Random(3)
+        ids = list(LostFoundItem.objects.filter(is_deleted=False).values_list("id", flat=True))
+        items = list(LostFoundItem.objects.in_bulk(rng.sample(ids, min(options["queries"], len(ids)))).values())
+        limit = settings.MATCH_TOP_K
+
+        vectorized, looped, requests = [], [], []
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = ItemMatchesView.as_view(throttle_classes=[])
+        for item in items:
+            started = time.perf_counter()
+            similarity_index.similar(item, limit)
+            vectorized.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            python_scores(item, limit)
+            looped.append((time.perf_counter() - started) * 1000)
+
+            # No response cache, so every request scores
+            with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+                started = time.perf_counter()
+                view(factory.get(f"/api/items/{item.pk}/matches/"), pk=item.pk).render()
+                requests.append((time.perf_counter() - started) * 1000)
+
+        pick = lambda values, q: sorted(values)[min(len(values) - 1, int(q * len(values)))]
+        for label, values in (("NumPy scoring", vectorized), ("Python loops", looped), ("full request", requests)):
+            self.stdout.write(f"{label:<14} p50={statistics.median(values):8.2f} ms  p99={pick(values, 0.99):8.2f} ms")
+
+        # What the post_save handler does: append a new row to the delta
+        started = time.perf_counter()
+        for item in items:
+            item.title, item.updated_at = f"{item.title} zipper", timezone.now()
+            similarity_index.index_item(item)
+        self.stdout.write(f"incremental refresh: {(time.perf_counter() - started) * 1000 / len(items):.3f} ms/item")
+        started = time.perf_counter()
+        similarity_index._compact()
+        self.stdout.write(f"compaction: {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.synthetic import seed_items
+from api.search import search_index, uses_database_search
+from api.views import LostFoundItemListCreateView
+
+
+class Command(BaseCommand):
+    help = "Benchmark GET /api/items/?search= against the unfiltered full-table list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=0, help="Seed the item table up to this many rows first")
+        parser.add_argument("--runs", type=int, default=20, help="Requests per query")
+        parser.add_argument("--skip-full-list", action="store_true", help="Skip the (slow) full-table baseline")
+
+    def handle(self, *args, **options):
+        if options["items"]:
+            seed_items(options["items"])
+
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = LostFoundItemListCreateView.as_view(throttle_classes=[])
+        backend = "postgres tsvector/GIN" if uses_database_search() else "in-process inverted index"
+        self.stdout.write(f"Search backend: {backend}")
+
+        if not uses_database_search():
+            started = time.perf_counter()
+            search_index.sync()
+            self.stdout.write(f"Index build: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        def measure(path, runs):
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                response = view(factory.get(path))
+                response.render()
+                timings.append((time.perf_counter() - started) * 1000)
+            return timings, response
+
+        if not options["skip_full_list"]:
+            timings, response = measure("/api/items/", 3)
+            self.report("full list", timings, len(response.data))
+
+        for query in ("wallet", "black leather", "library", "wireless head", "umbrella gym"):
+            timings, response = measure(f"/api/items/?search={query}", options["runs"])
+            self.report(f"search {query!r}", timings, response.data["count"])
+
+    def report(self, label, timings, rows):
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f"{label:<28} rows={rows:<8} median={statistics.median(timings):8.2f} ms  p95={p95:8.2f} ms"
+        )
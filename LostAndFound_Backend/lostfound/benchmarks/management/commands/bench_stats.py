@@ -0,0 +1,43 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from benchmarks.synthetic import seed_items
+from api.models import ItemDailyCount, LostFoundItem
+from api.stats import rebuild, summary
+
+
+class Command(BaseCommand):
+    help = "Benchmark the /api/stats/ rollup summary against aggregating the item table directly"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=0, help="Seed the item table up to this many rows first")
+        parser.add_argument("--runs", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options["items"]:
+            seed_items(options["items"])
+        started = time.perf_counter()
+        rebuild()  # seeding uses bulk_create, which skips the incremental path
+        self.stdout.write(
+            f"{LostFoundItem.objects.count()} items -> {ItemDailyCount.objects.count()} buckets, "
+            f"rebuild {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+        rollups, scans = [], []
+        for _ in range(options["runs"]):
+            started = time.perf_counter()
+            summary()
+            rollups.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            live = LostFoundItem.objects.filter(is_deleted=False).order_by()
+            list(live.values("category").annotate(count=Count("id")))
+            list(live.values("location").annotate(count=Count("id")).order_by("-count")[:10])
+            list(live.values("created_at__date").annotate(count=Count("id")))
+            scans.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(f"rollups    median={statistics.median(rollups):8.2f} ms")
+        self.stdout.write(f"item scan  median={statistics.median(scans):8.2f} ms")
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+from api.throttling import SLIDING_WINDOW, TOKEN_BUCKET, SharedAnonRateThrottle, SharedMemoryStore
+
+
+def drf_throttle(cache, rate):
+    """DRF's AnonRateThrottle (timestamp history in the cache) on the given cache"""
+    return type("BenchAnonRateThrottle", (AnonRateThrottle,), {"cache": cache, "rate": rate})
+
+
+def shared_throttle(rate, algorithm):
+    return type("BenchSharedThrottle", (SharedAnonRateThrottle,), {"rate": rate, "algorithm": algorithm})
+
+
+def hammer(throttle_class, request, checks, results):
+    """One worker process: check the same client `checks` times and report how many were allowed"""
+    results.put(sum(throttle_class().allow_request(request, None) for _ in range(checks)))
+
+
+class Command(BaseCommand):
+    help = "Per-check cost and cross-process accuracy of DRF's cache throttles vs. the shared store"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checks", type=int, default=20000, help="Checks for the cost measurement")
+        parser.add_argument("--clients", type=int, default=500, help="Distinct client addresses")
+        parser.add_argument("--rate", default="100/min", help="Rate for the cost measurement")
+        parser.add_argument("--workers", type=int, default=4, help="Processes for the accuracy check")
+        parser.add_argument("--limit", type=int, default=50, help="Per-minute limit for the accuracy check")
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = [factory.get("/api/items/", REMOTE_ADDR=f"10.0.{n // 250}.{n % 250}") for n in range(options["clients"])]
+        for request in requests:
+            request.user = AnonymousUser()
+
+        with tempfile.TemporaryDirectory() as directory:
+            def contenders(rate):
+                return [
+                    ("DRF + LocMemCache", drf_throttle(LocMemCache(f"bench-{rate}", {}), rate)),
+                    ("DRF + FileBasedCache", drf_throttle(FileBasedCache(os.path.join(directory, f"cache-{rate}"), {}), rate)),
+                    ("shared token bucket", shared_throttle(rate, TOKEN_BUCKET)),
+                    ("shared sliding window", shared_throttle(rate, SLIDING_WINDOW)),
+                ]
+
+            # A fresh store per measurement, so runs never see each other's counts
+            def store(name):
+                return SharedMemoryStore({"LOCATION": os.path.join(directory, name), "SLOTS": 65536})
+
+            self.stdout.write(f"cost: {options['checks']} checks over {options['clients']} clients at {options['rate']}")
+            for number, (label, throttle_class) in enumerate(contenders(options["rate"])):
+                with mock.patch("api.throttling.get_store", return_value=store(f"cost-{number}")):
+                    self.cost(label, throttle_class, requests, options["checks"])
+
+            limit = options["limit"]
+            self.stdout.write(
+                f"accuracy: {options['workers']} processes x {limit * 2} checks on one client, limit {limit}/min"
+            )
+            for number, (label, throttle_class) in enumerate(contenders(f"{limit}/min")):
+                with mock.patch("api.throttling.get_store", return_value=store(f"accuracy-{number}")):
+                    self.accuracy(label, throttle_class, requests[0], options["workers"], limit)
+
+    def cost(self, label, throttle_class, requests, checks):
+        started = time.perf_counter()
+        allowed = 0
+        for number in range(checks):
+            # DRF builds fresh throttle instances for every request
+            allowed += throttle_class().allow_request(requests[number % len(requests)], None)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {label:<24} {elapsed / checks * 1e6:7.1f}us/check  {allowed} allowed")
+
+    def accuracy(self, label, throttle_class, request, workers, limit):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [
+            context.Process(target=hammer, args=(throttle_class, request, limit * 2, results)) for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        allowed = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        self.stdout.write(f"  {label:<24} {allowed:5d} allowed (limit {limit})")
@@ -0,0 +1,81 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import LostFoundItem, NotificationJob
+from api.notifications import run_pending_jobs
+from benchmarks.smtp_sink import SMTPSink
+from api.utils import build_contact_reporter_message
+from api.views import ContactReporterView
+
+
+class Command(BaseCommand):
+    help = "Load test POST /api/contact-reporter/: per-request SMTP (old path) vs. the notification outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=40)
+        parser.add_argument("--concurrency", type=int, default=4, help="Simulated request workers")
+        parser.add_argument("--smtp-delay", type=float, default=0.2, help="Seconds the sink stalls per message")
+
+    def handle(self, *args, **options):
+        sink = SMTPSink("127.0.0.1", 0, delay=options["smtp_delay"])
+        sink.start()
+        host, port = sink.server_address
+
+        user, _ = get_user_model().objects.get_or_create(username="contact-loadtest", defaults={"email": "loadtest@example.com"})
+        item = LostFoundItem.objects.filter(is_deleted=False).first() or LostFoundItem.objects.create(
+            title="Load test item", description="Created by loadtest_contact", category="lost", location="Nowhere",
+        )
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = ContactReporterView.as_view(throttle_classes=[])
+        body = json.dumps({"item_id": item.pk, "mail": "owner@example.com", "message": "I think I found your item."})
+
+        def call(_):
+            request = factory.post("/api/contact-reporter/", body, content_type="application/json")
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            view(request)
+            return time.perf_counter() - started
+
+        def run(label):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options["concurrency"]) as executor:
+                busy = list(executor.map(call, range(options["requests"])))
+            wall = time.perf_counter() - started
+            occupancy = sum(busy) / (wall * options["concurrency"])
+            self.stdout.write(
+                f"{label:<22} wall={wall:6.2f}s  mean request={sum(busy) / len(busy) * 1000:8.1f} ms  "
+                f"worker occupancy={occupancy:6.1%}"
+            )
+
+        def send_directly(item_id, mail, message):
+            # The pre-outbox behaviour: connect, log in and send inside the request
+            subject, text, html = build_contact_reporter_message(message)
+            email = EmailMultiAlternatives(subject, text, settings.DEFAULT_FROM_EMAIL, [mail])
+            email.attach_alternative(html, "text/html")
+            email.send()
+
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=host, EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+        ):
+            with mock.patch("api.views.enqueue_contact_reporter_mail", send_directly):
+                run("before (inline SMTP)")
+
+            queued_before = NotificationJob.objects.filter(kind=NotificationJob.KIND_CONTACT_REPORTER).count()
+            run("after (outbox)")
+            started = time.perf_counter()
+            processed = run_pending_jobs()
+            self.stdout.write(f"worker drained {processed} job(s) in {time.perf_counter() - started:.2f}s off the request path "
+                              f"({NotificationJob.objects.filter(kind=NotificationJob.KIND_CONTACT_REPORTER).count() - queued_before} queued)")
+
+        sink.shutdown()
+        self.stdout.write(f"sink received {len(sink.messages)} messages")
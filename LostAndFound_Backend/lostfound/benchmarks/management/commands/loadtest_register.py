@@ -0,0 +1,88 @@
+import statistics
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import UserProfile
+from api.serializers import RegisterSerializer
+from api.views import RegisterView
+
+
+def seed_users(count, batch_size=10000):
+    """Top the user table up to count rows with unusable passwords"""
+    missing = count - UserProfile.objects.count()
+    start = UserProfile.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    while missing > 0:
+        batch = [
+            UserProfile(username=f"seed-user-{n}", email=f"Seed-User-{n}@Example.com", password="!")
+            for n in range(start, start + min(batch_size, missing))
+        ]
+        UserProfile.objects.bulk_create(batch)
+        start += len(batch)
+        missing -= len(batch)
+
+
+class Command(BaseCommand):
+    help = "Load test POST /api/auth/register/ against a large user table (default 1M users)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000, help="Seed the user table up to this many rows first")
+        parser.add_argument("--signups", type=int, default=200)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        seed_users(options["users"])
+        total = UserProfile.objects.count()
+        self.stdout.write(f"{total} users in table (seeding {time.perf_counter() - started:.1f} s)")
+
+        probes = [(f"Seed-User-{n * 7919 % total}", f"new-{uuid4().hex[:8]}@example.com") for n in range(options["signups"])]
+
+        # Old path: two case-insensitive exists() scans, then a re-read of the created row
+        legacy = self.time_each(probes, lambda username, email: (
+            UserProfile.objects.filter(email__iexact=email).exists(),
+            UserProfile.objects.filter(username__iexact=username).exists(),
+            UserProfile.objects.filter(username=username).first(),
+        ))
+        # New path: one OR query over the Lower() unique indexes
+        single = self.time_each(probes, lambda username, email: RegisterSerializer(
+            data={"username": username, "email": email, "password": "x"}
+        ).is_valid())
+        self.report("legacy uniqueness checks", legacy)
+        self.report("single-query check", single)
+
+        # Full signups; a cheap hasher keeps PBKDF2 from hiding the database cost
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = RegisterView.as_view(throttle_classes=[])
+        prefix = f"loadtest-{uuid4().hex[:6]}"
+        with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]):
+            signups = self.time_each(
+                [(f"{prefix}-{n}", f"{prefix}-{n}@example.com") for n in range(options["signups"])],
+                lambda username, email: self.assert_created(view(factory.post(
+                    "/api/auth/register/", {"username": username, "email": email, "password": "pw"}, format="json"
+                ))),
+            )
+        self.report("POST /api/auth/register/", signups)
+        self.stdout.write(f"signups/sec (MD5 hasher): {len(signups) / (sum(signups) / 1000):.0f}")
+        UserProfile.objects.filter(username__startswith=prefix).delete()
+
+    @staticmethod
+    def assert_created(response):
+        assert response.status_code == 201, response.data
+
+    @staticmethod
+    def time_each(probes, call):
+        timings = []
+        for username, email in probes:
+            started = time.perf_counter()
+            call(username, email)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(f"{label:<26} median={statistics.median(timings):8.3f} ms  p95={p95:8.3f} ms")
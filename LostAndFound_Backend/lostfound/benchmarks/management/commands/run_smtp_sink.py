@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.smtp_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = "Run a local SMTP sink (point EMAIL_HOST/EMAIL_PORT at it and set EMAIL_USE_TLS=false)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+        parser.add_argument("--delay", type=float, default=0.0, help="Seconds to stall each DATA command")
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options["host"], options["port"], options["delay"])
+        original_record = sink.record
+
+        def record(envelope, data):
+            original_record(envelope, data)
+            self.stdout.write(f"Received mail from {envelope['from']} to {', '.join(envelope['to'])} ({len(data)} bytes)")
+
+        sink.record = record
+        self.stdout.write(f"SMTP sink listening on {options['host']}:{options['port']}")
+        try:
+            sink.serve_forever()
+        except KeyboardInterrupt:
+            sink.shutdown()
@@ -0,0 +1,81 @@
+"""Local stand-in SMTP server that accepts and records mail, for tests and load tests."""
+import socketserver
+import threading
+import time
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.count_session()
+        envelope = {"from": None, "to": []}
+        self.reply("220 lostfound-sink ESMTP ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self.reply("250-lostfound-sink" if verb == "EHLO" else "250 lostfound-sink")
+                if verb == "EHLO":
+                    self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                envelope = {"from": command[10:].strip(" <>"), "to": []}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(command[8:].strip(" <>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                if server.delay:
+                    time.sleep(server.delay)
+                server.record(envelope, b"".join(lines))
+                self.reply("250 OK: queued")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "RSET":
+                envelope = {"from": None, "to": []}
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Plain-text SMTP server keeping received messages in memory; delay simulates a slow relay"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=1025, delay=0.0):
+        super().__init__((host, port), SMTPSinkHandler)
+        self.delay = delay
+        self.messages = []
+        self.sessions = 0  # SMTP connections accepted
+        self._lock = threading.Lock()
+
+    def count_session(self):
+        with self._lock:
+            self.sessions += 1
+
+    def record(self, envelope, data):
+        with self._lock:
+            self.messages.append({"from": envelope["from"], "to": list(envelope["to"]), "data": data})
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,45 @@
+"""Synthetic data shared by the benchmark commands."""
+import random
+
+from api.models import LostFoundItem
+
+OBJECTS = [
+    "wallet", "phone", "keys", "backpack", "laptop", "umbrella", "watch", "headphones",
+    "charger", "jacket", "bottle", "calculator", "notebook", "glasses", "id card", "ring",
+]
+ADJECTIVES = [
+    "black", "red", "blue", "leather", "silver", "small", "large", "grey", "green",
+    "white", "old", "new", "striped", "wireless", "brown", "gold",
+]
+# Synthetic items are scattered within ~25 km of this point
+CENTER = (12.9716, 77.5946)
+SPREAD_DEGREES = 0.25
+
+LOCATIONS = [
+    "Main Library", "Cafeteria", "Gym", "Parking Lot B", "Lecture Hall 3", "Bus Stop",
+    "Hostel Block A", "Computer Lab", "Auditorium", "Admin Office", "Sports Ground",
+]
+
+
+def seed_items(count, batch_size=5000, seed=42):
+    """Top the item table up to count rows of randomised lost/found reports"""
+    rng = random.Random(seed)
+    missing = count - LostFoundItem.objects.count()
+    while missing > 0:
+        batch = []
+        for _ in range(min(batch_size, missing)):
+            obj = rng.choice(OBJECTS)
+            adjective = rng.choice(ADJECTIVES)
+            location = rng.choice(LOCATIONS)
+            item = LostFoundItem(
+                title=f"{adjective.title()} {obj}",
+                description=f"{adjective} {obj} {rng.choice(ADJECTIVES)} near {location.lower()} #{rng.randint(1, 10**6)}",
+                category=rng.choice(("lost", "found")),
+                location=location,
+                latitude=CENTER[0] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+                longitude=CENTER[1] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+            )
+            item.refresh_geohash()
+            batch.append(item)
+        LostFoundItem.objects.bulk_create(batch)
+        missing -= len(batch)
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
+from django.core.signals import request_started
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lostfound.settings')
 
 application = get_asgi_application()
+
+from api.signals import warm_similarity_index  # noqa: E402  (needs the app registry)
+
+request_started.connect(warm_similarity_index)
@@ -39,10 +39,13 @@ INSTALLED_APPS = [
     'cloudinary_storage',
     'cloudinary',
     'api',
-
 ]
+# Benchmark and load-test commands (benchmarks/), left out of production's manage.py
+if os.getenv("BENCHMARKS") == "1":
+    INSTALLED_APPS.append('benchmarks')
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',  # first, so its timings cover the whole stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -83,23 +86,92 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'api.authentication.CachedJWTAuthentication'
     ],
     'DEFAULT_PERMISSION_CLASSES': ('rest_framework.permissions.IsAuthenticated'),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        'api.throttling.SharedUserRateThrottle',
+        'api.throttling.SharedAnonRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '100/day',  
         'anon': '50/day',
         'login_attempts': '5/minute', 
+        'location_autocomplete': '120/minute',
     }
 }
 
 AUTH_USER_MODEL = 'api.UserProfile'
 
+# Throttle state shared by all workers on this host: a memory-mapped table (SharedMemoryStore).
+# BACKEND may name another class with the same hit(key, limit, period, algorithm) method.
+THROTTLE_STORE = {
+    "BACKEND": os.getenv("THROTTLE_STORE_BACKEND", "api.throttling.SharedMemoryStore"),
+    "LOCATION": os.getenv("THROTTLE_STORE_LOCATION", "/dev/shm/lostfound-throttle" if os.path.isdir("/dev/shm") else "/tmp/lostfound-throttle"),
+    "SLOTS": int(os.getenv("THROTTLE_STORE_SLOTS", "65536")),
+}
+# "token_bucket" (bursts up to the rate, then a steady refill) or "sliding_window"
+THROTTLE_ALGORITHM = os.getenv("THROTTLE_ALGORITHM", "token_bucket")
+
+# Shared cache for item responses. Use "file" or "redis" with several workers:
+# local memory is per process, so other workers would keep serving their own copies.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv("CACHE_LOCATION", "/tmp/lostfound-cache" if CACHE_BACKEND == "file" else ""),
+    }
+}
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+
+# Largest batch accepted by /api/items/bulk/
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+
+# archive_items moves items out of the hot table once untouched this long (days):
+# soft-deleted ones, and resolved ones (lost reports since marked as found).
+ARCHIVE_DELETED_AFTER_DAYS = int(os.getenv("ARCHIVE_DELETED_AFTER_DAYS", "30"))
+ARCHIVE_RESOLVED_AFTER_DAYS = int(os.getenv("ARCHIVE_RESOLVED_AFTER_DAYS", "180"))
+
+# How often (seconds) the in-process search index pulls rows written by other workers.
+SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "30"))
+
+# Same for the in-memory location dictionary; item counts used to rank suggestions refresh less often.
+LOCATION_DICTIONARY_REFRESH_SECONDS = int(os.getenv("LOCATION_DICTIONARY_REFRESH_SECONDS", "30"))
+LOCATION_USAGE_REFRESH_SECONDS = int(os.getenv("LOCATION_USAGE_REFRESH_SECONDS", "600"))
+# Places typed by reporters are suggested once this many live items use them, or an admin approves them
+LOCATION_SUGGEST_MIN_ITEMS = int(os.getenv("LOCATION_SUGGEST_MIN_ITEMS", "3"))
+
+
+# "wsgi" (gunicorn sync workers) or "asgi" (lostfound.asgi on uvicorn workers, see Procfile).
+# In asgi mode login, contact, item update/notify and the upload endpoints are served by
+# async views (JWT auth only), so a worker is not held while they wait on I/O.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
+# Password hashing: the first hasher hashes new passwords; hashes made with an older
+# algorithm or work factor are upgraded on the user's next login. At most WORKERS logins hash
+# at once (on a thread pool under ASGI, on the request thread under WSGI) and QUEUE more
+# wait; requests beyond that are shed with 429 + Retry-After.
+PASSWORD_HASHERS = [
+    "api.passwords.TimedPBKDF2PasswordHasher",
+    "api.passwords.TimedScryptPasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+if os.getenv("PASSWORD_HASH_ALGORITHM", "pbkdf2_sha256") == "scrypt":
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "870000"))
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASHING_QUEUE = int(os.getenv("PASSWORD_HASHING_QUEUE", "32"))
+
+# Authenticated users are resolved from a per-process LRU instead of one query per request;
+# changes made by other workers are picked up after the TTL (seconds).
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
@@ -116,14 +188,64 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Item images: direct-upload tickets + background thumbnailing.
+# Use api.storage.LocalUploadStorage for local development and tests.
+UPLOAD_STORAGE = {
+    "BACKEND": os.getenv("UPLOAD_STORAGE_BACKEND", "api.storage.CloudinaryUploadStorage"),
+    "TICKET_MAX_AGE": int(os.getenv("UPLOAD_TICKET_MAX_AGE", "900")),
+    "PUBLIC_BASE_URL": os.getenv("UPLOAD_PUBLIC_BASE_URL", "http://localhost:8000"),
+    # Largest body accepted by the LocalUploadStorage PUT target
+    "MAX_BYTES": int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024))),
+}
+UPLOAD_PROCESSING_WORKERS = int(os.getenv("UPLOAD_PROCESSING_WORKERS", "2"))
+# An image still processing after this long lost its web worker; the process_notifications
+# worker then re-runs it from storage, or marks it failed when the original never got there
+UPLOAD_PROCESSING_TIMEOUT = int(os.getenv("UPLOAD_PROCESSING_TIMEOUT", "900"))
+# Processes rendering resized WebP/AVIF/JPEG variants, per web worker. Every gunicorn worker
+# starts its own pool, so by default (0) the cores are split between the WEB_CONCURRENCY workers.
+IMAGE_PROCESSING_PROCESSES = int(os.getenv("IMAGE_PROCESSING_PROCESSES", "0")) or max(
+    1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "1"))
+)
+
+# Used by the process_notifications worker for all outgoing mail (with BENCHMARKS=1, run_smtp_sink
+# gives a local stand-in)
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = "smtp.gmail.com"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() == "true"
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("EMAIL_HOST_USER")
 
+# Outbox worker (python manage.py process_notifications)
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "200"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "60"))
+NOTIFICATION_LEASE_SECONDS = int(os.getenv("NOTIFICATION_LEASE_SECONDS", "600"))
+
+# Found-item notifications go only to reporters of the best-matching lost items
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "5"))
+MATCH_MIN_SCORE = float(os.getenv("MATCH_MIN_SCORE", "0.2"))
+MATCH_WINDOW_DAYS = int(os.getenv("MATCH_WINDOW_DAYS", "60"))
+# /api/items/<pk>/matches/: cosine similarity of TF-IDF vectors held in each process
+SIMILARITY_MIN_SCORE = float(os.getenv("SIMILARITY_MIN_SCORE", "0.1"))
+SIMILARITY_INDEX_REFRESH_SECONDS = int(os.getenv("SIMILARITY_INDEX_REFRESH_SECONDS", "30"))
+# Server workers load the vectors in the background on their first request instead of
+# inside the first /matches/ request (seconds at 500k items)
+SIMILARITY_INDEX_WARM_UP = os.getenv("SIMILARITY_INDEX_WARM_UP", "1") == "1"
+
+# Near-duplicate reports: a new item repeating one filed by the same user or at the
+# same location within DEDUP_WINDOW_HOURS is flagged (duplicate_of). With "merge", a
+# repeat of the user's own report is not created at all. Text must overlap by DEDUP_MIN_SIMILARITY (word Jaccard), or
+# photos differ in at most DEDUP_IMAGE_MAX_DISTANCE of 64 dHash bits (3 is always found).
+DEDUP_ACTION = os.getenv("DEDUP_ACTION", "flag")
+DEDUP_WINDOW_HOURS = int(os.getenv("DEDUP_WINDOW_HOURS", "72"))
+DEDUP_MIN_SIMILARITY = float(os.getenv("DEDUP_MIN_SIMILARITY", "0.6"))
+DEDUP_IMAGE_MAX_DISTANCE = int(os.getenv("DEDUP_IMAGE_MAX_DISTANCE", "3"))
+
 if not EMAIL_HOST_USER or not EMAIL_HOST_PASSWORD:
     raise ValueError(" EMAIL credentials missing! Set EMAIL_HOST_USER and EMAIL_HOST_PASSWORD in .env")
 
@@ -134,35 +256,49 @@ DATABASES = {
     )
 }
 
-LOGS_DIR = os.path.join(BASE_DIR, 'logs')
-os.makedirs(LOGS_DIR, exist_ok=True)
-
+# JSON lines, written by a background thread so logging never blocks a request on I/O.
+# They go to stdout, which gunicorn (--log-file -, see Procfile) and the platform collect;
+# with LOG_FILE set every worker appends to that file instead, and rotation is left to
+# logrotate (the handler reopens the file once it is moved).
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
+        'json': {
+            '()': 'api.logs.JSONLineFormatter',
         },
     },
     'handlers': {
-        'file': {
+        'queued': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(LOGS_DIR, 'django.log'),
-            'formatter': 'verbose',
+            'class': 'api.logs.QueuedLogHandler',
+            'filename': os.getenv("LOG_FILE") or None,
+            'queueSize': int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            'formatter': 'json',
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['file'],
+            'handlers': ['queued'],
             'level': 'INFO',
             'propagate': True,
         },
+        'api': {
+            'handlers': ['queued'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+# Requests slower than this are logged (api.metrics) with their query breakdown
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "500"))
+# Bearer token required to scrape /metrics; without one the endpoint only answers when DEBUG is on
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Workers record metrics in per-process memory-mapped files here, so one scrape covers the
+# whole host; set it empty to keep them per process (then scrape every worker).
+METRICS_DIR = os.getenv("METRICS_DIR", "/dev/shm/lostfound-metrics" if os.path.isdir("/dev/shm") else "/tmp/lostfound-metrics")
+
 
 
 if not DEBUG:
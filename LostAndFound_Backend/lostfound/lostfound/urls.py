@@ -4,13 +4,19 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
 
+from api.views import metrics_view
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path("metrics", metrics_view, name="metrics"),
     
    ]
 
+# Serves files written by the local upload storage stand-in
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
 
 
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
+from django.core.signals import request_started
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lostfound.settings')
 
 application = get_wsgi_application()
+
+from api.signals import warm_similarity_index  # noqa: E402  (needs the app registry)
+
+request_started.connect(warm_similarity_index)
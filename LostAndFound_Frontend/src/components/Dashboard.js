@@ -26,21 +26,42 @@ const Dashboard = () => {
   const [openError, setOpenError] = useState(false);
   const [openContact, setOpenContact] = useState(false); 
   const [selectedItem, setSelectedItem] = useState(null); 
+  const [stats, setStats] = useState(null);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Feed is cursor-paginated: append each page and keep the "next" link
+  const fetchItems = async (url) => {
+    try {
+      const response = await axios.get(url);
+
+      setItems((prev) => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      setError(" Failed to load items. Please try again.");
+      setOpenError(true);
+    } finally {
+      setLoading(false);
+      setLoadingMore(false);
+    }
+  };
+
   // Fetch Items from Backend
   useEffect(() => {
-    const fetchItems = async () => {
-      try {
-        const response = await axios.get("https://lostandfound-backend-loxq.onrender.com/api/items/");
-        
-        setItems(response.data);
-      } catch (err) {
-        setError(" Failed to load items. Please try again.");
-        setOpenError(true);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchItems();
+    fetchItems("https://lostandfound-backend-loxq.onrender.com/api/items/");
+  }, []);
+
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchItems(nextPage);
+  };
+
+  // Totals come from server-side rollups, not from counting the downloaded items
+  useEffect(() => {
+    axios
+      .get("https://lostandfound-backend-loxq.onrender.com/api/stats/")
+      .then((response) => setStats(response.data.totals))
+      .catch(() => setStats(null));
   }, []);
 
   const userEmail = localStorage.getItem("user_email"); 
@@ -74,6 +95,12 @@ const Dashboard = () => {
     >
       Lost & Found Items
     </Typography>
+
+    {stats && (
+      <Typography variant="subtitle1" align="center" color="textSecondary" sx={{ mb: 2 }}>
+        {stats.lost} lost · {stats.found} found · {stats.total} reported
+      </Typography>
+    )}
   
     <Snackbar
       open={openError}
@@ -204,6 +231,14 @@ const Dashboard = () => {
         ))}
       </Grid>
     )}
+
+    {!loading && nextPage && (
+      <Box display="flex" justifyContent="center" mt={4}>
+        <Button variant="contained" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? <CircularProgress size={24} color="inherit" /> : "Load more"}
+        </Button>
+      </Box>
+    )}
   
     <Dialog
       open={openContact}
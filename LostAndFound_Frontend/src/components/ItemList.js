@@ -4,18 +4,22 @@ import ContactReporter from "./ContactReporter";
 import axiosInstance from "../api";
 import { 
   Card, CardMedia, CardContent, Typography, 
-  Container, CircularProgress, Alert, Box, Grid 
+  Container, CircularProgress, Alert, Box, Grid, Button 
 } from "@mui/material";
 
 const ItemList = () => {
   const [items, setItems] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextPage, setNextPage] = useState(null);
 
-  useEffect(() => {
-    axiosInstance.get("/items/")
+  // Feed is cursor-paginated: append each page and keep the "next" link
+  const fetchPage = (url) => {
+    setLoading(true);
+    axiosInstance.get(url)
         .then((response) => {
-            setItems(response.data);
+            setItems((prev) => [...prev, ...response.data.results]);
+            setNextPage(response.data.next);
         })
         .catch((err) => {
             const errorMessage = err.response
@@ -27,6 +31,10 @@ const ItemList = () => {
         .finally(() => {
             setLoading(false);
         });
+  };
+
+  useEffect(() => {
+    fetchPage("/items/");
 }, []);
 
 
@@ -179,6 +187,14 @@ const ItemList = () => {
       ))}
     </Grid>
   )}
+
+  {!loading && nextPage && (
+    <Box display="flex" justifyContent="center" mt={4}>
+      <Button variant="contained" onClick={() => fetchPage(nextPage)}>
+        Load more
+      </Button>
+    </Box>
+  )}
 </Container>
 
   );
@@ -34,7 +34,7 @@ const SearchBar = ({ setItems }) => {
 
       try {
         const { data } = await axiosInstance.get(`/items/?search=${searchTerm}`);
-        setItems(data);
+        setItems(data.results);
       } catch (err) {
         setError("Failed to search. Please try again!");
         setOpenSnackbar(true);